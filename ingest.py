@@ -10,17 +10,31 @@ import os
 import sys
 import logging
 import base64
+import codecs
+import hashlib
+import io
 import json
-import time
+import queue
+import re
 import subprocess
-from datetime import datetime, timezone
-from typing import Dict, List, Optional
+import time
+import uuid
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from urllib.parse import urlparse
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 
 import pandas as pd
 import requests
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.exc import SQLAlchemyError, OperationalError
 from sqlalchemy.pool import QueuePool
 import numpy as np
@@ -100,9 +114,9 @@ def get_database_path() -> str:
     db_path = project_root / 'commerce7_dw.db'
     return f"sqlite:///{db_path}"
 
-def create_database_engine():
+def create_database_engine(database_url: Optional[str] = None):
     """Create a database engine with proper connection pooling and timeout settings."""
-    database_url = get_database_path()
+    database_url = database_url or get_database_path()
     
     if 'postgresql' in database_url:
         # PostgreSQL-specific engine configuration
@@ -126,6 +140,893 @@ def create_database_engine():
     
     return engine
 
+class DatabaseContext:
+    """Process-wide database engine shared by every client and the dbt step.
+
+    Building an engine per call creates a fresh pool, so every batch paid for a
+    new TLS handshake to Render Postgres. One context holds a single pooled
+    engine for the whole run and tracks how many physical connections were
+    opened and how long callers waited to check one out of the pool.
+    """
+    
+    def __init__(self, database_url: Optional[str] = None):
+        self.database_url = database_url or get_database_path()
+        self.engine = create_database_engine(self.database_url)
+        self.connections_opened = 0
+        self.checkouts = 0
+        self.checkout_wait_seconds = 0.0
+        self.max_checkout_wait_seconds = 0.0
+        self.ensured_tables = set()
+        self.partitioned_tables = set()
+        self._lock = threading.Lock()
+        event.listen(self.engine, 'connect', self._on_connect)
+    
+    @property
+    def is_postgres(self) -> bool:
+        return 'postgresql' in self.database_url
+    
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connections_opened += 1
+        logger.debug(f"Opened new database connection (total opened: {self.connections_opened})")
+    
+    def _record_checkout(self, started: float):
+        wait = time.perf_counter() - started
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_seconds += wait
+            self.max_checkout_wait_seconds = max(self.max_checkout_wait_seconds, wait)
+    
+    @contextmanager
+    def connect(self):
+        """Check a connection out of the shared pool (caller commits)."""
+        started = time.perf_counter()
+        conn = self.engine.connect()
+        self._record_checkout(started)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    @contextmanager
+    def begin(self):
+        """Check a connection out of the shared pool inside a single transaction."""
+        started = time.perf_counter()
+        with self.engine.begin() as conn:
+            self._record_checkout(started)
+            yield conn
+    
+    def log_pool_stats(self):
+        """Log connection/checkout statistics for the run."""
+        avg_wait = self.checkout_wait_seconds / self.checkouts if self.checkouts else 0.0
+        logger.info(
+            f"📊 DB pool: {self.connections_opened} connection(s) opened, "
+            f"{self.checkouts} checkout(s), total wait {self.checkout_wait_seconds:.3f}s, "
+            f"avg {avg_wait * 1000:.1f}ms, max {self.max_checkout_wait_seconds * 1000:.1f}ms"
+        )
+        logger.debug(f"Pool status: {self.engine.pool.status()}")
+    
+    def dispose(self):
+        self.engine.dispose()
+
+_db_context: Optional[DatabaseContext] = None
+_db_context_lock = threading.Lock()
+
+def get_db_context() -> DatabaseContext:
+    """Return the process-wide DatabaseContext, creating it on first use."""
+    global _db_context
+    with _db_context_lock:
+        if _db_context is None:
+            _db_context = DatabaseContext()
+        return _db_context
+
+# NULL-on-failure casts for typed_* columns and the raw partition key. They
+# run inside the raw merge transaction, so a malformed source value (an empty
+# customerId, a date string Postgres can't parse) must become NULL rather than
+# roll back the batch. Numbers and UUIDs are regex-guarded; timestamps go
+# through a small plpgsql function created by ensure_raw_table.
+TRY_CAST_PATTERNS = {
+    'uuid': '^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$',
+    'int': '^-?[0-9]{1,9}$',
+    'bigint': '^-?[0-9]{1,18}$',
+    'float': '^-?([0-9]+[.]?[0-9]*|[.][0-9]+)([eE][-+]?[0-9]+)?$',
+}
+TRY_CAST_FUNCTIONS = {
+    'timestamptz': 'typed_try_timestamptz',
+    'timestamp': 'typed_try_timestamp',
+}
+
+def try_cast(expression: str, sql_type: str, default: Optional[str] = None) -> str:
+    """SQL casting a text expression to sql_type, NULL (or default) when it doesn't parse."""
+    if sql_type in TRY_CAST_FUNCTIONS:
+        cast = f"{TRY_CAST_FUNCTIONS[sql_type]}({expression})"
+    elif sql_type == 'boolean':
+        cast = f"CASE lower({expression}) WHEN 'true' THEN true WHEN 'false' THEN false END"
+    else:
+        cast = f"CASE WHEN ({expression}) ~ '{TRY_CAST_PATTERNS[sql_type]}' THEN ({expression})::{sql_type} END"
+    return f"coalesce({cast}, {default})" if default is not None else cast
+
+def epoch_millis_to_timestamptz(expression: str) -> str:
+    return f"to_timestamp({try_cast(expression, 'bigint')} / 1000)"
+
+def json_array(expression: str) -> str:
+    """A JSONB expression, or an empty array when it isn't one (safe for jsonb_array_elements)."""
+    return f"CASE WHEN jsonb_typeof({expression}) = 'array' THEN {expression} ELSE '[]'::jsonb END"
+
+def json_array_length(expression: str) -> str:
+    return f"CASE WHEN jsonb_typeof({expression}) = 'array' THEN jsonb_array_length({expression}) END"
+
+def _ensure_try_cast_functions(conn):
+    for sql_type, function in TRY_CAST_FUNCTIONS.items():
+        if conn.execute(text("SELECT to_regprocedure(:signature)"), {'signature': f"{function}(text)"}).scalar():
+            continue
+        conn.execute(text(f"""
+            CREATE OR REPLACE FUNCTION {function}(value TEXT) RETURNS {sql_type}
+            LANGUAGE plpgsql STABLE STRICT AS $fn$
+            BEGIN
+                RETURN value::{sql_type};
+            EXCEPTION WHEN others THEN
+                RETURN NULL;
+            END
+            $fn$
+        """))
+
+# Physical layout of the raw_* landing tables, applied by ensure_raw_table on
+# Postgres. Indexes are (name, expression) pairs created IF NOT EXISTS as
+# raw_{table}_{name}_idx; '*' entries apply to every raw table.
+RAW_TABLE_INDEXES = {
+    # MAX(last_processed_at) watermarks and the staging models' incremental filters
+    '*': [('last_processed_at', 'last_processed_at')],
+    # Commerce7 bootstrap watermark, MAX(raw_updated_at(data))
+    'customer': [('updated_at_ts', 'raw_updated_at(data)')],
+    'club_membership': [('updated_at_ts', 'raw_updated_at(data)')],
+    'product': [('updated_at_ts', 'raw_updated_at(data)')],
+    'order': [('updated_at_ts', 'raw_updated_at(data)')],
+}
+
+# Indexes earlier releases created that RAW_TABLE_INDEXES has since replaced;
+# ensure_raw_table drops raw_{table}_{name}_idx for each.
+RAW_TABLE_DROPPED_INDEXES = ['updated_at']
+
+def _ensure_raw_updated_at_function(conn):
+    """Create raw_updated_at(jsonb), the indexable (data->>'updatedAt')::timestamptz.
+
+    A text-to-timestamptz cast is only STABLE (it reads TimeZone), so it can't
+    be indexed directly. Commerce7 always writes updatedAt with an explicit UTC
+    offset, which makes the result independent of TimeZone and lets the
+    function be declared IMMUTABLE. A malformed value yields NULL instead of
+    failing the raw upsert.
+    """
+    if conn.execute(text("SELECT to_regprocedure('raw_updated_at(jsonb)')")).scalar():
+        return
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION raw_updated_at(data JSONB) RETURNS TIMESTAMP WITH TIME ZONE
+        LANGUAGE plpgsql IMMUTABLE STRICT AS $fn$
+        BEGIN
+            RETURN (data->>'updatedAt')::timestamptz;
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END
+        $fn$
+    """))
+
+# Month expression (over a staged raw row) for tables that may be range
+# partitioned by month. Opt in per table with RAW_PARTITIONED_TABLES=order;
+# only a table created after opting in is partitioned.
+RAW_PARTITION_MONTH = {
+    'order': (
+        "coalesce(date_trunc('month', " + try_cast("data::jsonb->>'createdAt'", 'timestamptz')
+        + " AT TIME ZONE 'UTC')::date, date '1900-01-01')"
+    ),
+}
+
+def partitioned_raw_tables() -> set:
+    """raw_* tables (by db_table) RAW_PARTITIONED_TABLES asks to partition by month."""
+    requested = {name.strip().replace('-', '_') for name in os.getenv('RAW_PARTITIONED_TABLES', '').split(',') if name.strip()}
+    return requested & set(RAW_PARTITION_MONTH)
+
+def create_raw_table_sql(db_table: str, partitioned: bool = False) -> str:
+    """DDL for a raw_* landing table (one JSONB document per source id).
+
+    A partitioned table adds partition_month (see RAW_PARTITION_MONTH) to its
+    primary key and is range partitioned on it; ensure_raw_partitions adds the
+    monthly partitions as rows arrive.
+    """
+    if partitioned:
+        return f"""
+            CREATE TABLE IF NOT EXISTS raw_{db_table} (
+                id VARCHAR(255) NOT NULL,
+                last_processed_at TIMESTAMP WITH TIME ZONE,
+                _airbyte_ab_id VARCHAR(255),
+                _airbyte_emitted_at TIMESTAMP WITH TIME ZONE,
+                _airbyte_normalized_at TIMESTAMP WITH TIME ZONE,
+                _airbyte_{db_table}_hashid VARCHAR(255),
+                content_hash VARCHAR(64),
+                data JSONB,
+                partition_month DATE NOT NULL,
+                PRIMARY KEY (id, partition_month)
+            ) PARTITION BY RANGE (partition_month)
+        """
+    return f"""
+        CREATE TABLE IF NOT EXISTS raw_{db_table} (
+            id VARCHAR(255) PRIMARY KEY,
+            last_processed_at TIMESTAMP WITH TIME ZONE,
+            _airbyte_ab_id VARCHAR(255),
+            _airbyte_emitted_at TIMESTAMP WITH TIME ZONE,
+            _airbyte_normalized_at TIMESTAMP WITH TIME ZONE,
+            _airbyte_{db_table}_hashid VARCHAR(255),
+            content_hash VARCHAR(64),
+            data JSONB
+        )
+    """
+
+def ensure_raw_table(db: DatabaseContext, conn, db_table: str):
+    """Create raw_{db_table} (and its typed_* tables) if missing and add columns introduced after it was created.
+
+    On Postgres this also applies RAW_TABLE_INDEXES and, for tables listed in
+    RAW_PARTITIONED_TABLES, creates the table partitioned by month.
+    """
+    if not db.is_postgres:
+        conn.execute(text(create_raw_table_sql(db_table)))
+        db.ensured_tables.add(db_table)
+        return
+    
+    relkind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {'name': f'raw_{db_table}'}
+    ).scalar()
+    wants_partitions = db_table in partitioned_raw_tables()
+    if relkind is None:
+        conn.execute(text(create_raw_table_sql(db_table, partitioned=wants_partitions)))
+        relkind = 'p' if wants_partitions else 'r'
+    elif wants_partitions and relkind != 'p':
+        logger.warning(
+            f"raw_{db_table} already exists unpartitioned; RAW_PARTITIONED_TABLES only applies to a new table. "
+            f"Rename it, let the next run create the partitioned raw_{db_table}, then copy the rows across."
+        )
+    if relkind == 'p':
+        db.partitioned_tables.add(db_table)
+    
+    conn.execute(text(f"ALTER TABLE raw_{db_table} ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"))
+    _ensure_raw_updated_at_function(conn)
+    _ensure_try_cast_functions(conn)
+    for name in RAW_TABLE_DROPPED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS raw_{db_table}_{name}_idx"))
+    for name, expression in RAW_TABLE_INDEXES['*'] + RAW_TABLE_INDEXES.get(db_table, []):
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS raw_{db_table}_{name}_idx ON raw_{db_table} ({expression})"))
+    ensure_typed_tables(conn, db_table)
+    db.ensured_tables.add(db_table)
+
+def ensure_raw_partitions(conn, db_table: str, source_table: str):
+    """Create the monthly partitions of raw_{db_table} that the staged rows in source_table need."""
+    months = conn.execute(text(f"SELECT DISTINCT {RAW_PARTITION_MONTH[db_table]} FROM {source_table}")).scalars().all()
+    for month in months:
+        next_month = (month.replace(day=1) + timedelta(days=32)).replace(day=1)
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS raw_{db_table}_p{month:%Y_%m}
+            PARTITION OF raw_{db_table}
+            FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month:%Y-%m-%d}')
+        """))
+
+def record_content_hash(record: Dict) -> str:
+    """SHA-256 of a record's canonical JSON (sorted keys, no whitespace)."""
+    canonical = json.dumps(record, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def raw_columns(db_table: str) -> List[str]:
+    """Column order shared by every raw_* landing table."""
+    return [
+        'id', 'last_processed_at', '_airbyte_ab_id',
+        '_airbyte_emitted_at', '_airbyte_normalized_at',
+        f'_airbyte_{db_table}_hashid', 'content_hash', 'data'
+    ]
+
+def _merge_into_raw_sql(db_table: str, source_table: str, partition_month: Optional[str] = None) -> str:
+    """INSERT ... ON CONFLICT statement merging a staging table into raw_{db_table}.
+
+    Rows whose content_hash matches the stored one are left untouched, so an
+    unchanged record costs no JSONB rewrite or dead tuple. partition_month is
+    the RAW_PARTITION_MONTH expression when raw_{db_table} is partitioned.
+    """
+    partition_column = ", partition_month" if partition_month else ""
+    partition_value = f", {partition_month}" if partition_month else ""
+    return f"""
+        INSERT INTO raw_{db_table} (
+            id, last_processed_at, _airbyte_ab_id, 
+            _airbyte_emitted_at, _airbyte_normalized_at, 
+            _airbyte_{db_table}_hashid, content_hash, data{partition_column}
+        )
+        SELECT 
+            id, last_processed_at, _airbyte_ab_id,
+            _airbyte_emitted_at, _airbyte_normalized_at,
+            _airbyte_{db_table}_hashid, content_hash, data::jsonb{partition_value}
+        FROM {source_table}
+        ON CONFLICT (id{partition_column}) DO UPDATE SET
+            last_processed_at = EXCLUDED.last_processed_at,
+            _airbyte_ab_id = EXCLUDED._airbyte_ab_id,
+            _airbyte_emitted_at = EXCLUDED._airbyte_emitted_at,
+            _airbyte_normalized_at = EXCLUDED._airbyte_normalized_at,
+            _airbyte_{db_table}_hashid = EXCLUDED._airbyte_{db_table}_hashid,
+            content_hash = EXCLUDED.content_hash,
+            data = EXCLUDED.data
+        WHERE raw_{db_table}.content_hash IS NULL
+           OR raw_{db_table}.content_hash <> EXCLUDED.content_hash
+    """
+
+def lock_raw_merge(conn, db_table: str):
+    """Serialize merges into raw_{db_table} (and its typed_* tables) until the caller's transaction ends.
+
+    Cron runs and queue workers can load the same endpoint at once; two
+    concurrent typed_* child rewrites of one document would both insert.
+    """
+    conn.execute(text("SELECT pg_advisory_xact_lock(:namespace, hashtext(:db_table))"),
+                 {'namespace': ADVISORY_LOCK_RAW_MERGE, 'db_table': db_table})
+
+def _merge_into_raw(db: DatabaseContext, conn, db_table: str, source_table: str):
+    """Merge a staging table into raw_{db_table}, adding monthly partitions first if it is partitioned."""
+    partition_month = None
+    if db_table in db.partitioned_tables:
+        partition_month = RAW_PARTITION_MONTH[db_table]
+        ensure_raw_partitions(conn, db_table, source_table)
+    conn.execute(text(_merge_into_raw_sql(db_table, source_table, partition_month)))
+
+def _count_changes(conn, db_table: str, source_table: str) -> Dict[str, int]:
+    """Classify staged rows as inserted/updated/unchanged against raw_{db_table}."""
+    row = conn.execute(text(f"""
+        SELECT
+            COUNT(*) AS total,
+            SUM(CASE WHEN r.id IS NULL THEN 1 ELSE 0 END) AS inserted,
+            SUM(CASE WHEN r.id IS NOT NULL
+                      AND (r.content_hash IS NULL OR r.content_hash <> t.content_hash)
+                     THEN 1 ELSE 0 END) AS updated
+        FROM {source_table} t
+        LEFT JOIN raw_{db_table} r ON r.id = t.id
+    """)).fetchone()
+    total, inserted, updated = row[0] or 0, row[1] or 0, row[2] or 0
+    return {'inserted': inserted, 'updated': updated, 'unchanged': total - inserted - updated}
+
+# Typed landing tables: the hot fields of a raw_* document parsed once, in the
+# same transaction that merges the batch, so staging models read plain columns
+# instead of re-extracting JSONB on every build. Columns are (name, type,
+# expression) where the expression reads the staged raw row (data is JSONB).
+# The first table of an endpoint holds one row per raw id; later tables hold
+# child rows produced by their 'from' clause and are replaced whenever the
+# parent document changes. Drop a typed_* table to rebuild it from raw_* after
+# changing its columns.
+TYPED_LANDING_TABLES = {
+    'order': [
+        {
+            'table': 'typed_order',
+            'columns': [
+                ('order_id', 'UUID', try_cast("data->>'id'", 'uuid')),
+                ('order_number', 'BIGINT', try_cast("data->>'orderNumber'", 'bigint')),
+                ('submitted_at', 'TIMESTAMP WITH TIME ZONE', try_cast("data->>'orderSubmittedDate'", 'timestamptz')),
+                ('paid_at', 'TIMESTAMP WITH TIME ZONE', try_cast("data->>'orderPaidDate'", 'timestamptz')),
+                ('fulfilled_at', 'TIMESTAMP WITH TIME ZONE', try_cast("data->>'orderFulfilledDate'", 'timestamptz')),
+                ('created_at', 'TIMESTAMP WITH TIME ZONE', try_cast("data->>'createdAt'", 'timestamptz')),
+                ('updated_at', 'TIMESTAMP WITH TIME ZONE', try_cast("data->>'updatedAt'", 'timestamptz')),
+                ('channel', 'TEXT', "data->>'channel'"),
+                ('state_code', 'TEXT', "data->'shipTo'->>'stateCode'"),
+                ('delivery_method', 'TEXT', "data->>'orderDeliveryMethod'"),
+                ('external_order_vendor', 'TEXT', "data->>'externalOrderVendor'"),
+                ('refund_order_id', 'TEXT', "data->>'refundOrderId'"),
+                ('linked_order_id', 'UUID', f"""(
+                    SELECT {try_cast("linked_order->>'orderId'", 'uuid')}
+                    FROM jsonb_array_elements({json_array("data->'linkedOrders'")}) AS linked_order
+                    WHERE linked_order->>'purchaseType' = 'Refund'
+                    LIMIT 1
+                )"""),
+                ('linked_order_purchase_type', 'TEXT', f"""(
+                    SELECT linked_order->>'purchaseType'
+                    FROM jsonb_array_elements({json_array("data->'linkedOrders'")}) AS linked_order
+                    WHERE linked_order->>'purchaseType' = 'Refund'
+                    LIMIT 1
+                )"""),
+                ('payment_status', 'TEXT', "data->>'paymentStatus'"),
+                ('fulfillment_status', 'TEXT', "data->>'fulfillmentStatus'"),
+                ('fulfillment_id', 'UUID', try_cast("data->'fulfillments'->0->>'id'", 'uuid')),
+                ('shipping_status', 'TEXT', "data->>'shippingStatus'"),
+                ('sales_attribution_code', 'TEXT', "data->>'salesAttributionCode'"),
+                ('customer_id', 'UUID', try_cast("data->>'customerId'", 'uuid')),
+                ('pos_profile_id', 'UUID', try_cast("data->>'posProfileId'", 'uuid')),
+                ('tax_sale_type', 'TEXT', "data->>'taxSaleType'"),
+                ('sales_associate_id', 'UUID', try_cast("data->'salesAssociate'->>'accountId'", 'uuid')),
+                ('sales_associate', 'TEXT', "data->'salesAssociate'->>'name'"),
+                ('sub_total_cents', 'BIGINT', try_cast("data->>'subTotal'", 'bigint', default='0')),
+                ('ship_total_cents', 'BIGINT', try_cast("data->>'shipTotal'", 'bigint', default='0')),
+                ('tax_total_cents', 'BIGINT', try_cast("data->>'taxTotal'", 'bigint', default='0')),
+                ('tip_total_cents', 'BIGINT', try_cast("data->>'tipTotal'", 'bigint', default='0')),
+                ('total_cents', 'BIGINT', try_cast("data->>'total'", 'bigint', default='0')),
+                ('total_after_tip_cents', 'BIGINT', try_cast("data->>'totalAfterTip'", 'bigint', default='0')),
+                ('tasting_lounge', 'TEXT', "data->'metaData'->>'tasting-lounge'"),
+                ('event_fee_or_wine', 'TEXT', "data->'metaData'->>'event-fee-or-wine'"),
+                ('event_specific_sale', 'TEXT', "data->'metaData'->>'event-specific-sale'"),
+                ('event_revenue_realization_date', 'TEXT', "data->'metaData'->>'event-revenue-relization-date'"),
+            ],
+        },
+        {
+            'table': 'typed_order_item',
+            'from': "CROSS JOIN LATERAL jsonb_array_elements(" + json_array("data->'items'") + ") AS i",
+            'columns': [
+                ('order_id', 'UUID', try_cast("data->>'id'", 'uuid')),
+                ('order_item_id', 'UUID', try_cast("i->>'id'", 'uuid')),
+                ('purchase_type', 'TEXT', "i->>'purchaseType'"),
+                ('item_type', 'TEXT', "i->>'type'"),
+                ('product_title', 'TEXT', "i->>'productTitle'"),
+                ('product_slug', 'TEXT', "i->>'productSlug'"),
+                ('product_id', 'UUID', try_cast("i->>'productId'", 'uuid')),
+                ('variant_title', 'TEXT', "i->>'productVariantTitle'"),
+                ('variant_id', 'UUID', try_cast("i->>'productVariantId'", 'uuid')),
+                ('sku', 'TEXT', "i->>'sku'"),
+                ('price_cents', 'BIGINT', try_cast("i->>'price'", 'bigint', default='0')),
+                ('compare_price_cents', 'BIGINT', try_cast("i->>'comparePrice'", 'bigint', default='0')),
+                ('original_price_cents', 'BIGINT', try_cast("i->>'originalPrice'", 'bigint', default='0')),
+                ('cogs_cents', 'BIGINT', try_cast("i->>'costOfGood'", 'bigint', default='0')),
+                ('bottle_deposit_cents', 'BIGINT', try_cast("i->>'bottleDeposit'", 'bigint', default='0')),
+                ('qty', 'INTEGER', try_cast("i->>'quantity'", 'int', default='0')),
+                ('tax_cents', 'BIGINT', try_cast("i->>'tax'", 'bigint', default='0')),
+                ('tax_type', 'TEXT', "i->>'taxType'"),
+            ],
+        },
+    ],
+    'tock_reservation': [
+        {
+            'table': 'typed_tock_reservation',
+            'columns': [
+                ('tock_reservation_id', 'TEXT', "data->>'id'"),
+                ('business_id', 'INTEGER', try_cast("data->'business'->>'id'", 'int')),
+                ('business_name', 'TEXT', "data->'business'->>'name'"),
+                ('business_domain_name', 'TEXT', "data->'business'->>'domainName'"),
+                ('business_locale', 'TEXT', "data->'business'->>'locale'"),
+                ('business_currency_code', 'TEXT', "data->'business'->>'currencyCode'"),
+                ('business_time_zone', 'TEXT', "data->'business'->>'timeZone'"),
+                ('reservation_datetime', 'TIMESTAMP', try_cast("data->>'dateTime'", 'timestamp')),
+                ('party_size', 'INTEGER', try_cast("data->>'partySize'", 'int')),
+                ('party_state', 'TEXT', "data->>'partyState'"),
+                ('sequence_id', 'INTEGER', try_cast("data->>'sequenceId'", 'int')),
+                ('confirmation_code', 'TEXT', "data->>'confirmationCode'"),
+                ('server_name', 'TEXT', "data->>'serverName'"),
+                ('experience_id', 'INTEGER', try_cast("data->'experience'->>'id'", 'int')),
+                ('experience_name', 'TEXT', "data->'experience'->>'name'"),
+                ('experience_amount_cents', 'INTEGER', try_cast("data->'experience'->>'amountCents'", 'int')),
+                ('experience_variety', 'TEXT', "data->'experience'->>'variety'"),
+                ('subtotal_cents', 'INTEGER', try_cast("data->>'subtotalCents'", 'int')),
+                ('tax_rate', 'DOUBLE PRECISION', try_cast("data->>'taxRate'", 'float')),
+                ('tax_cents', 'INTEGER', try_cast("data->>'taxCents'", 'int')),
+                ('service_charge_rate', 'DOUBLE PRECISION', try_cast("data->>'serviceChargeRate'", 'float')),
+                ('service_charge_cents', 'INTEGER', try_cast("data->>'serviceChargeCents'", 'int')),
+                ('selected_gratuity_rate', 'DOUBLE PRECISION', try_cast("data->>'selectedGratuityRate'", 'float')),
+                ('gratuity_cents', 'INTEGER', try_cast("data->>'gratuityCents'", 'int')),
+                ('event_fee_rate', 'DOUBLE PRECISION', try_cast("data->>'eventFeeRate'", 'float')),
+                ('event_fee_cents', 'INTEGER', try_cast("data->>'eventFeeCents'", 'int')),
+                ('custom_fee_rate', 'DOUBLE PRECISION', try_cast("data->>'customFeeRate'", 'float')),
+                ('custom_fee_cents', 'INTEGER', try_cast("data->>'customFeeCents'", 'int')),
+                ('custom_fee_name', 'TEXT', "data->>'customFeeName'"),
+                ('total_price_cents', 'INTEGER', try_cast("data->>'totalPriceCents'", 'int')),
+                ('net_amount_paid_cents', 'INTEGER', try_cast("data->>'netAmountPaidCents'", 'int')),
+                ('amount_due_cents', 'INTEGER', try_cast("data->>'amountDueCents'", 'int')),
+                ('owner_patron_id', 'INTEGER', try_cast("data->'ownerPatron'->>'id'", 'int')),
+                ('owner_patron_email', 'TEXT', "data->'ownerPatron'->>'email'"),
+                ('owner_patron_first_name', 'TEXT', "data->'ownerPatron'->>'firstName'"),
+                ('owner_patron_last_name', 'TEXT', "data->'ownerPatron'->>'lastName'"),
+                ('owner_patron_phone', 'TEXT', "data->'ownerPatron'->>'phone'"),
+                ('owner_patron_phone_country_code', 'TEXT', "data->'ownerPatron'->>'phoneCountryCode'"),
+                ('owner_patron_zip_code', 'TEXT', "data->'ownerPatron'->>'zipCode'"),
+                ('owner_patron_image_url', 'TEXT', "data->'ownerPatron'->>'imageUrl'"),
+                ('owner_patron_iso_country_code', 'TEXT', "data->'ownerPatron'->>'isoCountryCode'"),
+                ('diner_patron_id', 'INTEGER', try_cast("data->'dinerPatron'->>'id'", 'int')),
+                ('diner_patron_email', 'TEXT', "data->'dinerPatron'->>'email'"),
+                ('diner_patron_first_name', 'TEXT', "data->'dinerPatron'->>'firstName'"),
+                ('diner_patron_last_name', 'TEXT', "data->'dinerPatron'->>'lastName'"),
+                ('diner_patron_phone', 'TEXT', "data->'dinerPatron'->>'phone'"),
+                ('diner_patron_phone_country_code', 'TEXT', "data->'dinerPatron'->>'phoneCountryCode'"),
+                ('diner_patron_zip_code', 'TEXT', "data->'dinerPatron'->>'zipCode'"),
+                ('diner_patron_image_url', 'TEXT', "data->'dinerPatron'->>'imageUrl'"),
+                ('diner_patron_iso_country_code', 'TEXT', "data->'dinerPatron'->>'isoCountryCode'"),
+                ('transferred_out', 'BOOLEAN', try_cast("data->>'transferredOut'", 'boolean')),
+                ('is_cancelled', 'BOOLEAN', try_cast("data->>'isCancelled'", 'boolean')),
+                ('created_at', 'TIMESTAMP WITH TIME ZONE', epoch_millis_to_timestamptz("data->>'createdTimestamp'")),
+                ('last_updated_at', 'TIMESTAMP WITH TIME ZONE', epoch_millis_to_timestamptz("data->>'lastUpdatedTimestamp'")),
+                ('service_date', 'TIMESTAMP WITH TIME ZONE', epoch_millis_to_timestamptz("data->>'serviceDateTimestamp'")),
+                ('version_id', 'BIGINT', try_cast("data->>'versionId'", 'bigint')),
+                ('option_count', 'INTEGER', json_array_length("data->'option'")),
+                ('fee_count', 'INTEGER', json_array_length("data->'fee'")),
+                ('custom_charge_count', 'INTEGER', json_array_length("data->'customCharge'")),
+                ('key_value_count', 'INTEGER', json_array_length("data->'keyValue'")),
+                ('discount_count', 'INTEGER', json_array_length("data->'discount'")),
+                ('visit_feedback_count', 'INTEGER', json_array_length("data->'visitFeedback'")),
+                ('visit_tag_count', 'INTEGER', json_array_length("data->'visitTag'")),
+                ('payment_count', 'INTEGER', json_array_length("data->'payment'")),
+                ('refund_count', 'INTEGER', json_array_length("data->'refund'")),
+                ('note_count', 'INTEGER', json_array_length("data->'note'")),
+                ('question_count', 'INTEGER', json_array_length("data->'question'")),
+                ('table_count', 'INTEGER', json_array_length("data->'table'")),
+                ('primary_key_attribute', 'TEXT', "data->'keyValue'->0->>'attribute'"),
+                ('primary_key_value', 'TEXT', "data->'keyValue'->0->>'attributeValue'"),
+                ('_airbyte_ab_id', 'VARCHAR(255)', "_airbyte_ab_id"),
+                ('_airbyte_emitted_at', 'TIMESTAMP WITH TIME ZONE', "_airbyte_emitted_at"),
+                ('_airbyte_normalized_at', 'TIMESTAMP WITH TIME ZONE', "_airbyte_normalized_at"),
+                ('_airbyte_tock_reservation_hashid', 'VARCHAR(255)', "_airbyte_tock_reservation_hashid"),
+            ],
+        },
+    ],
+}
+
+def typed_landing_tables(db_table: str) -> List[str]:
+    """Names of the typed_* tables maintained alongside raw_{db_table}."""
+    return [spec['table'] for spec in TYPED_LANDING_TABLES.get(db_table, [])]
+
+def _create_typed_table_sql(spec: Dict, child: bool) -> str:
+    columns = ',\n            '.join(f"{name} {sql_type}" for name, sql_type, _ in spec['columns'])
+    key = 'VARCHAR(255) NOT NULL' if child else 'VARCHAR(255) PRIMARY KEY'
+    return f"""
+        CREATE TABLE IF NOT EXISTS {spec['table']} (
+            id {key},
+            last_processed_at TIMESTAMP WITH TIME ZONE,
+            content_hash VARCHAR(64),
+            {columns}
+        )
+    """
+
+def sync_typed_landing(conn, db_table: str, source_table: str):
+    """Parse the staged rows of source_table whose content changed into the typed_* tables.
+
+    A row counts as changed when the parent typed table has no row for its id
+    or holds a different content_hash, so unchanged documents are not parsed.
+    Child tables are rewritten first, while the parent still holds the old hash.
+    """
+    specs = TYPED_LANDING_TABLES[db_table]
+    parent = specs[0]['table']
+    changed = f"""
+        WITH changed AS (
+            SELECT
+                t.id, t.last_processed_at, t._airbyte_ab_id,
+                t._airbyte_emitted_at, t._airbyte_normalized_at,
+                t._airbyte_{db_table}_hashid, t.content_hash, t.data::jsonb AS data
+            FROM {source_table} t
+            LEFT JOIN {parent} p ON p.id = t.id
+            WHERE p.id IS NULL OR p.content_hash IS DISTINCT FROM t.content_hash
+        )
+    """
+    for spec in reversed(specs):
+        names = ', '.join(name for name, _, _ in spec['columns'])
+        expressions = ',\n                '.join(f"{expr} AS {name}" for name, _, expr in spec['columns'])
+        insert = f"""
+            {changed}
+            INSERT INTO {spec['table']} (id, last_processed_at, content_hash, {names})
+            SELECT
+                id, last_processed_at, content_hash,
+                {expressions}
+            FROM changed {spec.get('from', '')}
+        """
+        if spec['table'] != parent:
+            conn.execute(text(f"""
+                {changed}
+                DELETE FROM {spec['table']} c USING changed WHERE c.id = changed.id
+            """))
+            conn.execute(text(insert))
+        else:
+            updates = ',\n                '.join(
+                f"{name} = EXCLUDED.{name}"
+                for name in ['last_processed_at', 'content_hash'] + [name for name, _, _ in spec['columns']]
+            )
+            conn.execute(text(f"""
+                {insert}
+                ON CONFLICT (id) DO UPDATE SET
+                {updates}
+            """))
+
+def ensure_typed_tables(conn, db_table: str):
+    """Create the typed_* tables for db_table, backfilling them from raw_{db_table} when new."""
+    specs = TYPED_LANDING_TABLES.get(db_table)
+    if not specs:
+        return
+    missing = [
+        spec['table'] for spec in specs
+        if conn.execute(text("SELECT to_regclass(:name)"), {'name': spec['table']}).scalar() is None
+    ]
+    if missing:
+        for index, spec in enumerate(specs):
+            conn.execute(text(_create_typed_table_sql(spec, child=index > 0)))
+            if index > 0:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {spec['table']}_id_idx ON {spec['table']} (id)"))
+        # A partially created set would leave children out of step with the parent
+        for spec in reversed(specs):
+            conn.execute(text(f"DELETE FROM {spec['table']}"))
+        started = time.perf_counter()
+        sync_typed_landing(conn, db_table, f"raw_{db_table}")
+        logger.info(
+            f"Backfilled {', '.join(typed_landing_tables(db_table))} from raw_{db_table} "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+    # Staging models read the parent incrementally on last_processed_at
+    parent = specs[0]['table']
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {parent}_last_processed_at_idx ON {parent} (last_processed_at)"))
+
+def _load_raw_via_copy(db: DatabaseContext, db_table: str, df: pd.DataFrame,
+                       in_transaction: Optional[Callable] = None) -> Dict[str, int]:
+    """Stream rows with COPY into an ON COMMIT DROP temp table and merge in one transaction."""
+    columns = raw_columns(db_table)
+    temp_table = f'temp_{db_table}'
+    
+    buffer = io.StringIO()
+    df[columns].to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    
+    with db.begin() as conn:
+        # Session-scoped temp table: invisible to overlapping runs, dropped at commit
+        if db_table in db.partitioned_tables:
+            # LIKE would copy partition_month NOT NULL, which the COPY doesn't fill
+            conn.execute(text(
+                f"CREATE TEMP TABLE {temp_table} ON COMMIT DROP AS "
+                f"SELECT {', '.join(columns)} FROM raw_{db_table} WITH NO DATA"
+            ))
+        else:
+            conn.execute(text(
+                f"CREATE TEMP TABLE {temp_table} (LIKE raw_{db_table} INCLUDING DEFAULTS) ON COMMIT DROP"
+            ))
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {temp_table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+        lock_raw_merge(conn, db_table)
+        counts = _count_changes(conn, db_table, temp_table)
+        if db_table in TYPED_LANDING_TABLES:
+            sync_typed_landing(conn, db_table, temp_table)
+        _merge_into_raw(db, conn, db_table, temp_table)
+        if in_transaction:
+            in_transaction(conn)
+    return counts
+
+def _load_raw_via_to_sql(db: DatabaseContext, db_table: str, df: pd.DataFrame,
+                         in_transaction: Optional[Callable] = None) -> Dict[str, int]:
+    """Fallback for non-Postgres backends: pandas to_sql staging table, then merge."""
+    # A real table: suffix it so overlapping runs and queue workers don't share it
+    temp_table = f'temp_{db_table}_{uuid.uuid4().hex[:8]}'
+    df[raw_columns(db_table)].to_sql(
+        temp_table,
+        db.engine,
+        if_exists='replace',
+        index=False
+    )
+    
+    with db.connect() as conn:
+        try:
+            if db.is_postgres:
+                lock_raw_merge(conn, db_table)
+            counts = _count_changes(conn, db_table, temp_table)
+            if db.is_postgres and db_table in TYPED_LANDING_TABLES:
+                sync_typed_landing(conn, db_table, temp_table)
+            _merge_into_raw(db, conn, db_table, temp_table)
+            if in_transaction:
+                in_transaction(conn)
+            conn.commit()
+        finally:
+            # Drop the staging table even when the merge failed
+            conn.rollback()
+            conn.execute(text(f"DROP TABLE IF EXISTS {temp_table}"))
+            conn.commit()
+    return counts
+
+def load_raw_batch(db: DatabaseContext, db_table: str, df: pd.DataFrame, method: Optional[str] = None,
+                   in_transaction: Optional[Callable] = None) -> Dict:
+    """Merge a prepared raw_* DataFrame into raw_{db_table}.
+
+    Postgres uses COPY FROM STDIN (method='copy'); anything else falls back to
+    the pandas to_sql path (method='to_sql'). in_transaction(conn), if given,
+    runs after the merge and commits atomically with it. Returns the inserted/
+    updated/unchanged counts plus elapsed seconds.
+    """
+    method = method or ('copy' if db.is_postgres else 'to_sql')
+    if db_table not in db.ensured_tables:
+        with db.connect() as conn:
+            ensure_raw_table(db, conn, db_table)
+            conn.commit()
+    
+    started = time.perf_counter()
+    if method == 'copy':
+        counts = _load_raw_via_copy(db, db_table, df, in_transaction)
+    elif method == 'to_sql':
+        counts = _load_raw_via_to_sql(db, db_table, df, in_transaction)
+    else:
+        raise ValueError(f"Unknown load method: {method}")
+    elapsed = time.perf_counter() - started
+    rate = len(df) / elapsed if elapsed > 0 else float('inf')
+    logger.debug(f"Loaded {len(df)} rows into raw_{db_table} via {method} in {elapsed:.2f}s ({rate:.0f} rows/sec)")
+    return {**counts, 'seconds': elapsed}
+
+def record_load_counts(stats: Dict[str, Dict[str, int]], table: str, result: Dict):
+    """Accumulate per-table inserted/updated/unchanged counts for the run summary."""
+    totals = stats.setdefault(table, {'inserted': 0, 'updated': 0, 'unchanged': 0})
+    for key in totals:
+        totals[key] += result.get(key, 0)
+
+def log_load_counts(stats: Dict[str, Dict[str, int]]):
+    """Log the per-table change-detection summary."""
+    for table, totals in stats.items():
+        logger.info(
+            f"📊 raw_{table}: {totals['inserted']} inserted, {totals['updated']} updated, "
+            f"{totals['unchanged']} unchanged (skipped)"
+        )
+
+def parse_source_timestamp(value) -> Optional[datetime]:
+    """Parse an ISO-8601 source timestamp (e.g. 2025-06-30T21:44:04.349Z)."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def max_source_updated_at(records: List[Dict]) -> Optional[datetime]:
+    """Latest updatedAt across a batch of source records."""
+    stamps = [stamp for stamp in (parse_source_timestamp(r.get('updatedAt')) for r in records) if stamp]
+    return max(stamps) if stamps else None
+
+# Identifies this process in the ingest ledger
+RUN_ID = uuid.uuid4().hex
+
+class BatchLedger:
+    """Run/batch ledger for Commerce7 endpoint loads.
+
+    ingest_runs has one row per (run, endpoint) with the watermark the run
+    used and its status. ingest_batch_ledger has one row per committed batch
+    with the cursor that fetches the next page. Each batch row commits in the
+    same transaction as the batch's records, so every batch is written exactly
+    once, and a crashed or failed run can resume from its last committed cursor.
+
+    ingest_watermarks holds, per raw table, the maximum source updatedAt seen
+    by a completed run; it only advances once every batch of a run committed.
+    """
+    
+    def __init__(self, db: DatabaseContext):
+        self.db = db
+        self._ensured = False
+    
+    def _ensure_tables(self, conn):
+        if self._ensured:
+            return
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS ingest_runs (
+                run_id VARCHAR(32) NOT NULL,
+                endpoint VARCHAR(50) NOT NULL,
+                watermark TIMESTAMP WITH TIME ZONE,
+                status VARCHAR(20) NOT NULL,
+                row_count INTEGER NOT NULL DEFAULT 0,
+                started_at TIMESTAMP WITH TIME ZONE,
+                finished_at TIMESTAMP WITH TIME ZONE,
+                PRIMARY KEY (run_id, endpoint)
+            )
+        """))
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS ingest_batch_ledger (
+                run_id VARCHAR(32) NOT NULL,
+                endpoint VARCHAR(50) NOT NULL,
+                batch_number INTEGER NOT NULL,
+                resume_cursor TEXT,
+                row_count INTEGER NOT NULL,
+                duration_seconds DOUBLE PRECISION,
+                max_source_updated_at TIMESTAMP WITH TIME ZONE,
+                committed_at TIMESTAMP WITH TIME ZONE,
+                PRIMARY KEY (run_id, endpoint, batch_number)
+            )
+        """))
+        if self.db.is_postgres:
+            conn.execute(text(
+                "ALTER TABLE ingest_batch_ledger ADD COLUMN IF NOT EXISTS max_source_updated_at TIMESTAMP WITH TIME ZONE"
+            ))
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS ingest_watermarks (
+                db_table VARCHAR(50) PRIMARY KEY,
+                source_updated_at TIMESTAMP WITH TIME ZONE NOT NULL,
+                updated_at TIMESTAMP WITH TIME ZONE
+            )
+        """))
+        self._ensured = True
+    
+    def get_source_watermark(self, conn, db_table: str) -> Optional[datetime]:
+        """Stored max source updatedAt for a raw table, or None before the first completed run."""
+        self._ensure_tables(conn)
+        conn.commit()
+        return conn.execute(text(
+            "SELECT source_updated_at FROM ingest_watermarks WHERE db_table = :db_table"
+        ), {'db_table': db_table}).scalar()
+    
+    @retry_on_db_error(max_retries=3, base_delay=2.0)
+    def get_resumable_run(self, endpoint: str) -> Optional[Dict]:
+        """Last unfinished run for an endpoint that committed at least one batch."""
+        with self.db.connect() as conn:
+            self._ensure_tables(conn)
+            conn.commit()
+            row = conn.execute(text("""
+                SELECT r.run_id, r.watermark, r.status, l.batch_number, l.resume_cursor
+                FROM ingest_runs r
+                JOIN ingest_batch_ledger l ON l.run_id = r.run_id AND l.endpoint = r.endpoint
+                WHERE r.endpoint = :endpoint
+                  AND r.started_at = (SELECT MAX(started_at) FROM ingest_runs WHERE endpoint = :endpoint)
+                ORDER BY l.batch_number DESC
+                LIMIT 1
+            """), {'endpoint': endpoint}).fetchone()
+        if not row or row[2] == 'completed':
+            return None
+        if row[4] is None:
+            # The final batch committed but the run never recorded completion
+            self.finish_run(row[0], endpoint, 'completed')
+            return None
+        return {'run_id': row[0], 'watermark': row[1], 'last_batch': row[3], 'cursor': row[4]}
+    
+    @retry_on_db_error(max_retries=3, base_delay=2.0)
+    def start_run(self, run_id: str, endpoint: str, watermark: Optional[datetime]):
+        with self.db.begin() as conn:
+            self._ensure_tables(conn)
+            conn.execute(text("""
+                INSERT INTO ingest_runs (run_id, endpoint, watermark, status, started_at)
+                VALUES (:run_id, :endpoint, :watermark, 'running', :now)
+                ON CONFLICT (run_id, endpoint) DO UPDATE SET status = 'running', finished_at = NULL
+            """), {'run_id': run_id, 'endpoint': endpoint, 'watermark': watermark, 'now': datetime.now(timezone.utc)})
+    
+    def record_batch(self, conn, run_id: str, endpoint: str, batch_number: int,
+                     resume_cursor: Optional[str], row_count: int, duration_seconds: float,
+                     max_updated_at: Optional[datetime] = None):
+        """Insert a ledger row on the caller's (merge) transaction."""
+        conn.execute(text("""
+            INSERT INTO ingest_batch_ledger
+                (run_id, endpoint, batch_number, resume_cursor, row_count, duration_seconds,
+                 max_source_updated_at, committed_at)
+            VALUES (:run_id, :endpoint, :batch_number, :resume_cursor, :row_count, :duration_seconds,
+                    :max_updated_at, :now)
+        """), {
+            'run_id': run_id,
+            'endpoint': endpoint,
+            'batch_number': batch_number,
+            'resume_cursor': resume_cursor,
+            'row_count': row_count,
+            'duration_seconds': duration_seconds,
+            'max_updated_at': max_updated_at,
+            'now': datetime.now(timezone.utc)
+        })
+    
+    @retry_on_db_error(max_retries=3, base_delay=2.0)
+    def finish_run(self, run_id: str, endpoint: str, status: str):
+        with self.db.begin() as conn:
+            self._ensure_tables(conn)
+            conn.execute(text("""
+                UPDATE ingest_runs SET
+                    status = :status,
+                    finished_at = :now,
+                    row_count = (
+                        SELECT COALESCE(SUM(row_count), 0) FROM ingest_batch_ledger
+                        WHERE run_id = :run_id AND endpoint = :endpoint
+                    )
+                WHERE run_id = :run_id AND endpoint = :endpoint
+            """), {'run_id': run_id, 'endpoint': endpoint, 'status': status, 'now': datetime.now(timezone.utc)})
+            if status != 'completed':
+                return
+            # Advance the source watermark only once the whole run has committed
+            conn.execute(text("""
+                INSERT INTO ingest_watermarks (db_table, source_updated_at, updated_at)
+                SELECT :db_table, MAX(max_source_updated_at), :now
+                FROM ingest_batch_ledger
+                WHERE run_id = :run_id AND endpoint = :endpoint
+                HAVING MAX(max_source_updated_at) IS NOT NULL
+                ON CONFLICT (db_table) DO UPDATE SET
+                    source_updated_at = CASE
+                        WHEN EXCLUDED.source_updated_at > ingest_watermarks.source_updated_at
+                        THEN EXCLUDED.source_updated_at
+                        ELSE ingest_watermarks.source_updated_at
+                    END,
+                    updated_at = EXCLUDED.updated_at
+            """), {
+                'db_table': endpoint.replace('-', '_'),
+                'run_id': run_id,
+                'endpoint': endpoint,
+                'now': datetime.now(timezone.utc)
+            })
+
 def load_environment():
     # Log all relevant environment variables (masking sensitive data)
     env_vars = {
@@ -166,10 +1067,106 @@ def load_environment():
     if not has_postgres_config:
         logger.warning("No PostgreSQL configuration found - will use SQLite fallback")
 
+# get_data_urls() key holding each Tock export's file URLs
+TOCK_EXPORT_URL_KEYS = {'tock_guest': 'guest_urls', 'tock_reservation': 'reservation_urls'}
+
+def export_file_name(url: str) -> str:
+    """Stable file name of a pre-signed Tock export URL (e.g. guest-profile-3.json)."""
+    return Path(urlparse(url).path).name
+
+def export_file_number(file_name: str) -> Optional[int]:
+    """Sequence number of an export file (guest-profile-3.json -> 3)."""
+    match = re.search(r'-(\d+)\.json$', file_name)
+    return int(match.group(1)) if match else None
+
+def iter_json_records(byte_chunks: Iterator[bytes]) -> Iterator[Dict]:
+    """Incrementally parse a JSON array (or a single object) from a byte stream.
+
+    Array elements are decoded one at a time with JSONDecoder.raw_decode, so only
+    the unconsumed tail of the body is held in memory rather than the whole file.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(byte_chunks)
+    buffer = ''
+    exhausted = False
+    
+    def fill() -> bool:
+        nonlocal buffer, exhausted
+        if exhausted:
+            return False
+        for chunk in chunks:
+            decoded = utf8.decode(chunk)
+            if decoded:
+                buffer += decoded
+                return True
+        buffer += utf8.decode(b'', final=True)
+        exhausted = True
+        return False
+    
+    def skip(pos: int, chars: str) -> int:
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return pos
+    
+    pos = skip(0, ' \t\r\n\ufeff')
+    if pos >= len(buffer):
+        return
+    if buffer[pos] != '[':
+        # A single top-level object has nothing to stream; parse it whole
+        while fill():
+            pass
+        yield decoder.decode(buffer[pos:].strip())
+        return
+    
+    pos += 1
+    while True:
+        pos = skip(pos, ' \t\r\n,')
+        if pos >= len(buffer):
+            raise ValueError("Unexpected end of JSON array")
+        if buffer[pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Element is split across network chunks; read more and retry
+            if fill():
+                continue
+            raise
+        if end == len(buffer) and fill():
+            # A bare number could continue in the next chunk; re-decode with more data
+            continue
+        yield item
+        buffer = buffer[end:]
+        pos = 0
+
+class RateLimiter:
+    """Thread-safe request spacing shared by every thread calling one API."""
+    
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+    
+    def wait(self):
+        """Block until the next request slot is available (no-op when unlimited)."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
 class TockAPIClient:
     """Tock API client for data ingestion."""
     
-    def __init__(self):
+    def __init__(self, db: Optional[DatabaseContext] = None):
+        self.db = db or get_db_context()
+        self.load_stats: Dict[str, Dict[str, int]] = {}
         self.auth_header = os.getenv('X_TOCK_AUTH')
         self.scope_header = os.getenv('X_TOCK_SCOPE')
         self.base_url = 'https://dashboard.exploretock.com/api/data/export/urls'
@@ -182,12 +1179,31 @@ class TockAPIClient:
             'X-Tock-Authorization': self.auth_header,
             'X-Tock-Scope': self.scope_header
         })
+        # Requests/sec across all threads (TOCK_RATE_LIMIT=0 disables)
+        self.rate_limiter = RateLimiter(float(os.getenv('TOCK_RATE_LIMIT', '5')))
+        
+        # Export files are pre-signed URLs: download them on a separate keep-alive
+        # session without the Tock auth headers, retrying transient failures.
+        self.download_workers = max(1, int(os.getenv('TOCK_DOWNLOAD_WORKERS', '4')))
+        retry = Retry(
+            total=5,
+            backoff_factor=1.0,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['GET']
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.download_workers, max_retries=retry)
+        self.download_session = requests.Session()
+        self.download_session.mount('https://', adapter)
+        self.download_session.mount('http://', adapter)
+        # Records per upsert when streaming export files; bounds peak memory
+        self.chunk_size = max(1, int(os.getenv('TOCK_CHUNK_SIZE', '1000')))
         logger.debug("TockAPIClient initialized successfully")
     
     def get_data_urls(self) -> Dict[str, List[str]]:
         """Get the data export URLs from Tock API."""
         try:
             logger.debug("Fetching Tock data export URLs...")
+            self.rate_limiter.wait()
             response = self.session.get(self.base_url)
             response.raise_for_status()
             data = response.json()
@@ -205,32 +1221,200 @@ class TockAPIClient:
             logger.error(f"Failed to fetch Tock data URLs: {str(e)}")
             raise
     
-    def fetch_json_data(self, url: str) -> List[Dict]:
-        """Fetch and parse JSON data from a single URL."""
-        try:
-            logger.debug(f"Fetching data from: {url[:100]}...")
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            # Parse the JSON data
-            data = response.json()
+    @contextmanager
+    def download_export_file(self, url: str):
+        """Download one export file to a spooled temp file.
+
+        Yields (file, sha256 checksum, size in bytes). The body never has to fit
+        in memory: it spills to disk past 16MB and is parsed from there.
+        """
+        logger.debug(f"Downloading data from: {url[:100]}...")
+        self.rate_limiter.wait()
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as body:
+            with self.download_session.get(url, stream=True, timeout=(30, 300)) as response:
+                response.raise_for_status()
+                for block in response.iter_content(chunk_size=64 * 1024):
+                    digest.update(block)
+                    body.write(block)
+                    size += len(block)
+            body.seek(0)
+            yield body, digest.hexdigest(), size
+    
+    def iter_record_chunks(self, body) -> Iterator[List[Dict]]:
+        """Parse a downloaded export incrementally into lists of at most chunk_size records."""
+        chunk = []
+        for record in iter_json_records(iter(lambda: body.read(64 * 1024), b'')):
+            chunk.append(record)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    
+    def _ensure_manifest_table(self, conn):
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS tock_export_progress (
+                export VARCHAR(50) NOT NULL,
+                file_name VARCHAR(255) NOT NULL,
+                file_number INTEGER,
+                status VARCHAR(20) NOT NULL,
+                row_count INTEGER,
+                checksum VARCHAR(64),
+                updated_at TIMESTAMP WITH TIME ZONE,
+                PRIMARY KEY (export, file_name)
+            )
+        """))
+        if self.db.is_postgres:
+            conn.execute(text("ALTER TABLE tock_export_progress ADD COLUMN IF NOT EXISTS file_number INTEGER"))
+            conn.execute(text("ALTER TABLE tock_export_progress ADD COLUMN IF NOT EXISTS checksum VARCHAR(64)"))
+    
+    @retry_on_db_error(max_retries=3, base_delay=2.0)
+    def get_export_manifest(self, table: str) -> Dict[str, Dict]:
+        """Per-file manifest for an export: {file_name: {status, row_count, checksum}}."""
+        with self.db.connect() as conn:
+            self._ensure_manifest_table(conn)
+            conn.commit()
+            rows = conn.execute(text("""
+                SELECT file_name, status, row_count, checksum
+                FROM tock_export_progress
+                WHERE export = :export
+            """), {'export': table}).fetchall()
+        return {row[0]: {'status': row[1], 'row_count': row[2], 'checksum': row[3]} for row in rows}
+    
+    def _set_export_file_status(self, table: str, file_names: List[str], status: str,
+                                row_count: Optional[int] = None, checksum: Optional[str] = None):
+        with self.db.begin() as conn:
+            self._ensure_manifest_table(conn)
+            for file_name in file_names:
+                conn.execute(text("""
+                    INSERT INTO tock_export_progress (export, file_name, file_number, status, row_count, checksum, updated_at)
+                    VALUES (:export, :file_name, :file_number, :status, :row_count, :checksum, :updated_at)
+                    ON CONFLICT (export, file_name) DO UPDATE SET
+                        file_number = EXCLUDED.file_number,
+                        status = EXCLUDED.status,
+                        row_count = EXCLUDED.row_count,
+                        checksum = EXCLUDED.checksum,
+                        updated_at = EXCLUDED.updated_at
+                """), {
+                    'export': table,
+                    'file_name': file_name,
+                    'file_number': export_file_number(file_name),
+                    'status': status,
+                    'row_count': row_count,
+                    'checksum': checksum,
+                    'updated_at': datetime.now(timezone.utc)
+                })
+    
+    def sync_export_files(self, table: str, reset: bool = False, files: Optional[List[str]] = None) -> Dict[str, int]:
+        """Load every tock_guest/tock_reservation export file not yet in the manifest.
+
+        tock_export_progress records each ingested file with its row count and
+        SHA-256 checksum. A run fetches exactly the files that are unseen (or
+        still pending from an interrupted run) plus the newest file, which Tock
+        may still be appending to; a newest file whose checksum is unchanged is
+        skipped. reset=True (empty raw table) forgets the manifest and reloads
+        everything. files restricts the run to those export files (one work
+        queue job each), still skipping a loaded file whose checksum is unchanged.
+
+        Downloads run in parallel and are parsed into chunks by the download
+        threads; this thread upserts them, so database writes stay serial. A
+        file is marked loaded only once all of its chunks are written.
+        """
+        urls_by_name = {export_file_name(url): url for url in self.get_data_urls()[TOCK_EXPORT_URL_KEYS[table]]}
+        manifest = {} if reset else self.get_export_manifest(table)
+        
+        if files is not None:
+            unpublished = sorted(set(files) - set(urls_by_name))
+            if unpublished:
+                raise ValueError(f"{table} export file(s) no longer published: {unpublished}")
+            to_load = list(files)
+        else:
+            to_load = [name for name in urls_by_name if manifest.get(name, {}).get('status') != 'loaded']
+            numbered = [name for name in urls_by_name if export_file_number(name) is not None]
+            newest = max(numbered, key=export_file_number) if numbered else None
+            if newest and newest not in to_load:
+                to_load.append(newest)
+        
+        unseen = [name for name in to_load if name not in manifest]
+        if unseen:
+            self._set_export_file_status(table, sorted(unseen), 'pending')
+        logger.info(
+            f"{table} manifest: {len(urls_by_name)} published, "
+            f"{len(urls_by_name) - len(to_load)} already loaded, {len(to_load)} to fetch"
+        )
+        
+        summary = {'loaded': 0, 'unchanged': 0, 'failed': 0, 'rows': 0}
+        failed = []
+        
+        # Bounded hand-off between download threads and this loading thread;
+        # peak memory is about (queue depth + workers) x chunk_size records.
+        chunks = queue.Queue(maxsize=self.download_workers * 2)
+        stop = threading.Event()
+        
+        def put(item):
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+            raise RuntimeError("Export load aborted")
+        
+        def fetch_file(file_name: str):
+            if stop.is_set():
+                return
+            try:
+                with self.download_export_file(urls_by_name[file_name]) as (body, checksum, size):
+                    known = manifest.get(file_name, {})
+                    if known.get('status') == 'loaded' and known.get('checksum') == checksum:
+                        put(('unchanged', file_name, None))
+                        return
+                    rows = 0
+                    for chunk in self.iter_record_chunks(body):
+                        rows += len(chunk)
+                        put(('chunk', file_name, chunk))
+                    put(('done', file_name, (rows, checksum)))
+            except Exception as e:
+                if not stop.is_set():
+                    put(('error', file_name, e))
+        
+        with ThreadPoolExecutor(max_workers=self.download_workers, thread_name_prefix='tock-download') as executor:
+            for file_name in to_load:
+                executor.submit(fetch_file, file_name)
             
-            # Handle both single objects and arrays
-            if isinstance(data, dict):
-                # If it's a single object, wrap it in a list
-                return [data]
-            elif isinstance(data, list):
-                return data
-            else:
-                logger.warning(f"Unexpected data format from URL: {type(data)}")
-                return []
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to fetch data from URL: {str(e)}")
-            return []
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON from URL: {str(e)}")
-            return []
+            finished = 0
+            try:
+                while finished < len(to_load):
+                    kind, file_name, payload = chunks.get()
+                    if kind == 'chunk':
+                        self.upsert_data(table, payload)
+                        continue
+                    finished += 1
+                    if kind == 'done':
+                        rows, checksum = payload
+                        self._set_export_file_status(table, [file_name], 'loaded', rows, checksum)
+                        summary['loaded'] += 1
+                        summary['rows'] += rows
+                        logger.info(f"Loaded {file_name} ({rows} records, file {finished}/{len(to_load)})")
+                    elif kind == 'unchanged':
+                        summary['unchanged'] += 1
+                        logger.info(f"Skipped {file_name} (checksum unchanged since last load)")
+                    else:
+                        failed.append(file_name)
+                        summary['failed'] += 1
+                        logger.error(f"Failed to load {file_name}: {str(payload)}")
+            except BaseException:
+                # Drop downloads that have not started yet; running ones see
+                # stop and bail out at their next chunk hand-off.
+                stop.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        
+        if failed:
+            raise RuntimeError(f"{len(failed)} {table} export file(s) failed and remain pending: {sorted(failed)}")
+        return summary
     
     def get_latest_guest_url(self, urls: List[str]) -> str:
         """Get the URL with the highest guest-profile number."""
@@ -278,72 +1462,12 @@ class TockAPIClient:
         logger.info(f"Latest reservation data file: reservation-{latest_number}.json")
         return latest_url
     
-    def fetch_all_guest_data(self, incremental: bool = False) -> List[Dict]:
-        """Fetch guest data from URLs. If incremental=True, only fetch the latest file."""
-        urls_data = self.get_data_urls()
-        all_guest_data = []
-        
-        if incremental:
-            # Only fetch the latest guest data file
-            latest_url = self.get_latest_guest_url(urls_data['guest_urls'])
-            if latest_url:
-                logger.info("Fetching latest guest data file only (incremental mode)")
-                guest_data = self.fetch_json_data(latest_url)
-                all_guest_data.extend(guest_data)
-                logger.debug(f"Added {len(guest_data)} guest records from latest file")
-            else:
-                logger.error("Could not determine latest guest data URL")
-                return []
-        else:
-            # Fetch all guest data files (initial load)
-            logger.info("Fetching all guest data files (initial load mode)")
-            for i, url in enumerate(urls_data['guest_urls']):
-                logger.info(f"Processing guest data file {i+1}/{len(urls_data['guest_urls'])}")
-                guest_data = self.fetch_json_data(url)
-                all_guest_data.extend(guest_data)
-                logger.debug(f"Added {len(guest_data)} guest records from file {i+1}")
-        
-        logger.info(f"Total guest records fetched: {len(all_guest_data)}")
-        return all_guest_data
-    
-    def fetch_all_reservation_data(self, incremental: bool = False) -> List[Dict]:
-        """Fetch reservation data from URLs. If incremental=True, only fetch the latest file."""
-        urls_data = self.get_data_urls()
-        all_reservation_data = []
-        
-        if incremental:
-            # Only fetch the latest reservation data file
-            latest_url = self.get_latest_reservation_url(urls_data['reservation_urls'])
-            if latest_url:
-                logger.info("Fetching latest reservation data file only (incremental mode)")
-                reservation_data = self.fetch_json_data(latest_url)
-                all_reservation_data.extend(reservation_data)
-                logger.debug(f"Added {len(reservation_data)} reservation records from latest file")
-            else:
-                logger.error("Could not determine latest reservation data URL")
-                return []
-        else:
-            # Fetch all reservation data files (initial load)
-            logger.info("Fetching all reservation data files (initial load mode)")
-            for i, url in enumerate(urls_data['reservation_urls']):
-                logger.info(f"Processing reservation data file {i+1}/{len(urls_data['reservation_urls'])}")
-                reservation_data = self.fetch_json_data(url)
-                all_reservation_data.extend(reservation_data)
-                logger.debug(f"Added {len(reservation_data)} reservation records from file {i+1}")
-        
-        logger.info(f"Total reservation records fetched: {len(all_reservation_data)}")
-        return all_reservation_data
-    
     @retry_on_db_error(max_retries=3, base_delay=2.0)
     def get_watermark(self, table: str) -> Optional[datetime]:
         """Get the last processed timestamp for a Tock table."""
         try:
-            logger.debug("Attempting to create database engine...")
-            engine = create_database_engine()
-            logger.debug("Engine created successfully")
-            
             logger.debug("Attempting to establish connection...")
-            with engine.connect() as conn:
+            with self.db.connect() as conn:
                 logger.debug("Connection established successfully")
                 
                 # Convert table name to database compatible format
@@ -352,19 +1476,7 @@ class TockAPIClient:
                 # Create table if it doesn't exist with PostgreSQL-compatible schema
                 logger.info(f"Creating table raw_{db_table} if it doesn't exist")
                 
-                create_table_sql = f"""
-                    CREATE TABLE IF NOT EXISTS raw_{db_table} (
-                        id VARCHAR(255) PRIMARY KEY,
-                        last_processed_at TIMESTAMP WITH TIME ZONE,
-                        _airbyte_ab_id VARCHAR(255),
-                        _airbyte_emitted_at TIMESTAMP WITH TIME ZONE,
-                        _airbyte_normalized_at TIMESTAMP WITH TIME ZONE,
-                        _airbyte_{db_table}_hashid VARCHAR(255),
-                        data JSONB
-                    )
-                """
-                logger.debug(f"Executing CREATE TABLE SQL: {create_table_sql}")
-                conn.execute(text(create_table_sql))
+                ensure_raw_table(self.db, conn, db_table)
                 conn.commit()
                 logger.info(f"Table raw_{db_table} created/verified successfully")
                 
@@ -416,6 +1528,7 @@ class TockAPIClient:
             df = pd.DataFrame([{
                 'id': str(record.get('id', '')),  # Convert to string to handle different ID types
                 'last_processed_at': current_time,
+                'content_hash': record_content_hash(record),
                 'data': json.dumps(record)  # Store the entire record as JSON
             } for record in data])
             
@@ -446,54 +1559,20 @@ class TockAPIClient:
             sample_ids = df['id'].head(5).tolist()
             logger.debug(f"Sample IDs being processed: {sample_ids}")
             
-            logger.info("Attempting to create database engine...")
-            engine = create_database_engine()
-            logger.info("Engine created successfully")
-            
             # Add metadata columns
             df['_airbyte_ab_id'] = pd.util.hash_pandas_object(df).astype(str)
             df['_airbyte_emitted_at'] = current_time
             df['_airbyte_normalized_at'] = current_time
             df['_airbyte_' + db_table + '_hashid'] = pd.util.hash_pandas_object(df).astype(str)
             
-            # Create a temporary table for the new data
-            temp_table = f'temp_{db_table}'
-            df.to_sql(
-                temp_table,
-                engine,
-                if_exists='replace',
-                index=False
-            )
-            
-            # Perform the upsert using PostgreSQL's ON CONFLICT
-            with engine.connect() as conn:
-                upsert_sql = f"""
-                    INSERT INTO raw_{db_table} (
-                        id, last_processed_at, _airbyte_ab_id, 
-                        _airbyte_emitted_at, _airbyte_normalized_at, 
-                        _airbyte_{db_table}_hashid, data
-                    )
-                    SELECT 
-                        id, last_processed_at, _airbyte_ab_id,
-                        _airbyte_emitted_at, _airbyte_normalized_at,
-                        _airbyte_{db_table}_hashid, data::jsonb
-                    FROM {temp_table}
-                    ON CONFLICT (id) DO UPDATE SET
-                        last_processed_at = EXCLUDED.last_processed_at,
-                        _airbyte_ab_id = EXCLUDED._airbyte_ab_id,
-                        _airbyte_emitted_at = EXCLUDED._airbyte_emitted_at,
-                        _airbyte_normalized_at = EXCLUDED._airbyte_normalized_at,
-                        _airbyte_{db_table}_hashid = EXCLUDED._airbyte_{db_table}_hashid,
-                        data = EXCLUDED.data
-                """
-                conn.execute(text(upsert_sql))
-                conn.commit()
-                
-                # Drop the temporary table
-                conn.execute(text(f"DROP TABLE IF EXISTS {temp_table}"))
-                conn.commit()
+            # Stage and merge the batch (COPY on Postgres, to_sql elsewhere)
+            result = load_raw_batch(self.db, db_table, df)
+            record_load_counts(self.load_stats, db_table, result)
             
-            logger.info(f"Successfully upserted {len(data)} records to raw_{db_table}")
+            logger.info(
+                f"Successfully upserted {len(data)} records to raw_{db_table} "
+                f"({result['inserted']} inserted, {result['updated']} updated, {result['unchanged']} unchanged)"
+            )
             
         except SQLAlchemyError as e:
             logger.error(f"Database error while upserting data to {table}: {str(e)}")
@@ -505,7 +1584,9 @@ class TockAPIClient:
 class Commerce7Client:
     """Commerce7 API client for data ingestion."""
     
-    def __init__(self):
+    def __init__(self, db: Optional[DatabaseContext] = None):
+        self.db = db or get_db_context()
+        self.load_stats: Dict[str, Dict[str, int]] = {}
         self.auth_token = os.getenv('C7_AUTH_TOKEN')
         self.tenant = os.getenv('C7_TENANT')
         self.base_url = 'https://api.commerce7.com/v1'
@@ -519,18 +1600,24 @@ class Commerce7Client:
             'tenant': self.tenant,
             'Authorization': f"Basic {self.auth_token}"
         })
+        # Requests/sec across all threads (C7_RATE_LIMIT=0 disables)
+        self.rate_limiter = RateLimiter(float(os.getenv('C7_RATE_LIMIT', '2')))
+        # Records per upsert batch and how many batches may wait for the writer
+        self.batch_size = max(1, int(os.getenv('C7_BATCH_SIZE', '1000')))
+        self.queue_depth = max(1, int(os.getenv('C7_QUEUE_DEPTH', '2')))
+        self.ledger = BatchLedger(self.db)
+        # Watermark filter precision ('datetime' or 'date') and the safety overlap
+        # subtracted from it to cover clock skew and in-flight source updates
+        self.watermark_precision = os.getenv('C7_WATERMARK_PRECISION', 'datetime')
+        self.watermark_overlap = timedelta(minutes=float(os.getenv('C7_WATERMARK_OVERLAP_MINUTES', '15')))
         logger.debug("Commerce7Client initialized successfully")
     
     @retry_on_db_error(max_retries=3, base_delay=2.0)
     def get_watermark(self, table: str) -> Optional[datetime]:
-        """Get the last processed timestamp for a table."""
+        """Get the maximum source updatedAt already loaded for a table."""
         try:
-            logger.debug("Attempting to create database engine...")
-            engine = create_database_engine()
-            logger.debug("Engine created successfully")
-            
             logger.debug("Attempting to establish connection...")
-            with engine.connect() as conn:
+            with self.db.connect() as conn:
                 logger.debug("Connection established successfully")
                 
                 # Convert table name to database compatible format
@@ -539,25 +1626,22 @@ class Commerce7Client:
                 # Create table if it doesn't exist with PostgreSQL-compatible schema
                 logger.debug(f"Creating table raw_{db_table} if it doesn't exist")
                 
-                # Use PostgreSQL-specific syntax
-                create_table_sql = f"""
-                    CREATE TABLE IF NOT EXISTS raw_{db_table} (
-                        id VARCHAR(255) PRIMARY KEY,
-                        last_processed_at TIMESTAMP WITH TIME ZONE,
-                        _airbyte_ab_id VARCHAR(255),
-                        _airbyte_emitted_at TIMESTAMP WITH TIME ZONE,
-                        _airbyte_normalized_at TIMESTAMP WITH TIME ZONE,
-                        _airbyte_{db_table}_hashid VARCHAR(255),
-                        data JSONB
-                    )
-                """
-                conn.execute(text(create_table_sql))
+                ensure_raw_table(self.db, conn, db_table)
                 conn.commit()
                 
-                logger.debug(f"Executing query for watermark on table: raw_{db_table}")
-                result = conn.execute(text(
-                    f"SELECT MAX(last_processed_at) FROM raw_{db_table}"
-                )).scalar()
+                # Max source updatedAt recorded by the last completed run
+                result = self.ledger.get_source_watermark(conn, db_table)
+                if result is None:
+                    # Bootstrap from the landed records (source updatedAt on Postgres,
+                    # ingest time elsewhere) until a completed run records state. The
+                    # MAX is answered from the raw_*_updated_at_ts_idx expression index.
+                    logger.debug(f"Executing query for watermark on table: raw_{db_table}")
+                    watermark_sql = (
+                        f"SELECT MAX(raw_updated_at(data)) FROM raw_{db_table}"
+                        if self.db.is_postgres
+                        else f"SELECT MAX(last_processed_at) FROM raw_{db_table}"
+                    )
+                    result = conn.execute(text(watermark_sql)).scalar()
                 logger.debug(f"Watermark for {table}: {result}")
                 
                 # Convert timestamp to datetime object if it exists
@@ -592,12 +1676,44 @@ class Commerce7Client:
             logger.error(f"Error type: {type(e).__name__}")
             raise
     
-    def fetch_data(self, endpoint: str, watermark: Optional[datetime] = None) -> List[Dict]:
-        """Fetch data from Commerce7 API with cursor-based pagination and optional watermark filtering."""
+    def watermark_filter(self, watermark: datetime) -> str:
+        """Commerce7 updatedAt filter for a watermark, less the safety overlap."""
+        since = watermark - self.watermark_overlap
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        if self.watermark_precision == 'date':
+            # Day granularity: "gte: YYYY-MM-DD"
+            return f"gte: {since.strftime('%Y-%m-%d')}"
+        return f"gte: {since.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]}Z"
+    
+    def range_filter(self, since: datetime, until: datetime) -> str:
+        """Commerce7 updatedAt filter for a fixed [since, until] window (work queue backfills)."""
+        since, until = (
+            (stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)).astimezone(timezone.utc)
+            for stamp in (since, until)
+        )
+        return f"btw: {since.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]}Z|{until.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]}Z"
+    
+    def fetch_data(self, endpoint: str, watermark: Optional[datetime] = None, run_id: Optional[str] = None,
+                   start_cursor: str = "start", first_batch: int = 1, until: Optional[datetime] = None) -> int:
+        """Fetch data from Commerce7 API with cursor-based pagination and optional watermark filtering.
+
+        Page fetching and batch loading run as a pipeline: full batches go onto
+        a bounded queue (C7_QUEUE_DEPTH) drained by a writer thread, so the next
+        cursor page downloads while the previous batch is being upserted. Every
+        batch is written exactly once, here; with a run_id each batch is also
+        recorded in the ingest ledger with the cursor to resume from. With
+        until, only records updated between watermark and until are fetched
+        (no overlap is applied). Returns the number of records written.
+        """
         url = f"{self.base_url}/{endpoint}"
         all_data = []
-        cursor = "start"
-        batch_size = 1000  # Process in batches of 1000
+        cursor = start_cursor
+        resuming = start_cursor != "start"
+        seen_cursors = set()
+        total_rows = 0
+        batch_started = time.perf_counter()
+        batch_size = self.batch_size
         
         # Map endpoints to their response data keys
         endpoint_data_keys = {
@@ -613,65 +1729,139 @@ class Commerce7Client:
         
         logger.debug(f"Fetching data from {endpoint} with watermark: {watermark}")
         
-        while cursor:
-            params = {'cursor': cursor}
-            if watermark:
-                # Commerce7 API expects format: "gte: YYYY-MM-DD"
-                params['updatedAt'] = f"gte: {watermark.strftime('%Y-%m-%d')}"
-            
-            try:
-                logger.debug(f"Making API request to {endpoint} with cursor: {cursor}")
-                response = self.session.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
+        batches = queue.Queue(maxsize=self.queue_depth)
+        timings = {'fetch': 0.0, 'upsert': 0.0, 'producer_wait': 0.0, 'writer_idle': 0.0}
+        writer_errors = []
+        
+        def write_batches():
+            batch_number = first_batch
+            while True:
+                started = time.perf_counter()
+                item = batches.get()
+                timings['writer_idle'] += time.perf_counter() - started
+                if item is None:
+                    return
+                if writer_errors:
+                    continue  # Drain remaining batches after a failure
+                batch, next_cursor, fetch_started = item
+                record_in_ledger = None
+                if run_id:
+                    def record_in_ledger(conn, number=batch_number, batch=batch, next_cursor=next_cursor):
+                        self.ledger.record_batch(
+                            conn, run_id, endpoint, number, next_cursor, len(batch),
+                            time.perf_counter() - fetch_started, max_source_updated_at(batch)
+                        )
+                started = time.perf_counter()
+                try:
+                    self.upsert_data(endpoint, batch, in_transaction=record_in_ledger)
+                    batch_number += 1
+                except Exception as e:
+                    writer_errors.append(e)
+                finally:
+                    timings['upsert'] += time.perf_counter() - started
+        
+        def enqueue(batch: List[Dict], next_cursor: Optional[str]):
+            nonlocal total_rows, batch_started
+            started = time.perf_counter()
+            batches.put((batch, next_cursor, batch_started))
+            timings['producer_wait'] += time.perf_counter() - started
+            total_rows += len(batch)
+            batch_started = time.perf_counter()
+        
+        writer = threading.Thread(target=write_batches, name=f"c7-writer-{endpoint}", daemon=True)
+        writer.start()
+        try:
+            while cursor and not writer_errors:
+                params = {'cursor': cursor}
+                if watermark and until:
+                    params['updatedAt'] = self.range_filter(watermark, until)
+                elif watermark:
+                    params['updatedAt'] = self.watermark_filter(watermark)
                 
-                if isinstance(data, dict):
-                    # Get items using the endpoint-specific key
-                    items = data.get(data_key, [])
-                    cursor = data.get('cursor')
-                    logger.debug(f"Response contains {len(items)} items")
+                try:
+                    logger.debug(f"Making API request to {endpoint} with cursor: {cursor}")
+                    started = time.perf_counter()
+                    self.rate_limiter.wait()
+                    response = self.session.get(url, params=params)
+                    response.raise_for_status()
+                    data = response.json()
+                    timings['fetch'] += time.perf_counter() - started
                     
-                    if items:
-                        all_data.extend(items)
-                        logger.debug(f"Fetched {len(items)} records from {endpoint}")
+                    resuming = False
+                    if isinstance(data, dict):
+                        # Get items using the endpoint-specific key
+                        items = data.get(data_key, [])
+                        cursor = data.get('cursor')
+                        logger.debug(f"Response contains {len(items)} items")
                         
-                        # Process batch if we've reached the batch size
-                        if len(all_data) >= batch_size:
-                            logger.info(f"Processing batch of {len(all_data)} records")
-                            self.upsert_data(endpoint, all_data)
-                            all_data = []  # Clear the batch
-                    
-                    # If we get no items and no cursor, we're done
-                    if not items and not cursor:
-                        logger.info("No more data to fetch")
-                        break
+                        if items:
+                            all_data.extend(items)
+                            logger.debug(f"Fetched {len(items)} records from {endpoint}")
+                            
+                            # Hand the batch to the writer once it reaches the batch size
+                            if len(all_data) >= batch_size:
+                                logger.info(f"Processing batch of {len(all_data)} records")
+                                enqueue(all_data, cursor)
+                                all_data = []  # Start the next batch
                         
-                    # If we get no items but a cursor, we might be in a loop
-                    if not items and cursor:
-                        logger.warning(f"No items returned but cursor exists: {cursor}")
-                        if cursor in all_data:
-                            logger.error("Detected cursor loop, breaking")
+                        # If we get no items and no cursor, we're done
+                        if not items and not cursor:
+                            logger.info("No more data to fetch")
                             break
-                else:
-                    logger.error(f"Unexpected response format: {type(data)}")
-                    break
-                
-            except requests.exceptions.RequestException as e:
-                logger.error(f"API request failed: {str(e)}")
-                logger.error(f"Response status code: {e.response.status_code if hasattr(e, 'response') else 'N/A'}")
-                raise
-        
-        # Process any remaining records
-        if all_data:
-            logger.info(f"Processing final batch of {len(all_data)} records")
-            self.upsert_data(endpoint, all_data)
-        
-        logger.info(f"Completed fetching and processing all records from {endpoint}")
-        return all_data
+                            
+                        # If we get no items but a cursor, we might be in a loop
+                        if not items and cursor:
+                            logger.warning(f"No items returned but cursor exists: {cursor}")
+                            if cursor in seen_cursors:
+                                logger.error("Detected cursor loop, breaking")
+                                break
+                        seen_cursors.add(cursor)
+                    else:
+                        logger.error(f"Unexpected response format: {type(data)}")
+                        break
+                    
+                except requests.exceptions.HTTPError as e:
+                    status = e.response.status_code if e.response is not None else None
+                    if resuming and status and 400 <= status < 500 and status != 429:
+                        # The saved cursor has expired; re-pull this endpoint from the start
+                        logger.warning(f"Resume cursor rejected ({status}); restarting {endpoint} from the first page")
+                        cursor = "start"
+                        resuming = False
+                        continue
+                    logger.error(f"API request failed: {str(e)}")
+                    logger.error(f"Response status code: {status or 'N/A'}")
+                    raise
+                except requests.exceptions.RequestException as e:
+                    logger.error(f"API request failed: {str(e)}")
+                    logger.error(f"Response status code: {e.response.status_code if hasattr(e, 'response') else 'N/A'}")
+                    raise
+            
+            # Process any remaining records
+            if all_data and not writer_errors:
+                logger.info(f"Processing final batch of {len(all_data)} records")
+                enqueue(all_data, None)
+        finally:
+            batches.put(None)
+            writer.join()
+        
+        if writer_errors:
+            raise writer_errors[0]
+        
+        logger.info(
+            f"⏱️ {endpoint} pipeline: fetch {timings['fetch']:.1f}s, upsert {timings['upsert']:.1f}s, "
+            f"fetch blocked on full queue {timings['producer_wait']:.1f}s, "
+            f"writer idle {timings['writer_idle']:.1f}s (batch size {batch_size}, queue depth {self.queue_depth})"
+        )
+        logger.info(f"Completed fetching and processing {total_rows} records from {endpoint}")
+        return total_rows
     
     @retry_on_db_error(max_retries=3, base_delay=2.0)
-    def upsert_data(self, table: str, data: List[Dict]):
-        """Upsert data into the database."""
+    def upsert_data(self, table: str, data: List[Dict], in_transaction: Optional[Callable] = None):
+        """Upsert data into the database.
+
+        in_transaction(conn) runs inside the merge transaction (used to record
+        the batch in the ingest ledger atomically with its rows).
+        """
         if not data:
             logger.info(f"No new data to upsert for {table}")
             return
@@ -686,58 +1876,24 @@ class Commerce7Client:
             df = pd.DataFrame([{
                 'id': record.get('id'),
                 'last_processed_at': current_time,
+                'content_hash': record_content_hash(record),
                 'data': json.dumps(record)  # Store the entire record as JSON
             } for record in data])
             
-            logger.debug("Attempting to create database engine...")
-            engine = create_database_engine()
-            logger.debug("Engine created successfully")
-            
             # Add metadata columns
             df['_airbyte_ab_id'] = pd.util.hash_pandas_object(df).astype(str)
             df['_airbyte_emitted_at'] = current_time
             df['_airbyte_normalized_at'] = current_time
             df['_airbyte_' + db_table + '_hashid'] = pd.util.hash_pandas_object(df).astype(str)
             
-            # Create a temporary table for the new data
-            temp_table = f'temp_{db_table}'
-            df.to_sql(
-                temp_table,
-                engine,
-                if_exists='replace',
-                index=False
-            )
+            # Stage and merge the batch (COPY on Postgres, to_sql elsewhere)
+            result = load_raw_batch(self.db, db_table, df, in_transaction=in_transaction)
+            record_load_counts(self.load_stats, db_table, result)
             
-            # Perform the upsert using PostgreSQL's ON CONFLICT
-            with engine.connect() as conn:
-                # Use PostgreSQL's INSERT ... ON CONFLICT ... DO UPDATE
-                upsert_sql = f"""
-                    INSERT INTO raw_{db_table} (
-                        id, last_processed_at, _airbyte_ab_id, 
-                        _airbyte_emitted_at, _airbyte_normalized_at, 
-                        _airbyte_{db_table}_hashid, data
-                    )
-                    SELECT 
-                        id, last_processed_at, _airbyte_ab_id,
-                        _airbyte_emitted_at, _airbyte_normalized_at,
-                        _airbyte_{db_table}_hashid, data::jsonb
-                    FROM {temp_table}
-                    ON CONFLICT (id) DO UPDATE SET
-                        last_processed_at = EXCLUDED.last_processed_at,
-                        _airbyte_ab_id = EXCLUDED._airbyte_ab_id,
-                        _airbyte_emitted_at = EXCLUDED._airbyte_emitted_at,
-                        _airbyte_normalized_at = EXCLUDED._airbyte_normalized_at,
-                        _airbyte_{db_table}_hashid = EXCLUDED._airbyte_{db_table}_hashid,
-                        data = EXCLUDED.data
-                """
-                conn.execute(text(upsert_sql))
-                conn.commit()
-                
-                # Drop the temporary table
-                conn.execute(text(f"DROP TABLE IF EXISTS {temp_table}"))
-                conn.commit()
-            
-            logger.info(f"Successfully upserted {len(data)} records to raw_{db_table}")
+            logger.info(
+                f"Successfully upserted {len(data)} records to raw_{db_table} "
+                f"({result['inserted']} inserted, {result['updated']} updated, {result['unchanged']} unchanged)"
+            )
             
         except SQLAlchemyError as e:
             logger.error(f"Database error while upserting data to {table}: {str(e)}")
@@ -763,9 +1919,9 @@ def test_database_connection():
         logger.info(f"Testing connection to: {masked_url}")
         
         # Test connection with timeout
-        engine = create_database_engine()
+        db = get_db_context()
         
-        with engine.connect() as conn:
+        with db.connect() as conn:
             # Test basic connectivity
             result = conn.execute(text("SELECT 1 as test"))
             logger.info("✅ Basic connection successful")
@@ -788,6 +1944,7 @@ def test_database_connection():
                 logger.info(f"✅ Connected to database: {db_info[0]} as {db_info[1]} on {db_info[2]}:{db_info[3]}")
             
             logger.info("🎉 Database connection test completed successfully!")
+            db.log_pool_stats()
             return True
             
     except OperationalError as e:
@@ -815,156 +1972,789 @@ def test_database_connection():
         logger.error(f"❌ Unexpected error: {str(e)}")
         return False
 
+COMMERCE7_ENDPOINTS = ['customer', 'club-membership', 'product', 'order']
+TOCK_ENDPOINTS = ['tock-guest', 'tock-reservation']
+
+def ingest_commerce7_endpoint(client: Commerce7Client, endpoint: str):
+    """Fetch and load a single Commerce7 endpoint, resuming an interrupted run if one exists."""
+    table = endpoint.replace('-', '_')
+    resume = client.ledger.get_resumable_run(endpoint)
+    if resume:
+        run_id, watermark, start_cursor = resume['run_id'], resume['watermark'], resume['cursor']
+        first_batch = resume['last_batch'] + 1
+        logger.info(f"Resuming {endpoint} run {run_id} after batch {resume['last_batch']} (watermark {watermark})")
+    else:
+        # The product catalog is small; always full-fetch it so a product
+        # whose updatedAt predates the ever-advancing watermark can't be
+        # permanently skipped. High-volume endpoints stay incremental.
+        watermark = None if endpoint == 'product' else client.get_watermark(table)
+        run_id, start_cursor, first_batch = RUN_ID, "start", 1
+
+    client.ledger.start_run(run_id, endpoint, watermark)
+    logger.info(f"Fetching {endpoint} data since {watermark}")
+    try:
+        rows = client.fetch_data(endpoint, watermark, run_id=run_id, start_cursor=start_cursor, first_batch=first_batch)
+    except Exception:
+        client.ledger.finish_run(run_id, endpoint, 'failed')
+        raise
+    client.ledger.finish_run(run_id, endpoint, 'completed')
+    logger.info(f"Loaded {rows} {endpoint} records into raw_{table}")
+
+def ingest_tock_endpoint(client: TockAPIClient, endpoint: str):
+    """Fetch and load a single Tock export (tock-guest or tock-reservation)."""
+    table = endpoint.replace('-', '_')
+    label = table.replace('tock_', '')
+    
+    # An empty raw table means a fresh initial load: forget the file manifest
+    watermark = client.get_watermark(table)
+    reset = watermark is None
+    logger.info(f"   - {label.capitalize()} watermark: {watermark} (initial load: {reset})")
+    
+    summary = client.sync_export_files(table, reset=reset)
+    logger.info(
+        f"✅ {label.capitalize()} export sync completed: {summary['loaded']} file(s) loaded "
+        f"({summary['rows']} records), {summary['unchanged']} unchanged"
+    )
+
+def run_ingestion_tasks(tasks: Dict[str, Callable[[], None]], concurrency: int) -> Dict[str, BaseException]:
+    """Run independent endpoint tasks on a bounded thread pool.
+
+    Each endpoint fails in isolation: an exception is logged and returned
+    keyed by endpoint while the remaining tasks keep loading.
+    """
+    failures = {}
+    timings = {}
+    
+    def run(name: str, task: Callable[[], None]):
+        started = time.perf_counter()
+        try:
+            task()
+        finally:
+            timings[name] = time.perf_counter() - started
+    
+    logger.info(f"🔄 Ingesting {len(tasks)} endpoint(s) with concurrency {concurrency}")
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='ingest') as executor:
+        futures = {executor.submit(run, name, task): name for name, task in tasks.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                future.result()
+                logger.info(f"✅ {name} completed in {timings[name]:.1f}s")
+            except Exception as e:
+                failures[name] = e
+                logger.error(f"❌ {name} failed after {timings.get(name, 0):.1f}s: {str(e)}", exc_info=True)
+    
+    return failures
+
+def init_clients(db: DatabaseContext) -> Dict:
+    """API clients for every source whose credentials are configured."""
+    clients = {}
+    
+    # Check for Commerce7 credentials
+    if all([os.getenv('C7_AUTH_TOKEN'), os.getenv('C7_TENANT')]):
+        clients['commerce7'] = Commerce7Client(db)
+        logger.info("Commerce7 client initialized")
+    
+    # Check for Tock credentials
+    if all([os.getenv('X_TOCK_AUTH'), os.getenv('X_TOCK_SCOPE')]):
+        clients['tock'] = TockAPIClient(db)
+        logger.info("Tock client initialized")
+    
+    return clients
+
+# Advisory lock namespaces (first key of pg_advisory_lock(int, int)); the
+# second key is hashtext() of the endpoint, job id or raw table.
+ADVISORY_LOCK_ENDPOINT = 7301
+ADVISORY_LOCK_JOB = 7302
+ADVISORY_LOCK_RAW_MERGE = 7303
+ADVISORY_LOCK_ENQUEUE = 7304
+
+@contextmanager
+def advisory_lock(db: DatabaseContext, namespace: int, key: str) -> Iterator[bool]:
+    """Try a session-level Postgres advisory lock for the block; yields whether it was acquired.
+
+    The lock lives on its own pooled connection, so it is held across the
+    block's transactions and released if the process dies. Always acquired on
+    non-Postgres backends.
+    """
+    if not db.is_postgres:
+        yield True
+        return
+    with db.connect() as conn:
+        acquired = conn.execute(
+            text("SELECT pg_try_advisory_lock(:namespace, hashtext(:key))"), {'namespace': namespace, 'key': key}
+        ).scalar()
+        conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(
+                    text("SELECT pg_advisory_unlock(:namespace, hashtext(:key))"), {'namespace': namespace, 'key': key}
+                )
+                conn.commit()
+
+def run_endpoint_exclusively(db: DatabaseContext, endpoint: str, task: Callable[[], None]):
+    """Run an endpoint's incremental load unless another process is already running it."""
+    with advisory_lock(db, ADVISORY_LOCK_ENDPOINT, endpoint) as acquired:
+        if not acquired:
+            logger.warning(f"⏭️ {endpoint} is already being ingested by another run - skipping")
+            return
+        task()
+
+# Work queue: ingest_jobs rows are claimed with FOR UPDATE SKIP LOCKED by any
+# number of `ingest.py --worker` processes. A job is a Commerce7 endpoint's
+# updatedAt window (range_start/range_end), one Tock export file
+# (export_file), or with neither a whole incremental endpoint load.
+WORK_QUEUE_DEFAULT = 'ingest'
+# Endpoint of the no-op jobs test_work_queue enqueues
+WORK_QUEUE_PROBE = 'probe'
+
+def _ensure_ingest_jobs(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS ingest_jobs (
+            job_id BIGSERIAL PRIMARY KEY,
+            queue VARCHAR(50) NOT NULL DEFAULT 'ingest',
+            endpoint VARCHAR(50) NOT NULL,
+            range_start TIMESTAMP WITH TIME ZONE,
+            range_end TIMESTAMP WITH TIME ZONE,
+            export_file VARCHAR(255),
+            status VARCHAR(20) NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            worker VARCHAR(64),
+            row_count INTEGER,
+            error TEXT,
+            enqueued_at TIMESTAMP WITH TIME ZONE,
+            claimed_at TIMESTAMP WITH TIME ZONE,
+            finished_at TIMESTAMP WITH TIME ZONE
+        )
+    """))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ingest_jobs_pending_idx ON ingest_jobs (queue, job_id) WHERE status = 'pending'"
+    ))
+
+def enqueue_ingest_jobs(db: DatabaseContext, jobs: List[Dict], queue_name: str = WORK_QUEUE_DEFAULT) -> int:
+    """Add jobs (endpoint plus optional range_start/range_end/export_file) to a queue.
+
+    A job identical to one already pending or running is not added again.
+    Returns the number of jobs added.
+    """
+    added = 0
+    with db.begin() as conn:
+        _ensure_ingest_jobs(conn)
+        # Serialize enqueuers so the duplicate check can't race
+        conn.execute(text("SELECT pg_advisory_xact_lock(:namespace, hashtext(:queue))"),
+                     {'namespace': ADVISORY_LOCK_ENQUEUE, 'queue': queue_name})
+        for job in jobs:
+            params = {
+                'queue': queue_name,
+                'endpoint': job['endpoint'],
+                'range_start': job.get('range_start'),
+                'range_end': job.get('range_end'),
+                'export_file': job.get('export_file'),
+                'now': datetime.now(timezone.utc),
+            }
+            added += conn.execute(text("""
+                INSERT INTO ingest_jobs (queue, endpoint, range_start, range_end, export_file, enqueued_at)
+                SELECT :queue, :endpoint, :range_start, :range_end, :export_file, :now
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM ingest_jobs
+                    WHERE queue = :queue
+                      AND endpoint = :endpoint
+                      AND range_start IS NOT DISTINCT FROM CAST(:range_start AS TIMESTAMP WITH TIME ZONE)
+                      AND range_end IS NOT DISTINCT FROM CAST(:range_end AS TIMESTAMP WITH TIME ZONE)
+                      AND export_file IS NOT DISTINCT FROM CAST(:export_file AS VARCHAR)
+                      AND status IN ('pending', 'running')
+                )
+            """), params).rowcount
+    return added
+
+def enqueue_backfill(endpoint: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                     window_days: int = 30, queue_name: str = WORK_QUEUE_DEFAULT) -> int:
+    """Split a backfill of one endpoint into work queue jobs.
+
+    Commerce7 endpoints get one job per window_days of updatedAt between since
+    and until (default now); Tock endpoints get one job per published export file.
+    """
+    load_environment()
+    db = get_db_context()
+    if not db.is_postgres:
+        logger.error("❌ The work queue requires PostgreSQL (FOR UPDATE SKIP LOCKED)")
+        return 0
+    
+    jobs = []
+    if endpoint in COMMERCE7_ENDPOINTS:
+        if since is None:
+            raise ValueError(f"A {endpoint} backfill needs a start date")
+        until = until or datetime.now(timezone.utc)
+        start = since
+        while start < until:
+            end = min(start + timedelta(days=window_days), until)
+            jobs.append({'endpoint': endpoint, 'range_start': start, 'range_end': end})
+            start = end
+    elif endpoint in TOCK_ENDPOINTS:
+        table = endpoint.replace('-', '_')
+        urls = TockAPIClient(db).get_data_urls()[TOCK_EXPORT_URL_KEYS[table]]
+        jobs = [{'endpoint': endpoint, 'export_file': export_file_name(url)} for url in urls]
+    else:
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+    
+    added = enqueue_ingest_jobs(db, jobs, queue_name)
+    logger.info(f"📥 Enqueued {added} {endpoint} job(s) on {queue_name} ({len(jobs) - added} already queued)")
+    return added
+
+def ingest_job_max_attempts() -> int:
+    """Claims a job gets before it stays failed (INGEST_JOB_MAX_ATTEMPTS, default 3)."""
+    return int(os.getenv('INGEST_JOB_MAX_ATTEMPTS', '3'))
+
+def claim_ingest_job(conn, queue_name: str, worker: str) -> Optional[Dict]:
+    """Claim the oldest pending job of a queue on conn, first requeueing jobs whose worker died.
+
+    The job's advisory lock is taken before the claim commits and stays held on
+    conn until finish_ingest_job, so a running job whose lock is free has lost
+    its worker. Such a job counts as a failed attempt, like in finish_ingest_job.
+    """
+    conn.execute(text("""
+        UPDATE ingest_jobs SET
+            status = CASE WHEN attempts >= :max_attempts THEN 'failed' ELSE 'pending' END,
+            error = 'worker ' || coalesce(worker, '?') || ' exited while running the job',
+            worker = NULL,
+            finished_at = :now
+        WHERE job_id IN (SELECT job_id FROM ingest_jobs WHERE queue = :queue AND status = 'running')
+          AND pg_try_advisory_xact_lock(:namespace, hashtext(job_id::text))
+    """), {'queue': queue_name, 'namespace': ADVISORY_LOCK_JOB, 'max_attempts': ingest_job_max_attempts(),
+           'now': datetime.now(timezone.utc)})
+    conn.commit()
+    
+    job = conn.execute(text("""
+        UPDATE ingest_jobs SET
+            status = 'running',
+            worker = :worker,
+            attempts = attempts + 1,
+            claimed_at = :now
+        WHERE job_id = (
+            SELECT job_id FROM ingest_jobs
+            WHERE queue = :queue AND status = 'pending'
+            ORDER BY job_id
+            FOR UPDATE SKIP LOCKED
+            LIMIT 1
+        )
+        RETURNING job_id, endpoint, range_start, range_end, export_file, attempts
+    """), {'queue': queue_name, 'worker': worker, 'now': datetime.now(timezone.utc)}).mappings().fetchone()
+    if job:
+        conn.execute(text("SELECT pg_advisory_lock(:namespace, hashtext(CAST(:job_id AS TEXT)))"),
+                     {'namespace': ADVISORY_LOCK_JOB, 'job_id': job['job_id']})
+    conn.commit()
+    return dict(job) if job else None
+
+def finish_ingest_job(conn, job: Dict, row_count: Optional[int] = None, error: Optional[str] = None):
+    """Record a claimed job's outcome and release its advisory lock.
+
+    A failed job goes back to pending until it has been attempted
+    INGEST_JOB_MAX_ATTEMPTS times (default 3), then stays failed.
+    """
+    status = 'done' if error is None else ('failed' if job['attempts'] >= ingest_job_max_attempts() else 'pending')
+    conn.execute(text("""
+        UPDATE ingest_jobs SET status = :status, row_count = :row_count, error = :error, finished_at = :now
+        WHERE job_id = :job_id
+    """), {'status': status, 'row_count': row_count, 'error': error, 'now': datetime.now(timezone.utc),
+           'job_id': job['job_id']})
+    conn.execute(text("SELECT pg_advisory_unlock(:namespace, hashtext(CAST(:job_id AS TEXT)))"),
+                 {'namespace': ADVISORY_LOCK_JOB, 'job_id': job['job_id']})
+    conn.commit()
+
+def run_ingest_job(db: DatabaseContext, clients: Dict, job: Dict) -> Optional[int]:
+    """Load one work queue job; returns the records written when the job type reports them."""
+    endpoint = job['endpoint']
+    if endpoint == WORK_QUEUE_PROBE:
+        time.sleep(0.2)
+        return 0
+    if endpoint in COMMERCE7_ENDPOINTS:
+        client, ingest = clients.get('commerce7'), ingest_commerce7_endpoint
+    elif endpoint in TOCK_ENDPOINTS:
+        client, ingest = clients.get('tock'), ingest_tock_endpoint
+    else:
+        client = None
+    if client is None:
+        raise ValueError(f"No configured client handles endpoint: {endpoint}")
+    
+    if job['range_start'] is not None and endpoint in COMMERCE7_ENDPOINTS:
+        # Fixed window: no ledger run, so it never competes with the cron's resumable run
+        return client.fetch_data(endpoint, job['range_start'], until=job['range_end'] or datetime.now(timezone.utc))
+    if job['export_file'] is not None and endpoint in TOCK_ENDPOINTS:
+        return client.sync_export_files(endpoint.replace('-', '_'), files=[job['export_file']])['rows']
+    run_endpoint_exclusively(db, endpoint, partial(ingest, client, endpoint))
+    return None
+
+def run_worker(queue_name: str = WORK_QUEUE_DEFAULT) -> bool:
+    """Drain a work queue: claim, load and record jobs until none are pending.
+
+    Start any number of these (on any machine) against the same database to
+    share a backfill. Tables that changed are added to dbt_pending_sources
+    after each job, so the next cron run's dbt builds their models.
+    """
+    load_environment()
+    db = get_db_context()
+    if not db.is_postgres:
+        logger.error("❌ The work queue requires PostgreSQL (FOR UPDATE SKIP LOCKED)")
+        return False
+    
+    clients = init_clients(db)
+    worker = f"{os.getpid()}-{RUN_ID[:12]}"
+    summary = {'done': 0, 'failed': 0, 'rows': 0}
+    started = time.perf_counter()
+    logger.info(f"👷 Worker {worker} draining queue {queue_name}")
+    
+    # Dedicated connection: holds each claimed job's advisory lock while it runs
+    with db.connect() as conn:
+        _ensure_ingest_jobs(conn)
+        conn.commit()
+        while True:
+            job = claim_ingest_job(conn, queue_name, worker)
+            if job is None:
+                break
+            label = job['export_file'] or (
+                f"{job['range_start']} -> {job['range_end']}" if job['range_start'] is not None else 'incremental'
+            )
+            job_started = time.perf_counter()
+            try:
+                rows = run_ingest_job(db, clients, job)
+            except Exception as e:
+                logger.error(f"❌ Job {job['job_id']} ({job['endpoint']} {label}) failed: {str(e)}", exc_info=True)
+                finish_ingest_job(conn, job, error=str(e))
+                summary['failed'] += 1
+                continue
+            finish_ingest_job(conn, job, row_count=rows)
+            summary['done'] += 1
+            summary['rows'] += rows or 0
+            logger.info(
+                f"✅ Job {job['job_id']} ({job['endpoint']} {label}) loaded {rows if rows is not None else '?'} "
+                f"records in {time.perf_counter() - job_started:.1f}s"
+            )
+            if clients:
+                merge_pending_sources(db, changed_raw_sources(clients))
+    
+    for client in clients.values():
+        log_load_counts(client.load_stats)
+    logger.info(
+        f"👷 Worker {worker} finished in {time.perf_counter() - started:.1f}s: "
+        f"{summary['done']} job(s) done, {summary['failed']} failed, {summary['rows']} records"
+    )
+    return summary['failed'] == 0
+
 def main(endpoint: str = None):
     """Main ingestion function."""
     try:
         # Load and validate environment variables
         load_environment()
         
-        # Initialize clients based on available credentials
-        clients = {}
-        
-        # Check for Commerce7 credentials
-        if all([os.getenv('C7_AUTH_TOKEN'), os.getenv('C7_TENANT')]):
-            clients['commerce7'] = Commerce7Client()
-            logger.info("Commerce7 client initialized")
+        # One pooled engine for the whole run, shared by every client and dbt
+        db = get_db_context()
         
-        # Check for Tock credentials
-        if all([os.getenv('X_TOCK_AUTH'), os.getenv('X_TOCK_SCOPE')]):
-            clients['tock'] = TockAPIClient()
-            logger.info("Tock client initialized")
+        # Initialize clients based on available credentials
+        clients = init_clients(db)
         
         if not clients:
             raise ValueError("No API clients could be initialized. Check your environment variables.")
         
-        # Process endpoints based on client type
-        if endpoint and endpoint.startswith('tock-'):
-            # This is a Tock endpoint, skip Commerce7 processing
-            logger.info(f"Processing Tock endpoint: {endpoint}")
-        elif 'commerce7' in clients and endpoint:
-            # Single Commerce7 endpoint
-            table = endpoint.replace('-', '_')
-            # The product catalog is small; always full-fetch it so a product
-            # whose updatedAt predates the ever-advancing watermark can't be
-            # permanently skipped. High-volume endpoints stay incremental.
-            watermark = None if endpoint == 'product' else clients['commerce7'].get_watermark(table)
-
-            logger.info(f"Fetching {endpoint} data since {watermark}")
-            data = clients['commerce7'].fetch_data(endpoint, watermark)
-            
-            logger.info(f"Upserting {len(data)} records to {table}")
-            clients['commerce7'].upsert_data(table, data)
-            
-        elif 'commerce7' in clients and not endpoint:
-            # All Commerce7 endpoints
-            endpoints = ['customer', 'club-membership', 'product', 'order']
-            
-            for c7_endpoint in endpoints:
-                table = c7_endpoint.replace('-', '_')
-                # Products are a small catalog; always full-fetch so a product
-                # whose updatedAt predates the ever-advancing watermark can't be
-                # permanently skipped. High-volume endpoints stay incremental.
-                watermark = None if c7_endpoint == 'product' else clients['commerce7'].get_watermark(table)
-
-                logger.info(f"Fetching {c7_endpoint} data since {watermark}")
-                data = clients['commerce7'].fetch_data(c7_endpoint, watermark)
-                
-                logger.info(f"Upserting {len(data)} records to {table}")
-                clients['commerce7'].upsert_data(table, data)
-        
-        # Process Tock data if client is available
-        logger.info("🔍 Checking if Tock data should be processed...")
-        logger.info(f"   - 'tock' in clients: {'tock' in clients}")
-        logger.info(f"   - endpoint value: {endpoint}")
-        logger.info(f"   - not endpoint: {not endpoint}")
-        logger.info(f"   - endpoint.startswith('tock-'): {endpoint.startswith('tock-') if endpoint else 'N/A'}")
-        
-        if 'tock' in clients and (not endpoint or endpoint.startswith('tock-')):
-            logger.info("✅ Starting Tock data processing...")
-            
-            # Check if this is an incremental run (data already exists)
-            logger.info("🔍 Checking Tock watermarks...")
-            tock_guest_watermark = clients['tock'].get_watermark('tock_guest')
-            tock_reservation_watermark = clients['tock'].get_watermark('tock_reservation')
-            
-            logger.info(f"   - Guest watermark: {tock_guest_watermark}")
-            logger.info(f"   - Reservation watermark: {tock_reservation_watermark}")
-            
-            guest_incremental = tock_guest_watermark is not None
-            reservation_incremental = tock_reservation_watermark is not None
-            
-            logger.info(f"   - Guest incremental mode: {guest_incremental}")
-            logger.info(f"   - Reservation incremental mode: {reservation_incremental}")
-            
-            # Process guest data
-            logger.info(f"🔍 Checking if guest data should be processed (endpoint={endpoint})...")
-            if not endpoint or endpoint == 'tock-guest':
-                logger.info("✅ Processing guest data...")
-                if guest_incremental:
-                    logger.info("Fetching Tock guest data (incremental mode - latest file only)...")
-                else:
-                    logger.info("Fetching Tock guest data (initial load - all files)...")
-                
-                guest_data = clients['tock'].fetch_all_guest_data(incremental=guest_incremental)
-                logger.info(f"📊 Fetched {len(guest_data) if guest_data else 0} guest records")
-                
-                if guest_data:
-                    logger.info(f"Upserting {len(guest_data)} guest records")
-                    clients['tock'].upsert_data('tock_guest', guest_data)
-                    logger.info("✅ Guest data upsert completed")
-                else:
-                    logger.info("⚠️ No guest data to process")
-            else:
-                logger.info(f"⏭️ Skipping guest data (endpoint filter: {endpoint})")
-            
-            # Process reservation data
-            logger.info(f"🔍 Checking if reservation data should be processed (endpoint={endpoint})...")
-            if not endpoint or endpoint == 'tock-reservation':
-                logger.info("✅ Processing reservation data...")
-                if reservation_incremental:
-                    logger.info("Fetching Tock reservation data (incremental mode - latest file only)...")
-                else:
-                    logger.info("Fetching Tock reservation data (initial load - all files)...")
-                
-                reservation_data = clients['tock'].fetch_all_reservation_data(incremental=reservation_incremental)
-                logger.info(f"📊 Fetched {len(reservation_data) if reservation_data else 0} reservation records")
-                
-                if reservation_data:
-                    logger.info(f"Upserting {len(reservation_data)} reservation records")
-                    clients['tock'].upsert_data('tock_reservation', reservation_data)
-                    logger.info("✅ Reservation data upsert completed")
-                else:
-                    logger.info("⚠️ No reservation data to process")
-            else:
-                logger.info(f"⏭️ Skipping reservation data (endpoint filter: {endpoint})")
-        else:
-            logger.warning("⚠️ Tock data processing skipped - condition not met")
+        # Build one independent task per endpoint, honouring the endpoint filter
+        tasks = {}
+        if 'commerce7' in clients:
+            for c7_endpoint in COMMERCE7_ENDPOINTS:
+                if not endpoint or endpoint == c7_endpoint:
+                    tasks[c7_endpoint] = partial(ingest_commerce7_endpoint, clients['commerce7'], c7_endpoint)
+        if 'tock' in clients:
+            for tock_endpoint in TOCK_ENDPOINTS:
+                if not endpoint or endpoint == tock_endpoint:
+                    tasks[tock_endpoint] = partial(ingest_tock_endpoint, clients['tock'], tock_endpoint)
+        
+        if endpoint and not tasks:
+            logger.warning(f"⚠️ No configured client handles endpoint: {endpoint}")
+        
+        # An overlapping cron run (or queue worker) already loading an endpoint keeps it
+        tasks = {name: partial(run_endpoint_exclusively, db, name, task) for name, task in tasks.items()}
         
-        logger.info("Data ingestion completed successfully")
+        # INGEST_CONCURRENCY=1 restores strictly sequential processing
+        concurrency = int(os.getenv('INGEST_CONCURRENCY', '4'))
+        failures = run_ingestion_tasks(tasks, concurrency)
+        
+        for client in clients.values():
+            log_load_counts(client.load_stats)
+        
+        if failures:
+            logger.error(f"❌ Data ingestion failed for: {', '.join(sorted(failures))}")
+        else:
+            logger.info("Data ingestion completed successfully")
         
-        # Run dbt models after successful data ingestion
+        # Run dbt models after data ingestion; endpoints that did load still
+        # flow through to the marts even if another endpoint failed.
         logger.info("Starting dbt transformation pipeline...")
-        if run_dbt():
+        if run_dbt(db, changed_raw_sources(clients)):
+            if failures:
+                logger.error("❌ dbt finished, but some endpoints failed to ingest")
+                sys.exit(1)
             logger.info("🎉 Complete pipeline (ingestion + dbt) finished successfully!")
         else:
-            logger.error("❌ dbt run failed, but data ingestion was successful")
+            logger.error("❌ dbt run failed" + ("" if failures else ", but data ingestion was successful"))
             sys.exit(1)
         
     except Exception as e:
         logger.error(f"Error during data ingestion: {str(e)}", exc_info=True)  # Added exc_info for full traceback
         sys.exit(1)
 
-def run_dbt():
-    """Run dbt models after successful data ingestion."""
+def changed_raw_sources(clients: Dict) -> set:
+    """raw_* (and their typed_*) tables that received at least one insert or update this run."""
+    changed = set()
+    for client in clients.values():
+        for table, totals in client.load_stats.items():
+            if totals['inserted'] or totals['updated']:
+                changed.add(f"raw_{table}")
+                changed.update(typed_landing_tables(table))
+    return changed
+
+def _ensure_dbt_pending_sources(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS dbt_pending_sources (
+            source_table VARCHAR(255) PRIMARY KEY,
+            changed_at TIMESTAMP WITH TIME ZONE
+        )
+    """))
+
+def merge_pending_sources(db: DatabaseContext, changed: set) -> set:
+    """Persist this run's changed sources and return them plus any left by a failed dbt run."""
+    with db.begin() as conn:
+        _ensure_dbt_pending_sources(conn)
+        for source_table in changed:
+            conn.execute(text("""
+                INSERT INTO dbt_pending_sources (source_table, changed_at) VALUES (:source_table, :now)
+                ON CONFLICT (source_table) DO UPDATE SET changed_at = EXCLUDED.changed_at
+            """), {'source_table': source_table, 'now': datetime.now(timezone.utc)})
+        rows = conn.execute(text("SELECT source_table FROM dbt_pending_sources")).fetchall()
+    return {row[0] for row in rows}
+
+def clear_pending_sources(db: DatabaseContext):
+    """Forget pending sources once dbt has built their downstream models."""
+    with db.begin() as conn:
+        _ensure_dbt_pending_sources(conn)
+        conn.execute(text("DELETE FROM dbt_pending_sources"))
+
+def dbt_node_results(res) -> List[Dict]:
+    """Per-node status, timing and message from an in-process dbt invocation."""
+    results = getattr(res.result, 'results', None) or []
+    return [
+        {
+            'unique_id': node_result.node.unique_id,
+            'status': str(node_result.status),
+            'execution_time': float(node_result.execution_time or 0.0),
+            'compile_time': sum(
+                (timing.completed_at - timing.started_at).total_seconds()
+                for timing in (node_result.timing or [])
+                if timing.name == 'compile' and timing.started_at and timing.completed_at
+            ),
+            'message': node_result.message,
+            'relation_name': getattr(node_result.node, 'relation_name', None),
+        }
+        for node_result in results
+    ]
+
+DBT_FAILED_STATUSES = {'error', 'fail', 'runtime error'}
+
+def _ensure_dbt_artifacts(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS dbt_artifacts (
+            name VARCHAR(255) PRIMARY KEY,
+            content BYTEA NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE
+        )
+    """))
+
+def restore_partial_parse(db: DatabaseContext, target_path: Path):
+    """Seed target/ with the partial-parse cache saved by the previous run.
+
+    Render cron instances start from a clean checkout, so without this every
+    run re-parses the whole project. dbt itself discards the cache when the
+    project files or dbt version no longer match.
+    """
+    cache_path = target_path / 'partial_parse.msgpack'
+    if cache_path.exists() or not db.is_postgres:
+        return
+    try:
+        with db.begin() as conn:
+            _ensure_dbt_artifacts(conn)
+            row = conn.execute(text(
+                "SELECT content FROM dbt_artifacts WHERE name = 'partial_parse.msgpack'"
+            )).fetchone()
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not restore dbt partial-parse cache: {str(e)}")
+        return
+    if row:
+        target_path.mkdir(parents=True, exist_ok=True)
+        cache_path.write_bytes(bytes(row[0]))
+        logger.info(f"✅ Restored dbt partial-parse cache ({len(row[0]) / 1024:.0f} KB)")
+
+def save_partial_parse(db: DatabaseContext, target_path: Path):
+    """Persist target/partial_parse.msgpack for the next run."""
+    cache_path = target_path / 'partial_parse.msgpack'
+    if not cache_path.exists() or not db.is_postgres:
+        return
+    try:
+        with db.begin() as conn:
+            _ensure_dbt_artifacts(conn)
+            conn.execute(text("""
+                INSERT INTO dbt_artifacts (name, content, updated_at)
+                VALUES ('partial_parse.msgpack', :content, :now)
+                ON CONFLICT (name) DO UPDATE SET
+                    content = EXCLUDED.content,
+                    updated_at = EXCLUDED.updated_at
+            """), {'content': cache_path.read_bytes(), 'now': datetime.now(timezone.utc)})
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not save dbt partial-parse cache: {str(e)}")
+
+class DbtInvoker:
+    """Runs dbt commands in this process against one parsed manifest.
+
+    The project is parsed once (partially, when a cache from the previous run
+    is available) and the manifest is handed to every later command, so deps,
+    seed and the two run stages no longer each pay dbt's import and parse cost.
+    """
+
+    def __init__(self, base_args: List[str]):
+        from dbt.cli.main import dbtRunner
+        self._runner_class = dbtRunner
+        self.base_args = base_args
+        self.runner = dbtRunner()
+        self.manifest = None
+
+    def invoke(self, args: List[str]):
+        command = args + self.base_args
+        logger.info(f"🔄 Executing: dbt {' '.join(command)}")
+        start = time.perf_counter()
+        res = self.runner.invoke(command)
+        logger.info(f"⏱️ dbt {args[0]} took {time.perf_counter() - start:.1f}s")
+        if res.exception is not None:
+            logger.error(f"dbt {args[0]} raised: {res.exception}")
+        return res
+
+    def parse(self) -> bool:
+        """Parse the project and reuse the manifest for subsequent commands."""
+        res = self.invoke(['parse'])
+        if not res.success or res.result is None:
+            return False
+        self.manifest = res.result
+        self.runner = self._runner_class(manifest=self.manifest)
+        return True
+
+def _ensure_dbt_model_timings(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS dbt_model_timings (
+            unique_id VARCHAR(255) PRIMARY KEY,
+            execution_time DOUBLE PRECISION NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE
+        )
+    """))
+    conn.execute(text("ALTER TABLE dbt_model_timings ADD COLUMN IF NOT EXISTS compile_time DOUBLE PRECISION"))
+
+def record_dbt_model_timings(db: DatabaseContext, timings: Dict[str, float],
+                             compile_times: Optional[Dict[str, float]] = None):
+    """Remember each model's latest build (and compile) time so skipped runs can report savings."""
+    if not timings:
+        return
+    compile_times = compile_times or {}
+    try:
+        with db.begin() as conn:
+            _ensure_dbt_model_timings(conn)
+            for unique_id, execution_time in timings.items():
+                conn.execute(text("""
+                    INSERT INTO dbt_model_timings (unique_id, execution_time, compile_time, updated_at)
+                    VALUES (:unique_id, :execution_time, :compile_time, :now)
+                    ON CONFLICT (unique_id) DO UPDATE SET
+                        execution_time = EXCLUDED.execution_time,
+                        compile_time = COALESCE(EXCLUDED.compile_time, dbt_model_timings.compile_time),
+                        updated_at = EXCLUDED.updated_at
+                """), {
+                    'unique_id': unique_id,
+                    'execution_time': execution_time,
+                    'compile_time': compile_times.get(unique_id),
+                    'now': datetime.now(timezone.utc),
+                })
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not record dbt model timings: {str(e)}")
+
+def report_dbt_compile_times(db: DatabaseContext, compile_times: Dict[str, float],
+                             slower_by: float = 2.0, min_seconds: float = 0.5):
+    """Log this run's model compile time and flag models that compile much slower than last time.
+
+    A model is flagged when it took slower_by times its previous compile time
+    and at least min_seconds longer, so jitter on fast models stays quiet.
+    """
+    if not compile_times:
+        return
+    total = sum(compile_times.values())
+    slowest = sorted(compile_times.items(), key=lambda item: item[1], reverse=True)[:3]
+    logger.info(
+        f"⏱️ dbt compile time: {total:.1f}s across {len(compile_times)} model(s); slowest: "
+        + ', '.join(f"{unique_id.split('.')[-1]} {seconds:.2f}s" for unique_id, seconds in slowest)
+    )
+    try:
+        with db.connect() as conn:
+            _ensure_dbt_model_timings(conn)
+            conn.commit()
+            previous = dict(conn.execute(text(
+                "SELECT unique_id, compile_time FROM dbt_model_timings WHERE compile_time IS NOT NULL"
+            )).fetchall())
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not read previous dbt compile times: {str(e)}")
+        return
+    for unique_id, seconds in sorted(compile_times.items()):
+        before = previous.get(unique_id)
+        if before is not None and seconds >= before * slower_by and seconds - before >= min_seconds:
+            logger.warning(f"⚠️ {unique_id} compiled in {seconds:.2f}s (was {before:.2f}s)")
+
+def report_skipped_dbt_models(db: DatabaseContext, executed: set):
+    """Log the models this run did not build and their last known build time."""
+    try:
+        with db.connect() as conn:
+            _ensure_dbt_model_timings(conn)
+            conn.commit()
+            known = dict(conn.execute(text("SELECT unique_id, execution_time FROM dbt_model_timings")).fetchall())
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not read dbt model timings: {str(e)}")
+        return
+    skipped = sorted(set(known) - executed)
+    if not skipped:
+        return
+    saved = sum(known[unique_id] for unique_id in skipped)
+    logger.info(f"⏭️ Skipped {len(skipped)} dbt model(s), saving ~{saved:.1f}s:")
+    for unique_id in skipped:
+        logger.info(f"   - {unique_id.split('.')[-1]} ({known[unique_id]:.1f}s)")
+
+def seed_checksums(project_root: Path) -> Dict[str, str]:
+    """sha256 of each seed CSV, keyed by seed name."""
+    return {
+        path.stem: hashlib.sha256(path.read_bytes()).hexdigest()
+        for path in sorted((project_root / 'models' / 'seeds').glob('*.csv'))
+    }
+
+def _ensure_dbt_seed_checksums(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS dbt_seed_checksums (
+            seed_name VARCHAR(255) PRIMARY KEY,
+            checksum VARCHAR(64) NOT NULL,
+            execution_time DOUBLE PRECISION NOT NULL,
+            loaded_at TIMESTAMP WITH TIME ZONE
+        )
+    """))
+
+def get_seed_state(db: DatabaseContext) -> Dict[str, Tuple[str, float]]:
+    """Checksum and load time of each seed as last loaded into the warehouse."""
+    try:
+        with db.begin() as conn:
+            _ensure_dbt_seed_checksums(conn)
+            rows = conn.execute(text(
+                "SELECT seed_name, checksum, execution_time FROM dbt_seed_checksums"
+            )).fetchall()
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not read seed checksums: {str(e)}")
+        return {}
+    return {row[0]: (row[1], float(row[2])) for row in rows}
+
+def record_seed_checksums(db: DatabaseContext, checksums: Dict[str, str], timings: Dict[str, float]):
+    """Remember the checksum of each seed dbt just loaded."""
+    if not timings:
+        return
+    try:
+        with db.begin() as conn:
+            _ensure_dbt_seed_checksums(conn)
+            for seed_name, execution_time in timings.items():
+                conn.execute(text("""
+                    INSERT INTO dbt_seed_checksums (seed_name, checksum, execution_time, loaded_at)
+                    VALUES (:seed_name, :checksum, :execution_time, :now)
+                    ON CONFLICT (seed_name) DO UPDATE SET
+                        checksum = EXCLUDED.checksum,
+                        execution_time = EXCLUDED.execution_time,
+                        loaded_at = EXCLUDED.loaded_at
+                """), {
+                    'seed_name': seed_name,
+                    'checksum': checksums[seed_name],
+                    'execution_time': execution_time,
+                    'now': datetime.now(timezone.utc),
+                })
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not record seed checksums: {str(e)}")
+
+def missing_seed_relations(db: DatabaseContext, manifest, seed_names: set) -> set:
+    """Seeds whose table is absent from the warehouse despite a matching checksum."""
+    if manifest is None or not seed_names or not db.is_postgres:
+        return set()
+    missing = set()
+    try:
+        with db.connect() as conn:
+            for node in manifest.nodes.values():
+                if node.resource_type != 'seed' or node.name not in seed_names:
+                    continue
+                relation = conn.execute(
+                    text("SELECT to_regclass(:relation)"),
+                    {'relation': f'"{node.schema}"."{node.alias}"'}
+                ).scalar()
+                if relation is None:
+                    missing.add(node.name)
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not check seed tables, reloading all seeds: {str(e)}")
+        return set(seed_names)
+    return missing
+
+def run_dbt(db: Optional[DatabaseContext] = None, changed_sources: Optional[set] = None):
+    """Run dbt models after successful data ingestion.
+
+    changed_sources is the set of raw_* tables that received inserts or
+    updates (plus any still pending from a failed dbt run). An empty set skips
+    dbt entirely; otherwise only models downstream of those sources are built. None (unknown) builds everything, as do
+    DBT_FULL_REFRESH runs and the daily run in DBT_FULL_RUN_HOUR (UTC), which
+    keeps models that read seeds, manual mappings or current_date fresh.
+    Seeds whose CSV changed (or all of them with DBT_FORCE_SEED) are reloaded
+    and their downstream models rebuilt; unchanged seeds are not reloaded.
+    """
+    db = db or get_db_context()
+    is_render = os.getenv('RENDER') == 'true'
     try:
         logger.info("🔄 Starting dbt run...")
         
-        # Get the project root directory
+        # Report ingestion-stage pool usage, then hand idle connections back to
+        # Postgres so dbt's own threads aren't competing for connection slots.
+        db.log_pool_stats()
+        db.engine.pool.dispose()
+        
+        if changed_sources is not None:
+            # Sources whose downstream models a failed dbt run never rebuilt stay pending
+            changed_sources = merge_pending_sources(db, changed_sources)
+        
+        full_refresh = os.environ.get('DBT_FULL_REFRESH', '').strip().lower() in ('1', 'true', 'yes')
+        full_run_hour = int(os.getenv('DBT_FULL_RUN_HOUR', '8'))
+        full_run = changed_sources is None or full_refresh or datetime.now(timezone.utc).hour == full_run_hour
+        
+        # Seeds are reloaded only when their CSV changed since the last load;
+        # DBT_FORCE_SEED=1 reloads all of them.
         project_root = get_project_root()
-        logger.info(f"Running dbt from: {project_root}")
+        force_seed = os.environ.get('DBT_FORCE_SEED', '').strip().lower() in ('1', 'true', 'yes')
+        seed_files = seed_checksums(project_root)
+        seed_state = get_seed_state(db)
+        changed_seeds = {
+            name for name, checksum in seed_files.items()
+            if force_seed or seed_state.get(name, (None, 0.0))[0] != checksum
+        }
+        
+        if not full_run and not changed_sources and not changed_seeds:
+            logger.info("⏭️ No raw_* source or seed changed during ingestion - skipping dbt")
+            report_skipped_dbt_models(db, executed=set())
+            return True
+        if full_run:
+            logger.info("🔄 Building all dbt models")
+        else:
+            changed = sorted(changed_sources or ()) + sorted(changed_seeds)
+            logger.info(f"🔄 Building only models downstream of: {', '.join(changed)}")
         
-        # Check if we're in Render environment
-        is_render = os.getenv('RENDER') == 'true'
+        # Get the project root directory
+        logger.info(f"Running dbt from: {project_root}")
         
         # Verify dbt project files exist
         dbt_project_path = project_root / 'dbt_project.yml'
@@ -997,118 +2787,120 @@ def run_dbt():
             logger.info("🔄 Running dbt in local environment")
             base_dir_args = []
         
+        # One in-process dbt runner for every step; partial parsing is kept
+        # across cron runs via the warehouse (see restore_partial_parse).
+        target_path = project_root / 'target'
+        restore_partial_parse(db, target_path)
+        dbt = DbtInvoker(base_dir_args)
+        
         # First, install dbt packages if needed
         logger.info("🔄 Step 0: Installing dbt packages...")
-        deps_command = ['dbt', 'deps'] + base_dir_args
-        logger.info(f"🔄 Executing command: {' '.join(deps_command)}")
-        
-        subprocess.run(
-            deps_command,
-            capture_output=True,
-            text=True,
-            check=False,  # Don't fail if packages already installed
-            env=os.environ.copy()
-        )
-        logger.info("✅ dbt deps completed")
+        if (project_root / 'dbt_packages').exists():
+            logger.info("✅ dbt packages already installed")
+        else:
+            dbt.invoke(['deps'])  # Don't fail here; parse reports missing packages
+            logger.info("✅ dbt deps completed")
+        
+        if not dbt.parse():
+            logger.error("❌ dbt parse failed")
+            return False
+        save_partial_parse(db, target_path)
         
         # Load seed data (KPI definitions)
         logger.info("🔄 Step 1: Loading seed data...")
-        seed_command = ['dbt', 'seed'] + base_dir_args
-        logger.info(f"🔄 Executing command: {' '.join(seed_command)}")
-        
-        subprocess.run(
-            seed_command,
-            capture_output=True,
-            text=True,
-            check=False,  # Don't fail if seeds already exist
-            env=os.environ.copy()
-        )
-        logger.info("✅ Seed data loaded")
+        changed_seeds |= missing_seed_relations(db, dbt.manifest, set(seed_files) - changed_seeds)
+        skipped_seeds = sorted(set(seed_files) - changed_seeds)
+        if skipped_seeds:
+            saved = sum(seed_state[name][1] for name in skipped_seeds)
+            logger.info(f"⏭️ {len(skipped_seeds)} seed(s) unchanged, saving ~{saved:.1f}s: {', '.join(skipped_seeds)}")
+        if changed_seeds:
+            res = dbt.invoke(['seed', '--select'] + sorted(changed_seeds))  # Don't fail if seeds already exist
+            record_seed_checksums(db, seed_files, {
+                node['unique_id'].split('.')[-1]: node['execution_time']
+                for node in dbt_node_results(res)
+                if node['status'] == 'success' and node['unique_id'].split('.')[-1] in seed_files
+            })
+            logger.info(f"✅ Seed data loaded: {', '.join(sorted(changed_seeds))}")
         
         # Full-refresh toggle: set DBT_FULL_REFRESH=1 for a run when the fiscal
         # start month changes, so the incremental agg_kpi_dashboard recomputes all
         # historical fiscal buckets onto the new boundary. Unset it afterwards.
-        full_refresh_args = (
-            ['--full-refresh']
-            if os.environ.get('DBT_FULL_REFRESH', '').strip().lower() in ('1', 'true', 'yes')
-            else []
-        )
+        full_refresh_args = ['--full-refresh'] if full_refresh else []
         if full_refresh_args:
             logger.info("🔄 DBT_FULL_REFRESH set - running dbt with --full-refresh")
-
-        # Run dbt in stages to ensure proper build order
-        logger.info("🔄 Step 2: Building staging and marts models...")
-        base_command = ['dbt', 'run'] + base_dir_args + full_refresh_args
-        stage1_command = base_command + ['--exclude', 'kpi.*']
-        logger.info(f"🔄 Executing command: {' '.join(stage1_command)}")
-        
-        result1 = subprocess.run(
-            stage1_command,
-            capture_output=True,
-            text=True,
-            check=True,
-            env=os.environ.copy()
-        )
-        
-        logger.info("✅ Step 2 completed - marts built successfully")
-        logger.debug(f"dbt output: {result1.stdout}")
-        
-        if result1.stderr:
-            logger.warning(f"dbt stderr: {result1.stderr}")
         
-        # Run KPI models after marts are built
-        logger.info("🔄 Step 3: Building KPI models...")
-        stage2_command = base_command + ['--select', 'kpi.*']
-        logger.info(f"🔄 Executing command: {' '.join(stage2_command)}")
-        
-        result2 = subprocess.run(
-            stage2_command,
-            capture_output=True,
-            text=True,
-            check=True,
-            env=os.environ.copy()
-        )
-        
-        logger.info("✅ Step 3 completed - KPI models built successfully")
-        logger.debug(f"dbt output: {result2.stdout}")
+        # Selective runs build the changed sources' descendants only
+        if full_run:
+            stage1_select, stage2_select = [], ['--select', 'kpi.*']
+        else:
+            roots = [f"source:raw.{source}" for source in sorted(changed_sources or ())] + sorted(changed_seeds)
+            stage1_select = ['--select'] + [f"{root}+" for root in roots]
+            stage2_select = ['--select'] + [f"{root}+,kpi.*" for root in roots]
         
-        if result2.stderr:
-            logger.warning(f"dbt stderr: {result2.stderr}")
+        # Run dbt in stages to ensure proper build order
+        stages = [
+            ("Step 2", "staging and marts models", stage1_select + ['--exclude', 'kpi.*']),
+            ("Step 3", "KPI models", stage2_select),
+        ]
+        executed = {}
+        compile_times = {}
+        failed = []
+        for step, description, select_args in stages:
+            logger.info(f"🔄 {step}: Building {description}...")
+            res = dbt.invoke(['run'] + full_refresh_args + select_args)
+            nodes = dbt_node_results(res)
+            models = [node for node in nodes if node['unique_id'].startswith('model.')]
+            executed.update({node['unique_id']: node['execution_time'] for node in models})
+            compile_times.update({node['unique_id']: node['compile_time'] for node in models})
+            stage_failed = [node for node in nodes if node['status'] in DBT_FAILED_STATUSES]
+            for node in stage_failed:
+                logger.error(f"❌ {node['unique_id']} {node['status']}: {node['message']}")
+            failed.extend(stage_failed)
+            
+            if res.success:
+                logger.info(f"✅ {step} completed - {len(nodes)} {description} built successfully")
+            elif not nodes or len(stage_failed) == len(nodes):
+                logger.error(f"❌ {step} failed")
+                break
+            else:
+                logger.warning(f"⚠️ {step} completed with {len(stage_failed)} of {len(nodes)} models failing")
         
-        return True
+        report_dbt_compile_times(db, compile_times)
+        if not failed and res.success:
+            report_skipped_dbt_models(db, executed=set(executed))
+            record_dbt_model_timings(db, executed, compile_times)
+            clear_pending_sources(db)
+            return True
         
-    except subprocess.CalledProcessError as e:
-        logger.error(f"❌ dbt run failed with exit code {e.returncode}")
-        logger.error(f"dbt stdout: {e.stdout}")
-        logger.error(f"dbt stderr: {e.stderr}")
+        record_dbt_model_timings(db, {
+            unique_id: seconds for unique_id, seconds in executed.items()
+            if unique_id not in {node['unique_id'] for node in failed}
+        }, compile_times)
         
         # Provide specific guidance for different error types
-        if is_render and "profiles-dir" in str(e.stderr):
+        messages = ' '.join(str(node['message']) for node in failed) + f" {res.exception or ''}"
+        if is_render and "profiles-dir" in messages:
             logger.error("💡 Render dbt profiles issue detected. Make sure:")
             logger.error("   1. Your profiles.yml file is in the project root")
             logger.error("   2. The profiles.yml contains the correct database connection")
             logger.error("   3. All required environment variables are set in Render")
-        elif "dbt_project.yml" in str(e.stdout) or "dbt_project.yml" in str(e.stderr):
-            logger.error("💡 dbt_project.yml not found. Make sure:")
-            logger.error("   1. The dbt_project.yml file is in the project root")
-            logger.error("   2. The working directory is correct")
-            logger.error("   3. All dbt files are properly deployed to Render")
-        elif "MERGE command cannot affect row a second time" in str(e.stdout):
+        elif "MERGE command cannot affect row a second time" in messages:
             logger.error("💡 PostgreSQL MERGE conflict detected. This usually means:")
             logger.error("   1. Duplicate keys in source data")
             logger.error("   2. Incorrect unique_key configuration in dbt models")
             logger.error("   3. Need to update model unique_key to handle multiple rows")
             logger.error("   Check the failing models and update their unique_key configuration")
-        elif "ERROR" in str(e.stdout) and "PASS=" in str(e.stdout):
-            # Partial success - some models failed but others succeeded
+        elif failed and len(executed) > len(failed):
+            # Partial success - some models failed but others succeeded. Pending
+            # sources are kept so the next run retries the failed models.
             logger.warning("⚠️ dbt completed with some errors but partial success")
             logger.warning("   This is often acceptable for incremental models with data issues")
             logger.warning("   Consider this a successful run unless critical models failed")
             return True  # Treat partial success as success
         
         return False
-    except FileNotFoundError:
-        logger.error("❌ dbt command not found. Please ensure dbt is installed and available in PATH")
+    except ImportError:
+        logger.error("❌ dbt is not importable. Please ensure dbt-core and dbt-postgres are installed")
         if is_render:
             logger.error("💡 In Render, make sure dbt is listed in your requirements.txt or build script")
         return False
@@ -1116,56 +2908,107 @@ def run_dbt():
         logger.error(f"❌ Unexpected error during dbt run: {str(e)}")
         return False
 
-def cleanup_duplicate_records(table_name: str):
-    """Clean up duplicate records from a table by keeping the most recent record for each ID."""
+def cleanup_duplicate_records(table_name: str, batch_size: int = 5000, dry_run: bool = False,
+                              pause_seconds: float = 0.0):
+    """Delete duplicate rows from a table, keeping the most recent record for each ID.
+
+    Online and batched: one read-only pass finds the losing duplicates (all but
+    the latest last_processed_at per id) by ctid, then each batch of batch_size
+    is deleted by ctid in its own short transaction with a lock_timeout, so only
+    the losers become dead tuples and the hourly cron can keep writing. A row
+    is only deleted while its ctid still holds the scanned id and
+    last_processed_at. pause_seconds sleeps between batches; dry_run reports
+    the estimate without deleting. Logs throughput and the locks each batch held.
+    """
     try:
-        logger.info(f"🧹 Cleaning up duplicate records in {table_name}...")
-        
-        engine = create_database_engine()
-        with engine.connect() as conn:
-            # Get count of duplicates
-            duplicate_count_sql = f"""
-                SELECT COUNT(*) - COUNT(DISTINCT id) as duplicate_count 
-                FROM {table_name}
-            """
-            duplicate_count = conn.execute(text(duplicate_count_sql)).scalar()
-            
-            if duplicate_count == 0:
-                logger.info(f"✅ No duplicate records found in {table_name}")
-                return True
-            
-            logger.info(f"Found {duplicate_count} duplicate records in {table_name}")
-            
-            # Create a temporary table with deduplicated data
-            temp_table = f"temp_{table_name}_dedup"
-            dedup_sql = f"""
-                CREATE TEMP TABLE {temp_table} AS
-                SELECT DISTINCT ON (id) *
-                FROM {table_name}
-                ORDER BY id, last_processed_at DESC
-            """
-            conn.execute(text(dedup_sql))
-            
-            # Count records in temp table
-            temp_count = conn.execute(text(f"SELECT COUNT(*) FROM {temp_table}")).scalar()
-            
-            # Delete all records from original table
-            conn.execute(text(f"DELETE FROM {table_name}"))
-            
-            # Insert deduplicated records back
-            insert_sql = f"""
-                INSERT INTO {table_name}
-                SELECT * FROM {temp_table}
-            """
-            conn.execute(text(insert_sql))
-            conn.commit()
-            
-            # Drop temp table
-            conn.execute(text(f"DROP TABLE {temp_table}"))
-            conn.commit()
-            
-            logger.info(f"✅ Successfully cleaned up {table_name}: {duplicate_count} duplicates removed, {temp_count} unique records retained")
+        logger.info(f"🧹 Cleaning up duplicate records in {table_name}{' (dry run)' if dry_run else ''}...")
+        
+        db = get_db_context()
+        if not db.is_postgres:
+            logger.error("❌ Duplicate cleanup requires PostgreSQL (ctid batches)")
+            return False
+        
+        started = time.perf_counter()
+        with db.connect() as conn:
+            losers = conn.execute(text(f"""
+                SELECT row_ctid::text, id::text, row_bytes, last_processed_at
+                FROM (
+                    SELECT t.ctid AS row_ctid, t.id, pg_column_size(t.*) AS row_bytes, t.last_processed_at,
+                           row_number() OVER (
+                               PARTITION BY id ORDER BY last_processed_at DESC NULLS LAST, ctid DESC
+                           ) AS rn
+                    FROM {table_name} t
+                ) ranked
+                WHERE rn > 1
+            """)).fetchall()
+            total_rows = conn.execute(text(f"SELECT COUNT(*) FROM {table_name}")).scalar()
+            conn.rollback()
+        scan_seconds = time.perf_counter() - started
+        
+        if not losers:
+            logger.info(f"✅ No duplicate records found in {table_name} (scanned {total_rows} rows in {scan_seconds:.1f}s)")
+            return True
+        
+        duplicate_ids = len({row[1] for row in losers})
+        batches = (len(losers) + batch_size - 1) // batch_size
+        logger.info(
+            f"Found {len(losers)} duplicate records across {duplicate_ids} ids in {table_name} "
+            f"({total_rows} rows, ~{sum(row[2] for row in losers) / 1024 / 1024:.1f} MB to delete, "
+            f"{batches} batches of {batch_size}; scan took {scan_seconds:.1f}s)"
+        )
+        if dry_run:
             return True
+        
+        deleted = 0
+        longest_batch = 0.0
+        started = time.perf_counter()
+        for offset in range(0, len(losers), batch_size):
+            batch = losers[offset:offset + batch_size]
+            batch_started = time.perf_counter()
+            with db.begin() as conn:
+                conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+                # Each ctid must still hold the scanned (id, last_processed_at): a slot
+                # reused since the scan, including by a newer version of the same id,
+                # is left alone
+                result = conn.execute(text(f"""
+                    DELETE FROM {table_name} t
+                    USING unnest(
+                        CAST(:ctids AS tid[]), CAST(:ids AS text[]), CAST(:stamps AS timestamptz[])
+                    ) AS loser(row_ctid, id, last_processed_at)
+                    WHERE t.ctid = ANY(CAST(:ctids AS tid[]))
+                      AND t.ctid = loser.row_ctid
+                      AND t.id::text = loser.id
+                      AND t.last_processed_at IS NOT DISTINCT FROM loser.last_processed_at
+                """), {
+                    'ctids': [row[0] for row in batch],
+                    'ids': [row[1] for row in batch],
+                    'stamps': [row[3] for row in batch],
+                })
+                locks = conn.execute(text("""
+                    SELECT relation::regclass::text || ' ' || mode
+                    FROM pg_locks
+                    WHERE pid = pg_backend_pid() AND locktype = 'relation' AND relation IS NOT NULL
+                    ORDER BY 1
+                """)).scalars().all()
+            batch_seconds = time.perf_counter() - batch_started
+            longest_batch = max(longest_batch, batch_seconds)
+            deleted += result.rowcount
+            logger.info(
+                f"Batch {offset // batch_size + 1}/{batches}: deleted {result.rowcount} in {batch_seconds:.2f}s "
+                f"({result.rowcount / batch_seconds:,.0f} rows/sec), locks held: {', '.join(locks) or 'none'}"
+            )
+            if pause_seconds:
+                time.sleep(pause_seconds)
+        
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"✅ Successfully cleaned up {table_name}: {deleted} duplicates removed in {elapsed:.1f}s "
+            f"({deleted / elapsed:,.0f} rows/sec, longest lock hold {longest_batch:.2f}s), "
+            f"{total_rows - deleted} records retained"
+        )
+        if deleted < len(losers):
+            logger.warning(f"{len(losers) - deleted} duplicates changed since the scan and were left; run the cleanup again")
+        return True
             
     except Exception as e:
         logger.error(f"❌ Error cleaning up {table_name}: {str(e)}")
@@ -1200,8 +3043,9 @@ def test_tock_integration():
             latest_guest_url = tock_client.get_latest_guest_url(guest_urls)
             logger.info(f"Latest guest URL: {latest_guest_url[:100]}...")
             
-            sample_guest_data = tock_client.fetch_json_data(latest_guest_url)
-            logger.info(f"✅ Successfully fetched {len(sample_guest_data)} guest records from latest file")
+            with tock_client.download_export_file(latest_guest_url) as (body, _, _):
+                sample_guest_data = next(tock_client.iter_record_chunks(body), [])
+            logger.info(f"✅ Successfully fetched {len(sample_guest_data)} guest records from the first chunk of the latest file")
             
             if sample_guest_data:
                 # Test upsert with sample data
@@ -1214,8 +3058,9 @@ def test_tock_integration():
             latest_reservation_url = tock_client.get_latest_reservation_url(reservation_urls)
             logger.info(f"Latest reservation URL: {latest_reservation_url[:100]}...")
             
-            sample_reservation_data = tock_client.fetch_json_data(latest_reservation_url)
-            logger.info(f"✅ Successfully fetched {len(sample_reservation_data)} reservation records from latest file")
+            with tock_client.download_export_file(latest_reservation_url) as (body, _, _):
+                sample_reservation_data = next(tock_client.iter_record_chunks(body), [])
+            logger.info(f"✅ Successfully fetched {len(sample_reservation_data)} reservation records from the first chunk of the latest file")
             
             if sample_reservation_data:
                 # Test upsert with sample data
@@ -1224,8 +3069,8 @@ def test_tock_integration():
                 logger.info("✅ Reservation data upsert test completed")
         
         # Verify the data was inserted correctly
-        engine = create_database_engine()
-        with engine.connect() as conn:
+        db = get_db_context()
+        with db.connect() as conn:
             # Check guest data
             guest_count = conn.execute(text("SELECT COUNT(*) FROM raw_tock_guest")).scalar()
             logger.info(f"✅ Total guest records in database: {guest_count}")
@@ -1280,8 +3125,8 @@ def test_upsert():
         logger.info("Test upsert completed successfully")
         
         # Verify the data was inserted correctly
-        engine = create_database_engine()
-        with engine.connect() as conn:
+        db = get_db_context()
+        with db.connect() as conn:
             result = conn.execute(text("SELECT COUNT(*) FROM raw_club_membership")).scalar()
             logger.info(f"Total records in database: {result}")
             
@@ -1297,6 +3142,231 @@ def test_upsert():
         logger.error(f"Error during test upsert: {str(e)}", exc_info=True)
         raise
 
+def benchmark_bulk_load(rows: int = 20000):
+    """Compare rows/sec of the COPY loader against the pandas to_sql path.
+
+    Run against a local/scratch Postgres (DATABASE_URL); uses and drops raw_benchmark_load.
+    """
+    db = get_db_context()
+    if not db.is_postgres:
+        logger.error("❌ Bulk load benchmark requires PostgreSQL (COPY is not available on SQLite)")
+        return False
+    
+    db_table = 'benchmark_load'
+    current_time = datetime.now(timezone.utc)
+    
+    def build_frame(revision: int) -> pd.DataFrame:
+        records = [{
+            'id': f"bench-{i}",
+            'updatedAt': current_time.isoformat(),
+            'orderNumber': i,
+            'channel': 'Web',
+            'total': i * 100 + revision,
+            'items': [{'sku': f"SKU{i % 50}", 'quantity': 1 + i % 6, 'price': 2500}],
+            'notes': 'line one\nline "two", with comma'
+        } for i in range(rows)]
+        df = pd.DataFrame([{
+            'id': record['id'],
+            'last_processed_at': current_time,
+            'content_hash': record_content_hash(record),
+            'data': json.dumps(record)
+        } for record in records])
+        df['_airbyte_ab_id'] = pd.util.hash_pandas_object(df).astype(str)
+        df['_airbyte_emitted_at'] = current_time
+        df['_airbyte_normalized_at'] = current_time
+        df['_airbyte_' + db_table + '_hashid'] = pd.util.hash_pandas_object(df).astype(str)
+        return df
+    
+    original, changed = build_frame(0), build_frame(1)
+    results = {}
+    try:
+        with db.connect() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS raw_{db_table}"))
+            ensure_raw_table(db, conn, db_table)
+            conn.commit()
+        
+        for method in ('to_sql', 'copy'):
+            # Cold insert, unchanged reload (hash-skipped) and full-conflict update
+            with db.connect() as conn:
+                conn.execute(text(f"TRUNCATE raw_{db_table}"))
+                conn.commit()
+            passes = {
+                'insert': load_raw_batch(db, db_table, original, method=method),
+                'unchanged': load_raw_batch(db, db_table, original, method=method),
+                'update': load_raw_batch(db, db_table, changed, method=method),
+            }
+            results[method] = {name: rows / result['seconds'] for name, result in passes.items()}
+            logger.info(f"📊 {method}: " + ", ".join(
+                f"{name} {rate:,.0f} rows/sec" for name, rate in results[method].items()
+            ))
+        
+        speedup = results['copy']['insert'] / results['to_sql']['insert']
+        logger.info(f"🎉 COPY loader is {speedup:.1f}x the to_sql path for {rows:,} rows")
+        return True
+    finally:
+        with db.connect() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS raw_{db_table}"))
+            conn.commit()
+
+def test_raw_index_plans():
+    """EXPLAIN the raw_* watermark and incremental queries and check each uses an index.
+
+    Sequential scans are disabled for the session, so a plan without an index
+    node means no index can answer the query, not that the table is small.
+    The captured plans are logged.
+    """
+    load_environment()
+    db = get_db_context()
+    if not db.is_postgres:
+        logger.error("❌ Raw index plan check requires PostgreSQL")
+        return False
+    
+    commerce7_tables = [endpoint.replace('-', '_') for endpoint in COMMERCE7_ENDPOINTS]
+    tock_tables = [endpoint.replace('-', '_') for endpoint in TOCK_ENDPOINTS]
+    since = "now() - interval '1 day'"
+    queries = {}
+    for db_table in commerce7_tables:
+        queries[f"raw_{db_table} watermark"] = f"SELECT MAX(raw_updated_at(data)) FROM raw_{db_table}"
+    for db_table in tock_tables:
+        queries[f"raw_{db_table} watermark"] = f"SELECT MAX(last_processed_at) FROM raw_{db_table}"
+    for db_table in commerce7_tables + tock_tables:
+        queries[f"raw_{db_table} incremental"] = f"SELECT id, data FROM raw_{db_table} WHERE last_processed_at > {since}"
+        for spec in TYPED_LANDING_TABLES.get(db_table, [])[:1]:
+            queries[f"{spec['table']} incremental"] = f"SELECT * FROM {spec['table']} WHERE last_processed_at > {since}"
+    
+    passed = True
+    with db.connect() as conn:
+        for db_table in commerce7_tables + tock_tables:
+            ensure_raw_table(db, conn, db_table)
+        conn.commit()
+        conn.execute(text("SET enable_seqscan = off"))
+        for name, sql in queries.items():
+            plan = "\n".join(conn.execute(text(f"EXPLAIN {sql}")).scalars().all())
+            uses_index = 'Index' in plan
+            passed = passed and uses_index
+            logger.info(f"{'✅' if uses_index else '❌'} {name}:\n{plan}")
+        conn.execute(text("RESET enable_seqscan"))
+    
+    if passed:
+        logger.info("🎉 Every raw_* watermark and incremental query is index-backed")
+    else:
+        logger.error("❌ Some raw_* queries have no usable index, see plans above")
+    return passed
+
+def test_work_queue(workers: int = 3, jobs: int = 30):
+    """Drain a scratch queue of no-op jobs with several worker processes.
+
+    Run against a local/scratch Postgres (DATABASE_URL). Passes when every job
+    finished exactly once, more than one worker took part, and an endpoint
+    advisory lock held by one connection refuses a second one. The scratch
+    jobs are deleted afterwards.
+    """
+    load_environment()
+    db = get_db_context()
+    if not db.is_postgres:
+        logger.error("❌ Work queue test requires PostgreSQL")
+        return False
+    
+    queue_name = f"test_{RUN_ID[:8]}"
+    try:
+        enqueue_ingest_jobs(db, [
+            {'endpoint': WORK_QUEUE_PROBE, 'export_file': f"probe-{i}"} for i in range(jobs)
+        ], queue_name)
+        
+        started = time.perf_counter()
+        processes = [
+            subprocess.Popen([sys.executable, str(Path(__file__).resolve()), '--worker', queue_name])
+            for _ in range(workers)
+        ]
+        exit_codes = [process.wait() for process in processes]
+        elapsed = time.perf_counter() - started
+        
+        with db.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT status, attempts, worker FROM ingest_jobs WHERE queue = :queue"
+            ), {'queue': queue_name}).fetchall()
+        done_once = len(rows) == jobs and all(row[0] == 'done' and row[1] == 1 for row in rows)
+        per_worker = {}
+        for row in rows:
+            per_worker[row[2]] = per_worker.get(row[2], 0) + 1
+        logger.info(
+            f"{'✅' if done_once else '❌'} {len(rows)} job(s) drained by {workers} worker(s) in {elapsed:.1f}s, "
+            f"exit codes {exit_codes}, jobs per worker: {sorted(per_worker.values(), reverse=True)}"
+        )
+        
+        with advisory_lock(db, ADVISORY_LOCK_ENDPOINT, WORK_QUEUE_PROBE) as first:
+            with advisory_lock(db, ADVISORY_LOCK_ENDPOINT, WORK_QUEUE_PROBE) as second:
+                exclusive = first and not second
+        logger.info(f"{'✅' if exclusive else '❌'} Endpoint advisory lock refuses an overlapping run")
+        
+        passed = done_once and len(per_worker) > 1 and exclusive and all(code == 0 for code in exit_codes)
+        if passed:
+            logger.info("🎉 Work queue shared jobs across workers without duplicates")
+        else:
+            logger.error("❌ Work queue test failed")
+        return passed
+    finally:
+        with db.begin() as conn:
+            conn.execute(text("DELETE FROM ingest_jobs WHERE queue = :queue"), {'queue': queue_name})
+
+REVENUE_KPI_MODELS = ['agg_revenue_kpis', 'agg_revenue_monthly_kpis', 'agg_revenue_quarterly_kpis']
+
+def check_revenue_kpi_parity():
+    """Build the revenue KPI marts alongside their legacy implementations and compare.
+
+    Enables models/marts/legacy (the one-subquery-per-metric versions), builds
+    both sides, runs the dbt_utils.equality tests between them and logs each
+    side's build time. The legacy tables are dropped afterwards.
+    """
+    load_environment()
+    db = get_db_context()
+    project_root = get_project_root()
+    os.chdir(project_root)
+    base_dir_args = ['--profiles-dir', '.', '--project-dir', '.'] if os.getenv('RENDER') == 'true' else []
+    
+    # The var changes which models are enabled, so this parses its own manifest
+    dbt = DbtInvoker(base_dir_args)
+    res = dbt.invoke([
+        'build',
+        '--select', 'fct_revenue_daily', *REVENUE_KPI_MODELS, 'path:models/marts/legacy',
+        '--vars', '{revenue_kpi_parity: true}',
+    ])
+    results = dbt_node_results(res)
+    nodes = {
+        node['unique_id'].split('.')[-1]: node
+        for node in results if node['unique_id'].startswith('model.')
+    }
+    
+    try:
+        shared = nodes.get('fct_revenue_daily', {}).get('execution_time', 0.0)
+        logger.info(f"⏱️ fct_revenue_daily: {shared:.2f}s (shared by all three marts)")
+        for model in REVENUE_KPI_MODELS:
+            before = nodes.get(f"{model}_legacy", {}).get('execution_time')
+            after = nodes.get(model, {}).get('execution_time')
+            if before is None or after is None:
+                logger.error(f"❌ {model}: not built, see dbt output")
+                continue
+            logger.info(f"⏱️ {model}: legacy {before:.2f}s -> {after:.2f}s")
+        
+        tests = [node for node in results if node['unique_id'].startswith('test.') and 'dbt_utils_equality' in node['unique_id']]
+        for node in tests:
+            logger.info(f"{'✅' if node['status'] == 'pass' else '❌'} {node['unique_id']}: {node['status']}")
+        passed = res.success and len(tests) == len(REVENUE_KPI_MODELS) and all(
+            node['status'] == 'pass' for node in tests
+        )
+        if passed:
+            logger.info("🎉 Revenue KPI marts match their legacy implementations")
+        else:
+            logger.error("❌ Revenue KPI parity check failed")
+        return passed
+    finally:
+        with db.connect() as conn:
+            for model in REVENUE_KPI_MODELS:
+                relation_name = nodes.get(f"{model}_legacy", {}).get('relation_name')
+                if relation_name:
+                    conn.execute(text(f"DROP TABLE IF EXISTS {relation_name}"))
+            conn.commit()
+
 if __name__ == '__main__':
     if len(sys.argv) > 1:
         if sys.argv[1] == '--test':
@@ -1305,12 +3375,29 @@ if __name__ == '__main__':
             test_tock_integration()
         elif sys.argv[1] == '--test-connection':
             test_database_connection()
-        elif sys.argv[1] == '--cleanup-tock-reservation':
-            load_environment()
-            cleanup_duplicate_records('raw_tock_reservation')
-        elif sys.argv[1] == '--cleanup-tock-guest':
+        elif sys.argv[1] == '--benchmark-load':
+            benchmark_bulk_load(int(sys.argv[2]) if len(sys.argv) > 2 else 20000)
+        elif sys.argv[1] == '--test-raw-indexes':
+            sys.exit(0 if test_raw_index_plans() else 1)
+        elif sys.argv[1] == '--worker':
+            sys.exit(0 if run_worker(sys.argv[2] if len(sys.argv) > 2 else WORK_QUEUE_DEFAULT) else 1)
+        elif sys.argv[1] == '--enqueue-backfill':
+            # --enqueue-backfill <endpoint> [since YYYY-MM-DD] [until YYYY-MM-DD]
+            dates = [datetime.fromisoformat(arg).replace(tzinfo=timezone.utc) for arg in sys.argv[3:5]]
+            enqueue_backfill(sys.argv[2], *dates)
+        elif sys.argv[1] == '--test-work-queue':
+            sys.exit(0 if test_work_queue(int(sys.argv[2]) if len(sys.argv) > 2 else 3) else 1)
+        elif sys.argv[1] == '--revenue-kpi-parity':
+            sys.exit(0 if check_revenue_kpi_parity() else 1)
+        elif sys.argv[1] in ('--cleanup-tock-reservation', '--cleanup-tock-guest'):
+            # [--dry-run] [--batch-size N] [--pause-seconds S]
             load_environment()
-            cleanup_duplicate_records('raw_tock_guest')
+            options = {'dry_run': '--dry-run' in sys.argv}
+            if '--batch-size' in sys.argv:
+                options['batch_size'] = int(sys.argv[sys.argv.index('--batch-size') + 1])
+            if '--pause-seconds' in sys.argv:
+                options['pause_seconds'] = float(sys.argv[sys.argv.index('--pause-seconds') + 1])
+            cleanup_duplicate_records(sys.argv[1].replace('--cleanup-', 'raw_').replace('-', '_'), **options)
         else:
             main(sys.argv[1])  # Run with specific endpoint
     else:
@@ -10,22 +10,54 @@
   the start month, so no model needs to hardcode July again.
 
   The expression macros accept an optional `s` (start month) so a model can
-  resolve it once and pass it to every call, avoiding repeated config lookups.
+  resolve it once and pass it to every call. fiscal_start_month() itself runs
+  its config lookup at most once per dbt invocation and serves later calls from a
+  cache; report_fiscal_start_month_cache() (on-run-end) logs the queries saved.
 -#}
 
+{#- Per-invocation cache. `graph` is the one object every node's compile
+    context shares, so the resolved month is parked under a private key. -#}
+{% macro _fiscal_start_month_cache() %}
+  {%- if '_fiscal_start_month_cache' not in graph -%}
+    {%- do graph.update({'_fiscal_start_month_cache': {'value': none, 'queries': 0, 'hits': 0, 'saved': 0}}) -%}
+  {%- endif -%}
+  {{ return(graph['_fiscal_start_month_cache']) }}
+{% endmacro %}
+
 {% macro fiscal_start_month() %}
   {%- set default_month = var('fiscal_start_month', 7) | int -%}
-  {%- if execute -%}
-    {%- set cfg_relation = var('raw_schema', 'public') ~ '.dashboard_fiscal_config' -%}
-    {%- set exists_res = run_query("select to_regclass('" ~ cfg_relation ~ "') is not null as tbl_exists") -%}
-    {%- if exists_res and exists_res.rows | length > 0 and exists_res.rows[0][0] -%}
-      {%- set val_res = run_query('select fiscal_start_month from ' ~ cfg_relation ~ ' order by id limit 1') -%}
-      {%- if val_res and val_res.rows | length > 0 and val_res.rows[0][0] is not none -%}
-        {{ return(val_res.rows[0][0] | int) }}
-      {%- endif -%}
+  {%- if not execute -%}
+    {{ return(default_month) }}
+  {%- endif -%}
+  {%- set cache = _fiscal_start_month_cache() -%}
+  {%- if cache['value'] is not none -%}
+    {%- do cache.update({'hits': cache['hits'] + 1, 'saved': cache['saved'] + cache['queries']}) -%}
+    {{ return(cache['value']) }}
+  {%- endif -%}
+  {%- set month = namespace(value=default_month, queries=1) -%}
+  {%- set cfg_relation = var('raw_schema', 'public') ~ '.dashboard_fiscal_config' -%}
+  {%- set exists_res = run_query("select to_regclass('" ~ cfg_relation ~ "') is not null as tbl_exists") -%}
+  {%- if exists_res and exists_res.rows | length > 0 and exists_res.rows[0][0] -%}
+    {%- set val_res = run_query('select fiscal_start_month from ' ~ cfg_relation ~ ' order by id limit 1') -%}
+    {%- set month.queries = 2 -%}
+    {%- if val_res and val_res.rows | length > 0 and val_res.rows[0][0] is not none -%}
+      {%- set month.value = val_res.rows[0][0] | int -%}
     {%- endif -%}
   {%- endif -%}
-  {{ return(default_month) }}
+  {%- do cache.update({'value': month.value, 'queries': month.queries}) -%}
+  {{ return(month.value) }}
+{% endmacro %}
+
+
+{#- on-run-end: how often fiscal_start_month() was served from its cache. -#}
+{% macro report_fiscal_start_month_cache() %}
+  {%- if execute and '_fiscal_start_month_cache' in graph -%}
+    {%- set cache = graph['_fiscal_start_month_cache'] -%}
+    {%- do log(
+          'fiscal_start_month() resolved to ' ~ cache['value'] ~ ' with ' ~ cache['queries'] ~ ' query(ies); '
+          ~ cache['hits'] ~ ' cached call(s) saved ' ~ cache['saved'] ~ ' compile-time query(ies)',
+          info=True) -%}
+  {%- endif -%}
 {% endmacro %}
 
 
@@ -0,0 +1,111 @@
+{#-
+  QuickBooks sales-receipt exports (models/fin_ref/agg_*).
+
+  Every export is one (class_code, ref_number suffix) bucket of
+  fct_qb_line_item, full price or discounted. qb_exports() is the single list
+  of buckets: fct_qb_line_item tags each line with its bucket, and
+  qb_export_lines() renders the per-export view from it.
+
+  kind 'fulfilled' exports fulfilled-in-month lines on the fulfilled month end;
+  kind 'unfulfilled' exports non-refunded lines on the paid month end.
+-#}
+
+{% macro qb_exports() %}
+  {{ return({
+      'club_walk_out':       {'customer': 'Club Pickup & Carry Out',    'class_code': '54 Wine Club', 'ref': '1',  'kind': 'fulfilled'},
+      'club_ship_ca':        {'customer': 'Club Ship CA',               'class_code': '54 Wine Club', 'ref': '2',  'kind': 'fulfilled'},
+      'club_ship_non_ca':    {'customer': 'Club Ship Non CA',           'class_code': '54 Wine Club', 'ref': '3',  'kind': 'fulfilled'},
+      'club_unfulfilled':    {'customer': 'Club Unfulfilled',           'class_code': '54 Wine Club', 'ref': '4',  'kind': 'unfulfilled'},
+      'inbound_walk_out':    {'customer': 'Inbound Pickup & Carry Out', 'class_code': '43 Inbound',   'ref': '5',  'kind': 'fulfilled'},
+      'inbound_ship_ca':     {'customer': 'Inbound Ship CA',            'class_code': '43 Inbound',   'ref': '6',  'kind': 'fulfilled'},
+      'inbound_ship_non_ca': {'customer': 'Inbound Ship Non CA',        'class_code': '43 Inbound',   'ref': '7',  'kind': 'fulfilled'},
+      'inbound_unfulfilled': {'customer': 'Inbound Unfulfilled',        'class_code': '43 Inbound',   'ref': '8',  'kind': 'unfulfilled'},
+      'web_walk_out':        {'customer': 'Web Pickup & Carry Out',     'class_code': '56 Ecommerce', 'ref': '9',  'kind': 'fulfilled'},
+      'web_ship_ca':         {'customer': 'Web Ship CA',                'class_code': '56 Ecommerce', 'ref': '10', 'kind': 'fulfilled'},
+      'web_ship_non_ca':     {'customer': 'Web Ship Non CA',            'class_code': '56 Ecommerce', 'ref': '11', 'kind': 'fulfilled'},
+      'web_unfulfilled':     {'customer': 'Web Unfulfilled',            'class_code': '56 Ecommerce', 'ref': '12', 'kind': 'unfulfilled'},
+      'pos_walk_out':        {'customer': 'POS Pickup & Carry Out',     'class_code': '50 TR',        'ref': '13', 'kind': 'fulfilled'},
+      'pos_ship_ca':         {'customer': 'POS Ship CA',                'class_code': '50 TR',        'ref': '14', 'kind': 'fulfilled'},
+      'pos_ship_non_ca':     {'customer': 'POS Ship Non CA',            'class_code': '50 TR',        'ref': '15', 'kind': 'fulfilled'},
+      'pos_unfulfilled':     {'customer': 'POS Unfulfilled',            'class_code': '50 TR',        'ref': '16', 'kind': 'unfulfilled'},
+      'event_fee':           {'customer': 'Event Fee',                  'class_code': '55 Events',    'ref': '17', 'kind': 'fulfilled'},
+      'event_wine':          {'customer': 'Event Wine',                 'class_code': '55 Events',    'ref': '18', 'kind': 'fulfilled'},
+  }) }}
+{% endmacro %}
+
+
+{#- The export bucket (qb_exports() key) a stg_qb_format_base line belongs to, or null. -#}
+{% macro qb_export_case(class_code_col='class_code', ref_number_col='ref_number') %}
+  case
+    {%- for name, export in qb_exports().items() %}
+    when {{ class_code_col }} = '{{ export.class_code }}' and {{ ref_number_col }} like '%.{{ export.ref }}' then '{{ name }}'
+    {%- endfor %}
+  end
+{%- endmacro %}
+
+
+{#- One QuickBooks export, aggregated from its fct_qb_line_item bucket. -#}
+{% macro qb_export_lines(name, discounted=false) %}
+{%- set export = qb_exports()[name] -%}
+{%- set date_col = 'month_end_date_paid' if export.kind == 'unfulfilled' else 'month_end_date_fulfilled' -%}
+{%- set price_col = 'extrapolated_price_discounted' if discounted else 'extrapolated_price' -%}
+with monthly_data as (
+    select
+        month_end_date_fulfilled,
+        month_end_date_paid,
+        sku,
+        {%- if not discounted %}
+        extrapolated_price,
+        {%- endif %}
+        product_subtotal,
+        case_size,
+        unit_of_measure,
+        ref_number,
+        class_code,
+        quantity
+        {%- if discounted %},
+        unit_price_from_order,
+        (unit_price_from_order * case_size) as extrapolated_price_discounted
+        {%- endif %}
+    from {{ ref('fct_qb_line_item') }}
+    where qb_export = '{{ name }}'
+        and case_size is not null
+        and case_size > 0
+        {%- if export.kind == 'fulfilled' %}
+        and in_month = true
+        {%- endif %}
+        and product_subtotal != 0
+        and is_full_price = {{ 'false' if discounted else 'true' }}
+        {%- if export.kind == 'unfulfilled' %}
+        and is_refunded = false
+        {%- endif %}
+)
+select
+    '{{ export.customer }}' as customer,
+    {{ date_col }} as transaction_date,
+    max(ref_number) as ref_number,
+    max(class_code) as class_code,
+    sku as item,
+    {{ price_col }}::money as price,
+    round(sum(quantity)::numeric / max(case_size)::numeric, 5) as quantity,
+    unit_of_measure,
+    {%- if discounted %}
+    unit_price_from_order,
+    extrapolated_price_discounted::money as extrapolated_price_discounted,
+    {%- endif %}
+    '11300' as deposit_to
+from monthly_data
+{%- if export.kind == 'fulfilled' %}
+where month_end_date_fulfilled = month_end_date_paid
+{%- endif %}
+group by
+    {{ date_col }},
+    sku,
+    {%- if discounted %}
+    unit_price_from_order,
+    {%- endif %}
+    {{ price_col }},
+    unit_of_measure
+having round(sum(quantity)::numeric / max(case_size)::numeric, 5) != 0
+order by {{ date_col }} desc, sku
+{%- endmacro %}
@@ -9,7 +9,7 @@ with monthly_data as (
         month_name,
         product_subtotal,
         class_code
-    from {{ ref('stg_qb_format_base') }}
+    from {{ ref('fct_qb_line_item') }}
     where in_month = false
         and month_end_date_fulfilled is not null
         and is_refunded = false
@@ -13,7 +13,7 @@ with monthly_data as (
         nca.no_charge_account,
         nca.no_charge_class,
         nca.no_charge_gl
-    from {{ ref('stg_qb_format_base') }} as qb
+    from {{ ref('fct_qb_line_item') }} as qb
     inner join {{ ref('stg_no_charge_accounts') }} as nca
         on qb.customer_id = nca.customer_id
     where qb.in_month = true
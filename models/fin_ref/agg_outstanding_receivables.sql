@@ -13,7 +13,7 @@ with monthly_data as (
         quantity,
         month_name,
         is_refunded
-    from {{ ref('stg_qb_format_base') }}
+    from {{ ref('fct_qb_line_item') }}
     where fulfilled_date is null
         and quantity > 0
         and product_subtotal != 0
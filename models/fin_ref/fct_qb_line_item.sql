@@ -0,0 +1,43 @@
+{{ config(
+    materialized='incremental',
+    unique_key='order_item_id',
+    incremental_strategy='merge',
+    on_schema_change='append_new_columns',
+    indexes=[
+        {'columns': ['order_item_id'], 'unique': True},
+        {'columns': ['qb_export']}
+    ],
+    post_hook=[
+        "delete from {{ this }} q
+         using {{ ref('fct_order_item') }} oi
+         where oi.order_item_id = q.order_item_id
+           and (oi.external_order_vendor is not null
+                or oi.item_type not in ('Bundle', 'General Merchandise', 'Wine'))"
+    ]
+) }}
+
+-- stg_qb_format_base materialized once per run and tagged with the QuickBooks
+-- export it lands in (qb_exports() in macros/qb_exports.sql). The agg_*
+-- export views filter this on qb_export instead of each re-evaluating the
+-- order-item view.
+--
+-- Incremental runs re-read order items updated in the last 3 days plus every
+-- line whose SKU's variant price changed (is_full_price depends on it). The
+-- post_hook drops items that have since left QuickBooks scope.
+-- depends_on: {{ ref('fct_order_item') }}
+
+select
+    b.*,
+    {{ qb_export_case('b.class_code', 'b.ref_number') }} as qb_export
+from {{ ref('stg_qb_format_base') }} b
+
+{% if is_incremental() %}
+where b.updated_at >= (
+        select coalesce(max(updated_at) - interval '3 days', date '2000-01-01')
+        from {{ this }})
+   or b.sku in (
+        select q.sku
+        from {{ this }} q
+        join {{ ref('dim_product_variant') }} pv on pv.sku = q.sku
+        where pv.price is distinct from q.variant_price)
+{% endif %}
@@ -2,6 +2,7 @@
 
 with base as (
     select
+        oi.order_item_id,
         oi.order_id,
         oi.refund_order_id,
         oi.linked_order_id,
@@ -57,7 +58,8 @@ with base as (
         case 
             when oi.quantity > 0 then oi.product_subtotal / oi.quantity
             else null
-        end as unit_price_from_order
+        end as unit_price_from_order,
+        oi.updated_at
     from {{ ref('fct_order_item') }} oi
     left join {{ ref('dim_product_variant') }} pv
         on oi.sku = pv.sku
@@ -66,6 +68,7 @@ with base as (
 )
 
 select 
+    order_item_id,
     order_id,
     customer_id,
     linked_order_id,
@@ -131,5 +134,6 @@ select
         when channel = 'POS' and event_fee_or_wine = 'Event Fee' and in_month then concat(month_name,'C7.17')
         when channel = 'POS' and event_fee_or_wine = 'Event Wine' and in_month then concat(month_name,'C7.18')
         else null
-    end as ref_number
+    end as ref_number,
+    updated_at
 from base
@@ -29,74 +29,101 @@ as_of_dates as (
   from params p
   cross join lateral generate_series(0, {{ backfill_days }}::int, 1) as g(offs)
 ),
-date_filter as (
-  -- For performance: limit scanning fact_kpi_daily to just the needed date range
-  select
-      (select min(as_of_date) from as_of_dates)                                         as min_as_of
-    , (select max(as_of_date) from as_of_dates)                                         as max_as_of
-),
-scan_window as (
-  select
-      (min_as_of - interval '{{ lookback_days }} days')::date as scan_start
-    , max_as_of                                                as scan_end
-  from date_filter
-),
-f as (
-  -- Restrict facts to minimal window needed for all calculations
-  select fd.*
-  from {{ ref('fact_kpi_daily') }} fd
-  join scan_window w on fd.date_key between w.scan_start and w.scan_end
-),
 p as (
   select a.as_of_date from as_of_dates a
 ),
 {{ kpi_bounds_cte('p') }},
 
-current_rollups as (
+{#- Every window is (name, first day, last day); its total is the cumulative
+    value at the last day minus the cumulative value the day before the first. -#}
+{% set windows = [
+    ('mtd_value',    'wb.month_start',               'wb.as_of_date'),
+    ('qtd_value',    'wb.fiscal_quarter_start',      'wb.as_of_date'),
+    ('ytd_value',    'wb.fiscal_year_start',         'wb.as_of_date'),
+    ('last28_value', 'wb.last28_start::date',        'wb.as_of_date'),
+    ('mtd_prior',    'wb.prev_month_start',          '(wb.prev_month_start + (wb.as_of_date - wb.month_start))'),
+    ('qtd_prior',    'wb.prev_fiscal_quarter_start', '(wb.prev_fiscal_quarter_start + (wb.as_of_date - wb.fiscal_quarter_start))'),
+    ('ytd_prior',    'wb.prev_fiscal_year_start',    '(wb.prev_fiscal_year_start + (wb.as_of_date - wb.fiscal_year_start))'),
+    ('last28_prior', 'wb.prev_last28_start',         '(wb.prev_last28_start + 27)'),
+] %}
+{#- Fiscal month totals: each calendar month within the current / prior fiscal year -#}
+{% for m, abbr in month_cols %}
+  {% for suffix, fy_start in [('value', 'wb.fiscal_year_start'), ('prior', 'wb.prev_fiscal_year_start')] %}
+    {% set month_start = "(" ~ fy_start ~ " + ((" ~ m ~ " - extract(month from " ~ fy_start ~ ")::int + 12) % 12) * interval '1 month')::date" %}
+    {% do windows.append((abbr ~ '_' ~ suffix, month_start, "(" ~ month_start ~ " + interval '1 month' - interval '1 day')::date")) %}
+  {% endfor %}
+{% endfor %}
+{#- Fiscal quarter totals: each quarter is 3 months from the fiscal year start -#}
+{% for k in range(1, 5) %}
+  {% for suffix, fy_start in [('value', 'wb.fiscal_year_start'), ('prior', 'wb.prev_fiscal_year_start')] %}
+    {% do windows.append((
+        'q' ~ k ~ '_' ~ suffix,
+        "(" ~ fy_start ~ " + interval '" ~ (k-1)*3 ~ " months')::date",
+        "(" ~ fy_start ~ " + interval '" ~ k*3 ~ " months' - interval '1 day')::date"
+    )) %}
+  {% endfor %}
+{% endfor %}
+
+series as (
+  -- Every KPI for every entity; series without facts in the lookback are dropped below
+  select k.kpi_id, e.entity_id
+  from {{ ref('dim_kpi') }} k
+  cross join {{ ref('dim_entity') }} e
+),
+lookups as (
   select
-      f.kpi_id
-    , f.entity_id
-    , wb.as_of_date
+      wb.as_of_date
     , wb.fiscal_year
-    -- Period metrics (windows from kpi_dim_date via the bounds macro)
-    , sum(case when f.date_key between wb.month_start          and wb.as_of_date then f.value end) as mtd_value
-    , sum(case when f.date_key between wb.fiscal_quarter_start and wb.as_of_date then f.value end) as qtd_value
-    , sum(case when f.date_key between wb.fiscal_year_start    and wb.as_of_date then f.value end) as ytd_value
-    , sum(case when f.date_key between wb.last28_start         and wb.as_of_date then f.value end) as last28_value
-    -- Fiscal month totals: each calendar month within the current fiscal year
-    {% for m, abbr in month_cols %}
-    , sum(case when f.date_key between wb.fiscal_year_start and wb.fiscal_year_end_boundary and extract(month from f.date_key) = {{ m }} then f.value end) as {{ abbr }}_value
-    {% endfor %}
-    -- Fiscal quarter totals: each quarter is 3 months from the fiscal year start
-    {% for k in range(1, 5) %}
-    , sum(case when f.date_key >= (wb.fiscal_year_start + interval '{{ (k-1)*3 }} months') and f.date_key < (wb.fiscal_year_start + interval '{{ k*3 }} months') then f.value end) as q{{ k }}_value
-    {% endfor %}
-  from f
-  cross join window_bounds wb
-  group by 1,2,3,4
+    , s.kpi_id
+    , s.entity_id
+    , b.bound
+    , b.lookup_date
+  from window_bounds wb
+  cross join series s
+  cross join lateral (values
+      ('lookback_start', (wb.as_of_date - {{ lookback_days }} - 1)::date)
+    , ('lookback_end',   wb.as_of_date)
+    {%- for name, first_day, last_day in windows %}
+    , ('{{ name }}_start', ({{ first_day }} - 1)::date)
+    , ('{{ name }}_end',   ({{ last_day }})::date)
+    {%- endfor %}
+  ) as b(bound, lookup_date)
 ),
-prior_rollups as (
+resolved as (
+  -- Latest running total on or before each lookup date (0 before a series starts)
   select
-      f.kpi_id
-    , f.entity_id
-    , wb.as_of_date
-    , wb.fiscal_year
-    -- Period metrics (prior year: same-length window one year back)
-    , sum(case when f.date_key between wb.prev_month_start          and (wb.prev_month_start          + (wb.as_of_date - wb.month_start))          then f.value end) as mtd_prior
-    , sum(case when f.date_key between wb.prev_fiscal_quarter_start and (wb.prev_fiscal_quarter_start + (wb.as_of_date - wb.fiscal_quarter_start)) then f.value end) as qtd_prior
-    , sum(case when f.date_key between wb.prev_fiscal_year_start    and (wb.prev_fiscal_year_start    + (wb.as_of_date - wb.fiscal_year_start))    then f.value end) as ytd_prior
-    , sum(case when f.date_key between wb.prev_last28_start         and (wb.prev_last28_start         + interval '27 days')                        then f.value end) as last28_prior
-    -- Prior fiscal month totals: each calendar month within the prior fiscal year
-    {% for m, abbr in month_cols %}
-    , sum(case when f.date_key between wb.prev_fiscal_year_start and wb.prev_fiscal_year_end_boundary and extract(month from f.date_key) = {{ m }} then f.value end) as {{ abbr }}_prior
-    {% endfor %}
-    -- Prior fiscal quarter totals: each quarter is 3 months from the prior fiscal year start
-    {% for k in range(1, 5) %}
-    , sum(case when f.date_key >= (wb.prev_fiscal_year_start + interval '{{ (k-1)*3 }} months') and f.date_key < (wb.prev_fiscal_year_start + interval '{{ k*3 }} months') then f.value end) as q{{ k }}_prior
-    {% endfor %}
-  from f
-  cross join window_bounds wb
-  group by 1,2,3,4
+      l.*
+    , coalesce(c.cumulative_value, 0) as cumulative_value
+    , coalesce(c.cumulative_rows, 0)  as cumulative_rows
+  from lookups l
+  left join lateral (
+    select fc.cumulative_value, fc.cumulative_rows
+    from {{ ref('fact_kpi_cumulative') }} fc
+    where fc.kpi_id = l.kpi_id
+      and fc.entity_id = l.entity_id
+      and fc.date_key <= l.lookup_date
+    order by fc.date_key desc
+    limit 1
+  ) c on true
+),
+rollups as (
+  select
+      as_of_date
+    , kpi_id
+    , entity_id
+    , fiscal_year
+    , max(case when bound = 'lookback_end' then cumulative_rows end)
+      - max(case when bound = 'lookback_start' then cumulative_rows end) as lookback_rows
+    {%- for name, first_day, last_day in windows %}
+    , case
+        when max(case when bound = '{{ name }}_end' then cumulative_rows end)
+           > max(case when bound = '{{ name }}_start' then cumulative_rows end)
+        then max(case when bound = '{{ name }}_end' then cumulative_value end)
+           - max(case when bound = '{{ name }}_start' then cumulative_value end)
+      end as {{ name }}
+    {%- endfor %}
+  from resolved
+  group by 1, 2, 3, 4
 ),
 calc as (
   select
@@ -106,32 +133,32 @@ calc as (
     , c.fiscal_year
 
     -- Period metrics
-    , c.mtd_value,  p.mtd_prior,  (c.mtd_value - p.mtd_prior) as mtd_delta,  case when p.mtd_prior = 0 then null else ((c.mtd_value / p.mtd_prior) - 1) * 100 end as mtd_delta_pct
-    , c.qtd_value,  p.qtd_prior,  (c.qtd_value - p.qtd_prior) as qtd_delta,  case when p.qtd_prior = 0 then null else ((c.qtd_value / p.qtd_prior) - 1) * 100 end as qtd_delta_pct
-    , c.ytd_value,  p.ytd_prior,  (c.ytd_value - p.ytd_prior) as ytd_delta,  case when p.ytd_prior = 0 then null else ((c.ytd_value / p.ytd_prior) - 1) * 100 end as ytd_delta_pct
-    , c.last28_value, p.last28_prior, (c.last28_value - p.last28_prior) as last28_delta, case when p.last28_prior = 0 then null else ((c.last28_value / p.last28_prior) - 1) * 100 end as last28_delta_pct
+    , c.mtd_value,  c.mtd_prior,  (c.mtd_value - c.mtd_prior) as mtd_delta,  case when c.mtd_prior = 0 then null else ((c.mtd_value / c.mtd_prior) - 1) * 100 end as mtd_delta_pct
+    , c.qtd_value,  c.qtd_prior,  (c.qtd_value - c.qtd_prior) as qtd_delta,  case when c.qtd_prior = 0 then null else ((c.qtd_value / c.qtd_prior) - 1) * 100 end as qtd_delta_pct
+    , c.ytd_value,  c.ytd_prior,  (c.ytd_value - c.ytd_prior) as ytd_delta,  case when c.ytd_prior = 0 then null else ((c.ytd_value / c.ytd_prior) - 1) * 100 end as ytd_delta_pct
+    , c.last28_value, c.last28_prior, (c.last28_value - c.last28_prior) as last28_delta, case when c.last28_prior = 0 then null else ((c.last28_value / c.last28_prior) - 1) * 100 end as last28_delta_pct
 
     -- Monthly metrics (Jul-Jun)
-    , c.jul_value, p.jul_prior, (c.jul_value - p.jul_prior) as jul_delta, case when p.jul_prior = 0 then null else ((c.jul_value / p.jul_prior) - 1) * 100 end as jul_delta_pct
-    , c.aug_value, p.aug_prior, (c.aug_value - p.aug_prior) as aug_delta, case when p.aug_prior = 0 then null else ((c.aug_value / p.aug_prior) - 1) * 100 end as aug_delta_pct
-    , c.sep_value, p.sep_prior, (c.sep_value - p.sep_prior) as sep_delta, case when p.sep_prior = 0 then null else ((c.sep_value / p.sep_prior) - 1) * 100 end as sep_delta_pct
-    , c.oct_value, p.oct_prior, (c.oct_value - p.oct_prior) as oct_delta, case when p.oct_prior = 0 then null else ((c.oct_value / p.oct_prior) - 1) * 100 end as oct_delta_pct
-    , c.nov_value, p.nov_prior, (c.nov_value - p.nov_prior) as nov_delta, case when p.nov_prior = 0 then null else ((c.nov_value / p.nov_prior) - 1) * 100 end as nov_delta_pct
-    , c.dec_value, p.dec_prior, (c.dec_value - p.dec_prior) as dec_delta, case when p.dec_prior = 0 then null else ((c.dec_value / p.dec_prior) - 1) * 100 end as dec_delta_pct
-    , c.jan_value, p.jan_prior, (c.jan_value - p.jan_prior) as jan_delta, case when p.jan_prior = 0 then null else ((c.jan_value / p.jan_prior) - 1) * 100 end as jan_delta_pct
-    , c.feb_value, p.feb_prior, (c.feb_value - p.feb_prior) as feb_delta, case when p.feb_prior = 0 then null else ((c.feb_value / p.feb_prior) - 1) * 100 end as feb_delta_pct
-    , c.mar_value, p.mar_prior, (c.mar_value - p.mar_prior) as mar_delta, case when p.mar_prior = 0 then null else ((c.mar_value / p.mar_prior) - 1) * 100 end as mar_delta_pct
-    , c.apr_value, p.apr_prior, (c.apr_value - p.apr_prior) as apr_delta, case when p.apr_prior = 0 then null else ((c.apr_value / p.apr_prior) - 1) * 100 end as apr_delta_pct
-    , c.may_value, p.may_prior, (c.may_value - p.may_prior) as may_delta, case when p.may_prior = 0 then null else ((c.may_value / p.may_prior) - 1) * 100 end as may_delta_pct
-    , c.jun_value, p.jun_prior, (c.jun_value - p.jun_prior) as jun_delta, case when p.jun_prior = 0 then null else ((c.jun_value / p.jun_prior) - 1) * 100 end as jun_delta_pct
+    , c.jul_value, c.jul_prior, (c.jul_value - c.jul_prior) as jul_delta, case when c.jul_prior = 0 then null else ((c.jul_value / c.jul_prior) - 1) * 100 end as jul_delta_pct
+    , c.aug_value, c.aug_prior, (c.aug_value - c.aug_prior) as aug_delta, case when c.aug_prior = 0 then null else ((c.aug_value / c.aug_prior) - 1) * 100 end as aug_delta_pct
+    , c.sep_value, c.sep_prior, (c.sep_value - c.sep_prior) as sep_delta, case when c.sep_prior = 0 then null else ((c.sep_value / c.sep_prior) - 1) * 100 end as sep_delta_pct
+    , c.oct_value, c.oct_prior, (c.oct_value - c.oct_prior) as oct_delta, case when c.oct_prior = 0 then null else ((c.oct_value / c.oct_prior) - 1) * 100 end as oct_delta_pct
+    , c.nov_value, c.nov_prior, (c.nov_value - c.nov_prior) as nov_delta, case when c.nov_prior = 0 then null else ((c.nov_value / c.nov_prior) - 1) * 100 end as nov_delta_pct
+    , c.dec_value, c.dec_prior, (c.dec_value - c.dec_prior) as dec_delta, case when c.dec_prior = 0 then null else ((c.dec_value / c.dec_prior) - 1) * 100 end as dec_delta_pct
+    , c.jan_value, c.jan_prior, (c.jan_value - c.jan_prior) as jan_delta, case when c.jan_prior = 0 then null else ((c.jan_value / c.jan_prior) - 1) * 100 end as jan_delta_pct
+    , c.feb_value, c.feb_prior, (c.feb_value - c.feb_prior) as feb_delta, case when c.feb_prior = 0 then null else ((c.feb_value / c.feb_prior) - 1) * 100 end as feb_delta_pct
+    , c.mar_value, c.mar_prior, (c.mar_value - c.mar_prior) as mar_delta, case when c.mar_prior = 0 then null else ((c.mar_value / c.mar_prior) - 1) * 100 end as mar_delta_pct
+    , c.apr_value, c.apr_prior, (c.apr_value - c.apr_prior) as apr_delta, case when c.apr_prior = 0 then null else ((c.apr_value / c.apr_prior) - 1) * 100 end as apr_delta_pct
+    , c.may_value, c.may_prior, (c.may_value - c.may_prior) as may_delta, case when c.may_prior = 0 then null else ((c.may_value / c.may_prior) - 1) * 100 end as may_delta_pct
+    , c.jun_value, c.jun_prior, (c.jun_value - c.jun_prior) as jun_delta, case when c.jun_prior = 0 then null else ((c.jun_value / c.jun_prior) - 1) * 100 end as jun_delta_pct
 
     -- Quarterly metrics (Q1-Q4)
-    , c.q1_value, p.q1_prior, (c.q1_value - p.q1_prior) as q1_delta, case when p.q1_prior = 0 then null else ((c.q1_value / p.q1_prior) - 1) * 100 end as q1_delta_pct
-    , c.q2_value, p.q2_prior, (c.q2_value - p.q2_prior) as q2_delta, case when p.q2_prior = 0 then null else ((c.q2_value / p.q2_prior) - 1) * 100 end as q2_delta_pct
-    , c.q3_value, p.q3_prior, (c.q3_value - p.q3_prior) as q3_delta, case when p.q3_prior = 0 then null else ((c.q3_value / p.q3_prior) - 1) * 100 end as q3_delta_pct
-    , c.q4_value, p.q4_prior, (c.q4_value - p.q4_prior) as q4_delta, case when p.q4_prior = 0 then null else ((c.q4_value / p.q4_prior) - 1) * 100 end as q4_delta_pct
-  from current_rollups c
-  join prior_rollups  p using (as_of_date, kpi_id, entity_id)
+    , c.q1_value, c.q1_prior, (c.q1_value - c.q1_prior) as q1_delta, case when c.q1_prior = 0 then null else ((c.q1_value / c.q1_prior) - 1) * 100 end as q1_delta_pct
+    , c.q2_value, c.q2_prior, (c.q2_value - c.q2_prior) as q2_delta, case when c.q2_prior = 0 then null else ((c.q2_value / c.q2_prior) - 1) * 100 end as q2_delta_pct
+    , c.q3_value, c.q3_prior, (c.q3_value - c.q3_prior) as q3_delta, case when c.q3_prior = 0 then null else ((c.q3_value / c.q3_prior) - 1) * 100 end as q3_delta_pct
+    , c.q4_value, c.q4_prior, (c.q4_value - c.q4_prior) as q4_delta, case when c.q4_prior = 0 then null else ((c.q4_value / c.q4_prior) - 1) * 100 end as q4_delta_pct
+  from rollups c
+  where c.lookback_rows > 0
 ),
 final as (
   select
@@ -0,0 +1,143 @@
+{{ config(
+    materialized='incremental',
+    unique_key=['kpi_id','entity_id','date_key'],
+    on_schema_change='append_new_columns',
+    incremental_strategy='merge',
+    schema='nate_sandbox',
+    indexes=[
+      {'columns': ['kpi_id', 'entity_id', 'date_key'], 'unique': True},
+      {'columns': ['date_key']},
+      {'columns': ['_source_built_at']}
+    ],
+    post_hook=[
+      "{% if is_incremental() %}
+       delete from {{ this }} c
+       where not exists (select 1 from {{ ref('dim_kpi') }} k where k.kpi_id = c.kpi_id)
+       {% endif %}"
+    ]
+) }}
+
+-- depends_on: {{ ref('dim_kpi') }}
+
+{#-----------------------------
+ Running totals of fact_kpi_daily, one row per (kpi_id, entity_id, day) from
+ the series' first fact through today. The total over any window [a, b] is
+ cumulative_value(b) - cumulative_value(a - 1), so agg_kpi_dashboard answers
+ every MTD/QTD/YTD/last-28/month/quarter window with two index lookups instead
+ of re-summing up to kpi_dashboard_lookback_days of facts.
+
+ cumulative_rows counts the fact rows behind the total, letting a window tell
+ "no facts" (null) apart from facts that sum to zero.
+
+ Incremental runs restate from the earlier of kpi_restate_days ago and the
+ oldest date fact_kpi_daily rewrote since the last build (its _built_at, kept
+ here as _source_built_at), on top of the stored total from the day before.
+ A series with no stored total there (a new kpi_id/entity_id, or one that
+ fell behind) is rebuilt from its first fact in the restated range; history
+ before the range is never rescanned. The post_hook drops the series of
+ kpi_ids removed from dim_kpi, which would otherwise carry forward from their
+ stored totals.
+------------------------------#}
+{% set restate_days = var('kpi_restate_days', 90) %}
+{% set bookkeeping_ready = false %}
+{% if is_incremental() %}
+  {% set existing_columns = adapter.get_columns_in_relation(this) | map(attribute='name') | map('lower') | list %}
+  {% set bookkeeping_ready = '_source_built_at' in existing_columns %}
+{% endif %}
+
+with params as (
+  select
+      current_date::date as today
+  {% if is_incremental() and bookkeeping_ready %}
+    , least(
+          (current_date - {{ restate_days }})::date
+        , (select min(f.date_key)
+           from {{ ref('fact_kpi_daily') }} f
+           where f._built_at > (select coalesce(max(_source_built_at), '-infinity'::timestamptz) from {{ this }}))
+      ) as restate_start
+  {% elif is_incremental() %}
+    -- Table built before _source_built_at: restate every series from its first fact
+    , date '1900-01-01' as restate_start
+  {% else %}
+    , (current_date - {{ restate_days }})::date as restate_start
+  {% endif %}
+    , (select max(_built_at) from {{ ref('fact_kpi_daily') }}) as source_built_at
+),
+{% if is_incremental() %}
+bases as (
+  -- Stored totals just before the restated range; a series with one started earlier
+  select c.kpi_id, c.entity_id, c.cumulative_value, c.cumulative_rows
+  from {{ this }} c
+  cross join params p
+  where c.date_key = p.restate_start - 1
+),
+new_series as (
+  -- Series with no stored total there start inside the restated range, so only
+  -- that range of fact_kpi_daily is scanned for their first fact
+  select f.kpi_id, f.entity_id, min(f.date_key) as first_date
+  from {{ ref('fact_kpi_daily') }} f
+  cross join params p
+  where f.date_key >= p.restate_start
+    and not exists (
+      select 1 from bases b where b.kpi_id = f.kpi_id and b.entity_id = f.entity_id
+    )
+  group by 1, 2
+),
+starts as (
+  select
+      b.kpi_id
+    , b.entity_id
+    , p.restate_start      as recompute_start
+    , b.cumulative_value   as base_value
+    , b.cumulative_rows    as base_rows
+  from bases b
+  cross join params p
+  union all
+  select
+      n.kpi_id
+    , n.entity_id
+    , n.first_date as recompute_start
+    , 0            as base_value
+    , 0            as base_rows
+  from new_series n
+),
+{% else %}
+starts as (
+  select
+      kpi_id
+    , entity_id
+    , min(date_key) as recompute_start
+    , 0             as base_value
+    , 0             as base_rows
+  from {{ ref('fact_kpi_daily') }}
+  group by 1, 2
+),
+{% endif %}
+daily as (
+  -- Dense day spine per series so every date has a row to look up
+  select
+      st.kpi_id
+    , st.entity_id
+    , d.date_day as date_key
+    , st.base_value
+    , st.base_rows
+    , coalesce(f.value, 0) as value
+    , case when f.date_key is null then 0 else 1 end as fact_rows
+  from starts st
+  cross join params p
+  join {{ ref('kpi_dim_date') }} d on d.date_day between st.recompute_start and p.today
+  left join {{ ref('fact_kpi_daily') }} f
+    on f.kpi_id = st.kpi_id
+   and f.entity_id = st.entity_id
+   and f.date_key = d.date_day
+)
+
+select
+    kpi_id
+  , entity_id
+  , date_key
+  , value
+  , base_value + sum(value)     over (partition by kpi_id, entity_id order by date_key rows unbounded preceding) as cumulative_value
+  , base_rows  + sum(fact_rows) over (partition by kpi_id, entity_id order by date_key rows unbounded preceding) as cumulative_rows
+  , (select source_built_at from params) as _source_built_at
+from daily
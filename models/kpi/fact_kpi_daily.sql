@@ -1,107 +1,77 @@
 {{
   config(
-    materialized='table',
-    schema='nate_sandbox'
+    materialized='incremental',
+    unique_key=['date_key', 'kpi_id', 'entity_id'],
+    incremental_strategy='merge',
+    on_schema_change='append_new_columns',
+    schema='nate_sandbox',
+    indexes=[{'columns': ['date_key']}, {'columns': ['_built_at']}, {'columns': ['_source_built_at']}],
+    post_hook=[
+        "{% if is_incremental() %}
+         delete from {{ this }} f
+         where not exists (select 1 from {{ ref('dim_kpi') }} k where k.kpi_id = f.kpi_id)
+         {% endif %}"
+    ]
   )
 }}
 
+-- depends_on: {{ ref('dim_kpi') }}
+
 -- Unpivot agg_daily_revenue into long format for KPI framework
 -- This transforms the wide table into (kpi_id, entity_id, date_key, value)
+-- in a single scan: every row fans out through a lateral VALUES list generated
+-- from the dim_kpi seed, whose kpi_code is the agg_daily_revenue column name.
+-- Adding a KPI is a new column plus a dim_kpi row, not another scan.
+-- Incremental runs reprocess the last kpi_restate_days days plus every date
+-- agg_daily_revenue rewrote since the last build (its _built_at, kept here as
+-- _source_built_at), however old. All dates are reprocessed when the dim_kpi
+-- kpi_id set changes (_kpi_set); the merge only upserts, so the post_hook
+-- deletes the rows of kpi_ids no longer in dim_kpi. _built_at tells
+-- fact_kpi_cumulative which dates this run rewrote.
+
+{% set restate_days = var('kpi_restate_days', 90) %}
+{% set kpis = [] %}
+{% if execute %}
+  {% set kpis = run_query("select kpi_id, kpi_code from " ~ ref('dim_kpi') ~ " order by kpi_id").rows %}
+{% endif %}
+{% set kpi_set = kpis | map(attribute=0) | join(',') %}
+{% set bookkeeping_ready = false %}
+{% if is_incremental() %}
+  {% set existing_columns = adapter.get_columns_in_relation(this) | map(attribute='name') | map('lower') | list %}
+  {% set bookkeeping_ready = '_source_built_at' in existing_columns %}
+{% endif %}
 
 with daily_revenue as (
     select * from {{ ref('agg_daily_revenue') }}
+    {% if is_incremental() and bookkeeping_ready %}
+    where date_day >= (select max(date_key) from {{ this }}) - {{ restate_days }}
+       or _built_at > (select coalesce(max(_source_built_at), '-infinity'::timestamptz) from {{ this }})
+       or not exists (select 1 from {{ this }} where _kpi_set = '{{ kpi_set }}')
+    {% endif %}
 ),
 
 unpivoted as (
-    -- Tasting Room Metrics
-    select date_day as date_key, 1 as kpi_id, 0 as entity_id, tasting_room_wine_revenue as value
-    from daily_revenue
-    union all
-    select date_day, 2, 0, tasting_room_fees_revenue from daily_revenue
-    union all
-    select date_day, 3, 0, tasting_room_total_revenue from daily_revenue
-    
-    -- Wine Club Metrics
-    union all
-    select date_day, 4, 0, wine_club_orders_revenue from daily_revenue
-    union all
-    select date_day, 5, 0, wine_club_fees_revenue from daily_revenue
-    union all
-    select date_day, 6, 0, wine_club_total_revenue from daily_revenue
-    
-    -- Channel Revenue Metrics
-    union all
-    select date_day, 7, 0, ecomm_revenue from daily_revenue
-    union all
-    select date_day, 8, 0, phone_revenue from daily_revenue
-    
-    -- Event Revenue Metrics
-    union all
-    select date_day, 9, 0, event_fees_orders_revenue from daily_revenue
-    union all
-    select date_day, 10, 0, event_fees_reservations_revenue from daily_revenue
-    union all
-    select date_day, 11, 0, event_fees_total_revenue from daily_revenue
-    union all
-    select date_day, 12, 0, event_wine_revenue from daily_revenue
-    
-    -- Shipping & Total Revenue
-    union all
-    select date_day, 13, 0, shipping_revenue from daily_revenue
-    union all
-    select date_day, 14, 0, total_daily_revenue from daily_revenue
-    
-    -- Traffic Metrics
-    union all
-    select date_day, 15, 0, total_reservations from daily_revenue
-    union all
-    select date_day, 16, 0, total_visitors from daily_revenue
-    union all
-    select date_day, 17, 0, avg_party_size from daily_revenue
-    
-    -- Guest Metrics
-    union all
-    select date_day, 18, 0, tasting_room_guests from daily_revenue
-    union all
-    select date_day, 19, 0, event_guests from daily_revenue
-    union all
-    select date_day, 20, 0, avg_tasting_fee_per_guest from daily_revenue
-    union all
-    select date_day, 21, 0, tasting_room_orders_per_guest_pct from daily_revenue
-    
-    -- Wine Sales Metrics
-    union all
-    select date_day, 22, 0, total_9l_sold from daily_revenue
-    
-    -- Club Membership Metrics
-    union all
-    select date_day, 23, 0, total_active_club_membership from daily_revenue
-    union all
-    select date_day, 24, 0, new_member_acquisition from daily_revenue
-    union all
-    select date_day, 25, 0, existing_member_attrition from daily_revenue
-    union all
-    select date_day, 26, 0, club_population_net_gain_loss from daily_revenue
-    union all
-    select date_day, 27, 0, club_conversion_per_taster_pct from daily_revenue
-    
-    -- Order Metrics
-    union all
-    select date_day, 28, 0, total_orders from daily_revenue
-    union all
-    select date_day, 29, 0, average_order_value from daily_revenue
-    union all
-    select date_day, 30, 0, tasting_room_orders from daily_revenue
-    union all
-    select date_day, 31, 0, tasting_room_bottles_sold from daily_revenue
+    select
+        dr.date_day as date_key,
+        k.kpi_id,
+        0 as entity_id,
+        k.value,
+        dr._built_at as _source_built_at
+    from daily_revenue dr
+    cross join lateral (values
+        {%- for kpi_id, kpi_code in kpis %}
+        ({{ kpi_id }}, dr.{{ kpi_code }}::numeric){{ ',' if not loop.last }}
+        {%- endfor %}
+    ) as k(kpi_id, value)
 )
 
 select
     date_key,
     kpi_id,
     entity_id,
-    coalesce(value, 0) as value
+    coalesce(value, 0) as value,
+    _source_built_at,
+    '{{ kpi_set }}'::text as _kpi_set,
+    current_timestamp as _built_at
 from unpivoted
 where date_key is not null
-order by date_key, kpi_id
-
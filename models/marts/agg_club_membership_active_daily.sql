@@ -1,6 +1,10 @@
 {{
   config(
-    materialized='table'
+    materialized='incremental',
+    unique_key='date_day',
+    incremental_strategy='delete+insert',
+    on_schema_change='append_new_columns',
+    indexes=[{'columns': ['date_day'], 'unique': True}]
   )
 }}
 
@@ -8,23 +12,92 @@
 -- cancel dates rather than current status so historical days remain correct after
 -- later cancellations. Feeds the dashboard's Active Club Members card, which also
 -- reads the same date one year prior for its YoY comparison.
+--
+-- Each membership contributes +1 on its signup day and -1 on its cancel day, so a
+-- day's count is the running sum of those deltas: one pass over memberships and
+-- one over days instead of joining every day to every membership. Incremental
+-- runs rewrite from the earliest of club_membership_restate_days ago, the day
+-- after the last stored day, and the earliest signup or cancel date of any
+-- membership updated since the last build (_memberships_updated_at, less 3
+-- days of overlap), on top of the deltas before that day.
+
+{% set bookkeeping_ready = false %}
+{% if is_incremental() %}
+  {% set existing_columns = adapter.get_columns_in_relation(this) | map(attribute='name') | map('lower') | list %}
+  {% set bookkeeping_ready = '_memberships_updated_at' in existing_columns %}
+{% endif %}
 
 with date_range as (
     select
         (select current_date_pacific from {{ ref('dim_date') }} limit 1) as current_date,
         date('{{ var('kpi_history_start', '2023-07-01') }}') as init_date
+),
+
+restate_range as (
+    select
+        dr.current_date,
+        {% if is_incremental() and bookkeeping_ready %}
+        greatest(
+            dr.init_date,
+            least(
+                dr.current_date - {{ var('club_membership_restate_days', 30) }},
+                (select coalesce(max(date_day) + 1, dr.init_date) from {{ this }}),
+                (
+                    select min(date(least(dcm.signup_at, dcm.cancel_at)))
+                    from {{ ref('dim_club_membership') }} dcm
+                    where dcm.updated_at >= (
+                        select max(_memberships_updated_at) - interval '3 days' from {{ this }}
+                    )
+                )
+            )
+        ) as start_date
+        {% else %}
+        -- Full build, or a table built before _memberships_updated_at
+        dr.init_date as start_date
+        {% endif %}
+    from date_range dr
+),
+
+memberships as (
+    select
+        date(dcm.signup_at) as signup_date,
+        date(dcm.cancel_at) as cancel_date
+    from {{ ref('dim_club_membership') }} dcm
+    where dcm.signup_at is not null
+      -- a cancelled membership missing its cancel date must not count as active forever
+      and not (dcm.status = 'Cancelled' and dcm.cancel_at is null)
+      -- cancelled on or before its signup day: never active on any day
+      and (dcm.cancel_at is null or date(dcm.cancel_at) > date(dcm.signup_at))
+),
+
+daily_deltas as (
+    select event_date, sum(delta) as delta
+    from (
+        select signup_date as event_date, 1 as delta from memberships
+        union all
+        select cancel_date as event_date, -1 as delta from memberships where cancel_date is not null
+    ) events
+    group by event_date
+),
+
+baseline as (
+    -- Memberships active on the day before the rewritten range
+    select coalesce(sum(dl.delta), 0) as active
+    from daily_deltas dl
+    cross join restate_range rr
+    where dl.event_date < rr.start_date
 )
 
 select
     dd.date_day,
-    count(dcm.membership_id) as total_active_club_membership
+    (
+        b.active
+        + sum(coalesce(dl.delta, 0)) over (order by dd.date_day rows unbounded preceding)
+    )::bigint as total_active_club_membership,
+    (select max(updated_at) from {{ ref('dim_club_membership') }}) as _memberships_updated_at
 from {{ ref('dim_date') }} dd
-cross join date_range dr
-left join {{ ref('dim_club_membership') }} dcm
-    on date(dcm.signup_at) <= dd.date_day
-    and (dcm.cancel_at is null or date(dcm.cancel_at) > dd.date_day)
-    -- a cancelled membership missing its cancel date must not count as active forever
-    and not (dcm.status = 'Cancelled' and dcm.cancel_at is null)
-where dd.date_day >= dr.init_date
-and dd.date_day <= dr.current_date
-group by dd.date_day
+cross join restate_range rr
+cross join baseline b
+left join daily_deltas dl on dl.event_date = dd.date_day
+where dd.date_day >= rr.start_date
+and dd.date_day <= rr.current_date
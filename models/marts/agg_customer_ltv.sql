@@ -1,11 +1,12 @@
 -- agg_customer_ltv.sql
 {{ config(materialized='view') }}
 
+-- Order totals per customer come from the incrementally maintained
+-- fct_customer_order_metrics instead of scanning fct_order on every query.
 select
     c.customer_id,
-    count(distinct o.order_id)            as orders,
-    sum(o.order_total)                    as lifetime_sales,
-    max(o.order_date_key)                 as most_recent_order_date
+    coalesce(com.total_order_count, 0)    as orders,
+    com.lifetime_order_total              as lifetime_sales,
+    com.last_order_date_from_orders       as most_recent_order_date
 from {{ ref('dim_customer') }}    c
-left join {{ ref('fct_order') }}  o using (customer_id)
-group by 1
+left join {{ ref('fct_customer_order_metrics') }} com using (customer_id)
@@ -1,16 +1,145 @@
 {{
   config(
-    materialized='table'
+    materialized='incremental',
+    unique_key='date_day',
+    incremental_strategy='delete+insert',
+    on_schema_change='append_new_columns',
+    indexes=[{'columns': ['date_day'], 'unique': True}, {'columns': ['_built_at']}]
   )
 }}
 
-with date_range as (
+{#-
+  Incremental runs replace only the date_day "partitions" whose inputs changed
+  since the last build, found from the source high-water marks stored on each
+  row (_orders_updated_at, _reservations_processed_at, _memberships_updated_at):
+    - order dates (and event realization dates) of orders/items updated since
+    - reservation dates of Tock reservations loaded since, cancellations included
+    - every date from a changed membership's earliest signup or cancel date
+      onward, since the active-member count carries forward
+    - today and yesterday, always
+  Everything is rebuilt when experience attributions change (_attribution_version)
+  or the fiscal year rolls over (fiscal_year_period). An order or reservation
+  moved to a different date only refreshes its new date; DBT_FULL_REFRESH=1
+  still rebuilds the table from kpi_history_start. _built_at stamps every
+  rewritten date so fact_kpi_daily can pick up exactly those dates.
+-#}
+{% set bookkeeping_ready = false %}
+{% if is_incremental() %}
+  {% set existing_columns = adapter.get_columns_in_relation(this) | map(attribute='name') | map('lower') | list %}
+  {% set bookkeeping_ready = '_orders_updated_at' in existing_columns %}
+{% endif %}
+
+with history_range as (
     -- Get date range from beginning of previous fiscal year to current date
     select 
         (select current_date_pacific from {{ ref('dim_date') }} limit 1) as current_date,
         date('{{ var('kpi_history_start', '2023-07-01') }}') as init_date  -- Configurable history/data-floor anchor
 ),
 
+attribution as (
+    select md5(coalesce(string_agg(experience || '=' || coalesce(attribution, ''), ',' order by experience), '')) as attribution_version
+    from {{ ref('dim_experience') }}
+),
+
+-- Source high-water marks as of this build, stored on every row written
+build_marks as (
+    select
+        greatest(
+            (select max(updated_at) from {{ ref('fct_order') }}),
+            (select max(updated_at) from {{ ref('fct_order_item') }})
+        ) as orders_updated_at,
+        (select max(last_processed_at) from {{ ref('stg_tock_reservation') }}) as reservations_processed_at,
+        (select max(updated_at) from {{ ref('dim_club_membership') }}) as memberships_updated_at,
+        (select attribution_version from attribution) as attribution_version
+),
+
+{% if is_incremental() %}
+watermarks as (
+    {% if bookkeeping_ready %}
+    select
+        max(_orders_updated_at) - interval '3 days' as orders_updated_at,
+        max(_reservations_processed_at) - interval '3 days' as reservations_processed_at,
+        max(_memberships_updated_at) - interval '3 days' as memberships_updated_at,
+        max(_attribution_version) as attribution_version,
+        max(fiscal_year) filter (where fiscal_year_period = 'Current') as current_fiscal_year
+    from {{ this }}
+    {% else %}
+    -- First incremental run on a table built before the bookkeeping columns: rebuild everything
+    select
+        null::timestamp as orders_updated_at,
+        null::timestamptz as reservations_processed_at,
+        null::timestamp as memberships_updated_at,
+        null::text as attribution_version,
+        null::int as current_fiscal_year
+    {% endif %}
+),
+
+restate_from as (
+    -- Earliest date every later date is recomputed from
+    select
+        least(
+            hr.current_date - 1,
+            (
+                select min(date(least(dcm.signup_at, dcm.cancel_at)))
+                from {{ ref('dim_club_membership') }} dcm
+                where dcm.updated_at >= w.memberships_updated_at
+            ),
+            case
+                when w.orders_updated_at is null
+                  or w.attribution_version is distinct from (select attribution_version from attribution)
+                  or w.current_fiscal_year is distinct from (
+                        select fiscal_year from {{ ref('dim_date') }} where date_day = hr.current_date
+                     )
+                then hr.init_date
+            end
+        ) as date_day
+    from watermarks w
+    cross join history_range hr
+),
+
+touched_dates as (
+    select fo.order_date_key as date_day
+    from {{ ref('fct_order') }} fo
+    cross join watermarks w
+    where fo.updated_at >= w.orders_updated_at
+    union
+    select date(fo.event_revenue_realization_date)
+    from {{ ref('fct_order') }} fo
+    cross join watermarks w
+    where fo.updated_at >= w.orders_updated_at
+    and fo.event_revenue_realization_date is not null
+    union
+    select date(foi.paid_at)
+    from {{ ref('fct_order_item') }} foi
+    cross join watermarks w
+    where foi.updated_at >= w.orders_updated_at
+    union
+    select date(str.reservation_datetime)
+    from {{ ref('stg_tock_reservation') }} str
+    cross join watermarks w
+    where str.last_processed_at >= w.reservations_processed_at
+    union
+    select dd.date_day
+    from {{ ref('dim_date') }} dd
+    cross join restate_from rf
+    cross join history_range hr
+    where dd.date_day >= rf.date_day
+    and dd.date_day <= hr.current_date
+),
+
+date_range as (
+    -- Only scan facts from the earliest touched date
+    select
+        hr.current_date,
+        greatest(hr.init_date, coalesce((select min(date_day) from touched_dates), hr.current_date)) as init_date
+    from history_range hr
+),
+{% else %}
+date_range as (
+    select * from history_range
+),
+{% endif %}
+
 daily_tasting_room_wine as (
     select
         fo.order_date_key as date_day,
@@ -330,6 +459,9 @@ date_spine as (
     cross join date_range dr
     where dd.date_day >= dr.init_date
     and dd.date_day <= dr.current_date
+    {% if is_incremental() %}
+    and dd.date_day in (select date_day from touched_dates)
+    {% endif %}
 ),
 
 -- Total Active Club Membership (point-in-time count as of each date, from
@@ -438,9 +570,17 @@ select
     coalesce(dtro.tasting_room_order_count, 0) as tasting_room_orders,
     
     -- Tasting Room Bottles Sold
-    coalesce(dtrb.tasting_room_bottles_sold, 0) as tasting_room_bottles_sold
+    coalesce(dtrb.tasting_room_bottles_sold, 0) as tasting_room_bottles_sold,
+    
+    -- Incremental bookkeeping (see header)
+    bm.orders_updated_at as _orders_updated_at,
+    bm.reservations_processed_at as _reservations_processed_at,
+    bm.memberships_updated_at as _memberships_updated_at,
+    bm.attribution_version as _attribution_version,
+    current_timestamp as _built_at
 
 from date_spine ds
+cross join build_marks bm
 left join daily_tasting_room_wine dtrw on ds.date_day = dtrw.date_day
 left join daily_tasting_room_fees dtrf on ds.date_day = dtrf.date_day
 left join daily_tasting_lounge_revenue dtlr on ds.date_day = dtlr.date_day
@@ -4,333 +4,42 @@
   )
 }}
 
-with tasting_room_metrics as (
+{%- set metrics = [
+    'tasting_room_wine', 'tasting_room_fees', 'wine_club', 'ecomm',
+    'phone', 'event_fees', 'event_wine', 'shipping'
+] -%}
+
+-- Every metric is a conditional sum over one scan of fct_revenue_daily:
+-- the current fiscal year, and the prior fiscal year up to the same date.
+with current_periods as (
+    select
+        current_date_pacific,
+        fiscal_year as current_fiscal_year,
+        (
+            select fiscal_year_start
+            from {{ ref('dim_date') }}
+            where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
+        )::date as prior_period_start,
+        current_date_pacific - interval '1 year' as prior_period_end
+    from {{ ref('dim_date') }}
+    where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
+),
+
+tasting_room_metrics as (
     select
-        -- Tasting Room Wine Actual: Current fiscal year
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            )
-        ), 0) as tasting_room_wine_actual,
-        
-        -- Tasting Room Wine Prior: Previous fiscal year (same date range)
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            ) - 1
-            and fo.order_date_key >= (
-                select fiscal_year_start
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-            )::date
-            and fo.order_date_key <= (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-        ), 0) as tasting_room_wine_prior,
-        
-        -- Tasting Room Fees Actual: Current fiscal year
-        coalesce((
-            select sum(ftr.final_total)
-            from {{ ref('fct_tock_reservation') }} ftr
-            left join {{ ref('dim_experience') }} de on ftr.experience_name = de.experience
-            left join {{ ref('dim_date') }} dd on date(ftr.reservation_datetime) = dd.date_day
-            where de.attribution = 'Tasting Room'
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            )
-        ), 0) as tasting_room_fees_actual,
-        
-        -- Tasting Room Fees Prior: Previous fiscal year (same date range)
-        coalesce((
-            select sum(ftr.final_total)
-            from {{ ref('fct_tock_reservation') }} ftr
-            left join {{ ref('dim_experience') }} de on ftr.experience_name = de.experience
-            left join {{ ref('dim_date') }} dd on date(ftr.reservation_datetime) = dd.date_day
-            where de.attribution = 'Tasting Room'
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            ) - 1
-            and date(ftr.reservation_datetime) >= (
-                select fiscal_year_start
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-            )::date
-            and date(ftr.reservation_datetime) <= (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-        ), 0) as tasting_room_fees_prior,
-        
-        -- Wine Club Actual: Current fiscal year
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            where fo.channel = 'Club'
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            )
-        ), 0) + coalesce((
-            select sum(ftr.final_total)
-            from {{ ref('fct_tock_reservation') }} ftr
-            left join {{ ref('dim_experience') }} de on ftr.experience_name = de.experience
-            left join {{ ref('dim_date') }} dd on date(ftr.reservation_datetime) = dd.date_day
-            where de.attribution = 'Club'
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            )
-        ), 0) as wine_club_actual,
-        
-        -- Wine Club Prior: Previous fiscal year (same date range)
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            where fo.channel = 'Club'
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            ) - 1
-            and fo.order_date_key >= (
-                select fiscal_year_start
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-            )::date
-            and fo.order_date_key <= (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-        ), 0) + coalesce((
-            select sum(ftr.final_total)
-            from {{ ref('fct_tock_reservation') }} ftr
-            left join {{ ref('dim_experience') }} de on ftr.experience_name = de.experience
-            left join {{ ref('dim_date') }} dd on date(ftr.reservation_datetime) = dd.date_day
-            where de.attribution = 'Club'
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            ) - 1
-            and date(ftr.reservation_datetime) >= (
-                select fiscal_year_start
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-            )::date
-            and date(ftr.reservation_datetime) <= (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-        ), 0) as wine_club_prior,
-        
-        -- eComm Actual: Current fiscal year
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            where fo.channel = 'Web'
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            )
-        ), 0) as ecomm_actual,
-        
-        -- eComm Prior: Previous fiscal year (same date range)
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            where fo.channel = 'Web'
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            ) - 1
-            and fo.order_date_key >= (
-                select fiscal_year_start
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-            )::date
-            and fo.order_date_key <= (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-        ), 0) as ecomm_prior,
-        
-        -- Phone Actual: Current fiscal year
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            where fo.channel = 'Inbound'
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            )
-        ), 0) as phone_actual,
-        
-        -- Phone Prior: Previous fiscal year (same date range)
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            where fo.channel = 'Inbound'
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            ) - 1
-            and fo.order_date_key >= (
-                select fiscal_year_start
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-            )::date
-            and fo.order_date_key <= (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-        ), 0) as phone_prior,
-        
-        -- Event Fees Actual: Current fiscal year
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            where fo.event_fee_or_wine = 'Event Fee'
-            and fo.event_specific_sale = 'true'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            )
-        ), 0) + coalesce((
-            select sum(ftr.final_total)
-            from {{ ref('fct_tock_reservation') }} ftr
-            left join {{ ref('dim_experience') }} de on ftr.experience_name = de.experience
-            left join {{ ref('dim_date') }} dd on date(ftr.reservation_datetime) = dd.date_day
-            where de.attribution = 'Event'
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            )
-        ), 0) as event_fees_actual,
-        
-        -- Event Fees Prior: Previous fiscal year (same date range)
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            where fo.event_fee_or_wine = 'Event Fee'
-            and fo.event_specific_sale = 'true'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            ) - 1
-            and fo.order_date_key >= (
-                select fiscal_year_start
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-            )::date
-            and fo.order_date_key <= (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-        ), 0) + coalesce((
-            select sum(ftr.final_total)
-            from {{ ref('fct_tock_reservation') }} ftr
-            left join {{ ref('dim_experience') }} de on ftr.experience_name = de.experience
-            left join {{ ref('dim_date') }} dd on date(ftr.reservation_datetime) = dd.date_day
-            where de.attribution = 'Event'
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            ) - 1
-            and date(ftr.reservation_datetime) >= (
-                select fiscal_year_start
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-            )::date
-            and date(ftr.reservation_datetime) <= (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-        ), 0) as event_fees_prior,
-        
-        -- Event Wine Actual: Current fiscal year
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            where fo.event_fee_or_wine = 'Event Wine'
-            and fo.event_specific_sale = 'true'
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            )
-        ), 0) as event_wine_actual,
-        
-        -- Event Wine Prior: Previous fiscal year (same date range)
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            where fo.event_fee_or_wine = 'Event Wine'
-            and fo.event_specific_sale = 'true'
-            and dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            ) - 1
-            and fo.order_date_key >= (
-                select fiscal_year_start
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-            )::date
-            and fo.order_date_key <= (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-        ), 0) as event_wine_prior,
-        
-        -- Shipping Actual: Current fiscal year
-        coalesce((
-            select sum(fo.shipping)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            where dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            )
-        ), 0) as shipping_actual,
-        
-        -- Shipping Prior: Previous fiscal year (same date range)
-        coalesce((
-            select sum(fo.shipping)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            where dd.fiscal_year = (
-                select fiscal_year 
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
-            ) - 1
-            and fo.order_date_key >= (
-                select fiscal_year_start
-                from {{ ref('dim_date') }} 
-                where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-            )::date
-            and fo.order_date_key <= (select current_date_pacific from {{ ref('dim_date') }} limit 1) - interval '1 year'
-        ), 0) as shipping_prior
+        {%- for metric in metrics %}
+        coalesce(sum(case when dd.fiscal_year = cp.current_fiscal_year then r.{{ metric }} end), 0) as {{ metric }}_actual,
+        coalesce(sum(case
+            when dd.fiscal_year = cp.current_fiscal_year - 1
+            and r.date_day >= cp.prior_period_start
+            and r.date_day <= cp.prior_period_end
+            then r.{{ metric }}
+        end), 0) as {{ metric }}_prior{{ ',' if not loop.last }}
+        {%- endfor %}
+    from {{ ref('fct_revenue_daily') }} r
+    join {{ ref('dim_date') }} dd on r.date_day = dd.date_day
+    cross join current_periods cp
+    where dd.fiscal_year in (cp.current_fiscal_year, cp.current_fiscal_year - 1)
 )
 
 select
@@ -4,11 +4,18 @@
   )
 }}
 
+{%- set months = [
+    ('jul', 7), ('aug', 8), ('sep', 9), ('oct', 10), ('nov', 11), ('dec', 12),
+    ('jan', 1), ('feb', 2), ('mar', 3), ('apr', 4), ('may', 5), ('jun', 6)
+] -%}
+
+-- Every metric is a conditional sum over one scan of fct_revenue_daily.
 with current_periods as (
     select 
         current_date_pacific,
         fiscal_year as current_fiscal_year,
-        fiscal_month as current_fiscal_month
+        fiscal_month as current_fiscal_month,
+        date_trunc('month', current_date_pacific)::date + interval '1 month' - interval '1 day' - interval '1 year' as prior_month_to_date_end
     from {{ ref('dim_date') }} 
     where date_day = (select current_date_pacific from {{ ref('dim_date') }} limit 1)
 ),
@@ -16,399 +23,30 @@ with current_periods as (
 monthly_metrics as (
     select
         -- Tasting Room Wine Month-to-Date: Current fiscal month
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year
+        coalesce(sum(case
+            when dd.fiscal_year = cp.current_fiscal_year
             and dd.fiscal_month = cp.current_fiscal_month
-            and fo.order_date_key <= cp.current_date_pacific
-        ), 0) as tasting_room_wine_month_to_date,
+            and r.date_day <= cp.current_date_pacific
+            then r.tasting_room_wine
+        end), 0) as tasting_room_wine_month_to_date,
         
         -- Tasting Room Wine Month-to-Date Prior: Previous fiscal year same month
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year - 1
+        coalesce(sum(case
+            when dd.fiscal_year = cp.current_fiscal_year - 1
             and dd.fiscal_month = cp.current_fiscal_month
-            and fo.order_date_key <= (
-                select date_trunc('month', cp.current_date_pacific)::date + interval '1 month' - interval '1 day'
-                from current_periods
-            ) - interval '1 year'
-        ), 0) as tasting_room_wine_month_to_date_prior,
-        
-        -- Tasting Room Wine Jul: Current fiscal year July
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year
-            and dd.month = 7
-        ), 0) as tasting_room_wine_jul,
-        
-        -- Tasting Room Wine Jul Prior: Previous fiscal year July
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year - 1
-            and dd.month = 7
-        ), 0) as tasting_room_wine_jul_prior,
-        
-        -- Tasting Room Wine Aug: Current fiscal year August
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year
-            and dd.month = 8
-        ), 0) as tasting_room_wine_aug,
-        
-        -- Tasting Room Wine Aug Prior: Previous fiscal year August
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year - 1
-            and dd.month = 8
-        ), 0) as tasting_room_wine_aug_prior,
-        
-        -- Tasting Room Wine Sep: Current fiscal year September
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year
-            and dd.month = 9
-        ), 0) as tasting_room_wine_sep,
-        
-        -- Tasting Room Wine Sep Prior: Previous fiscal year September
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year - 1
-            and dd.month = 9
-        ), 0) as tasting_room_wine_sep_prior,
-        
-        -- Tasting Room Wine Oct: Current fiscal year October
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year
-            and dd.month = 10
-        ), 0) as tasting_room_wine_oct,
-        
-        -- Tasting Room Wine Oct Prior: Previous fiscal year October
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year - 1
-            and dd.month = 10
-        ), 0) as tasting_room_wine_oct_prior,
-        
-        -- Tasting Room Wine Nov: Current fiscal year November
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year
-            and dd.month = 11
-        ), 0) as tasting_room_wine_nov,
-        
-        -- Tasting Room Wine Nov Prior: Previous fiscal year November
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year - 1
-            and dd.month = 11
-        ), 0) as tasting_room_wine_nov_prior,
-        
-        -- Tasting Room Wine Dec: Current fiscal year December
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year
-            and dd.month = 12
-        ), 0) as tasting_room_wine_dec,
-        
-        -- Tasting Room Wine Dec Prior: Previous fiscal year December
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year - 1
-            and dd.month = 12
-        ), 0) as tasting_room_wine_dec_prior,
-        
-        -- Tasting Room Wine Jan: Current fiscal year January
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year
-            and dd.month = 1
-        ), 0) as tasting_room_wine_jan,
-        
-        -- Tasting Room Wine Jan Prior: Previous fiscal year January
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year - 1
-            and dd.month = 1
-        ), 0) as tasting_room_wine_jan_prior,
-        
-        -- Tasting Room Wine Feb: Current fiscal year February
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year
-            and dd.month = 2
-        ), 0) as tasting_room_wine_feb,
-        
-        -- Tasting Room Wine Feb Prior: Previous fiscal year February
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year - 1
-            and dd.month = 2
-        ), 0) as tasting_room_wine_feb_prior,
-        
-        -- Tasting Room Wine Mar: Current fiscal year March
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year
-            and dd.month = 3
-        ), 0) as tasting_room_wine_mar,
-        
-        -- Tasting Room Wine Mar Prior: Previous fiscal year March
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year - 1
-            and dd.month = 3
-        ), 0) as tasting_room_wine_mar_prior,
-        
-        -- Tasting Room Wine Apr: Current fiscal year April
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year
-            and dd.month = 4
-        ), 0) as tasting_room_wine_apr,
-        
-        -- Tasting Room Wine Apr Prior: Previous fiscal year April
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year - 1
-            and dd.month = 4
-        ), 0) as tasting_room_wine_apr_prior,
-        
-        -- Tasting Room Wine May: Current fiscal year May
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year
-            and dd.month = 5
-        ), 0) as tasting_room_wine_may,
-        
-        -- Tasting Room Wine May Prior: Previous fiscal year May
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year - 1
-            and dd.month = 5
-        ), 0) as tasting_room_wine_may_prior,
-        
-        -- Tasting Room Wine Jun: Current fiscal year June
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year
-            and dd.month = 6
-        ), 0) as tasting_room_wine_jun,
-        
-        -- Tasting Room Wine Jun Prior: Previous fiscal year June
-        coalesce((
-            select sum(fo.subtotal)
-            from {{ ref('fct_order') }} fo
-            left join {{ ref('dim_date') }} dd on fo.order_date_key = dd.date_day
-            cross join current_periods cp
-            where fo.channel = 'POS'
-            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
-            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
-            and fo.event_fee_or_wine is null
-            and fo.event_specific_sale is null
-            and dd.fiscal_year = cp.current_fiscal_year - 1
-            and dd.month = 6
-        ), 0) as tasting_room_wine_jun_prior
+            and r.date_day <= cp.prior_month_to_date_end
+            then r.tasting_room_wine
+        end), 0) as tasting_room_wine_month_to_date_prior,
+        {%- for name, month in months %}
+        
+        -- Tasting Room Wine {{ name | title }}: current and previous fiscal year
+        coalesce(sum(case when dd.fiscal_year = cp.current_fiscal_year and dd.month = {{ month }} then r.tasting_room_wine end), 0) as tasting_room_wine_{{ name }},
+        coalesce(sum(case when dd.fiscal_year = cp.current_fiscal_year - 1 and dd.month = {{ month }} then r.tasting_room_wine end), 0) as tasting_room_wine_{{ name }}_prior{{ ',' if not loop.last }}
+        {%- endfor %}
+    from {{ ref('fct_revenue_daily') }} r
+    join {{ ref('dim_date') }} dd on r.date_day = dd.date_day
+    cross join current_periods cp
+    where dd.fiscal_year in (cp.current_fiscal_year, cp.current_fiscal_year - 1)
 )
 
 select
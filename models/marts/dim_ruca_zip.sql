@@ -0,0 +1,39 @@
+{{ config(
+    materialized='table',
+    indexes=[{'columns': ['zip5'], 'unique': True}]
+) }}
+
+-- ZIP -> RUCA lookup keyed on a zero-padded 5-character ZIP. The dim_ruca seed
+-- loads "ZIPCode" as an integer, so leading zeros (00001, 02134) are lost and a
+-- plain text cast never matches those ZIPs. Categories and descriptions are
+-- resolved here once instead of per customer.
+
+select
+    lpad("ZIPCode"::text, 5, '0')::char(5) as zip5,
+    "State" as state,
+    "POName" as place_name,
+    "PrimaryRUCA" as primary_ruca_code,
+    "SecondaryRUCA" as secondary_ruca_code,
+    -- RUCA classification categories
+    case
+        when "PrimaryRUCA" in (1, 2, 3) then 'Metropolitan'
+        when "PrimaryRUCA" in (4, 5, 6) then 'Micropolitan'
+        when "PrimaryRUCA" in (7, 8, 9) then 'Small Town'
+        when "PrimaryRUCA" = 10 then 'Rural'
+        else 'Unknown'
+    end as ruca_category,
+    -- Detailed RUCA descriptions
+    case
+        when "PrimaryRUCA" = 1 then 'Metropolitan area core: primary flow within an urbanized area (UA)'
+        when "PrimaryRUCA" = 2 then 'Metropolitan area high commuting: primary flow 30% or more to a UA'
+        when "PrimaryRUCA" = 3 then 'Metropolitan area low commuting: primary flow 10% to 30% to a UA'
+        when "PrimaryRUCA" = 4 then 'Micropolitan area core: primary flow within an urban cluster of 10,000 to 49,999 (large UC)'
+        when "PrimaryRUCA" = 5 then 'Micropolitan high commuting: primary flow 30% or more to a large UC'
+        when "PrimaryRUCA" = 6 then 'Micropolitan low commuting: primary flow 10% to 30% to a large UC'
+        when "PrimaryRUCA" = 7 then 'Small town core: primary flow within an urban cluster of 2,500 to 9,999 (small UC)'
+        when "PrimaryRUCA" = 8 then 'Small town high commuting: primary flow 30% or more to a small UC'
+        when "PrimaryRUCA" = 9 then 'Small town low commuting: primary flow 10% to 30% to a small UC'
+        when "PrimaryRUCA" = 10 then 'Rural areas: primary flow to a tract outside a UA or UC'
+        else 'Unknown'
+    end as ruca_description
+from {{ ref('dim_ruca') }}
@@ -0,0 +1,374 @@
+{{
+  config(
+    materialized='incremental',
+    unique_key='customer_id',
+    incremental_strategy='merge',
+    indexes=[{'columns': ['customer_id'], 'unique': True}]
+  )
+}}
+
+{#-
+  Per-customer purchase history behind dim_customer_segmentation: order-item,
+  order, sales-associate, price-tier, varietal/color and seasonality signals.
+  Everything here is a function of the customer's own orders, so incremental
+  runs recompute only customers that could have changed since the last build,
+  found from the source high-water marks stored on each row:
+    - customers with orders or order items updated since (_orders_updated_at)
+    - buyers of products whose varietal/type changed since (_products_updated_at)
+    - customers whose Wine purchases left the trailing 12-month window between
+      the last build's date (_window_date) and today
+  Anything relative to today (recency, RFM ntiles, lifecycle) is derived in
+  dim_customer_segmentation. An order moved to another customer only refreshes
+  its new customer; DBT_FULL_REFRESH=1 rebuilds every customer.
+-#}
+{% set changed_only %}
+  {%- if is_incremental() %}and customer_id in (select customer_id from changed_customers){% endif -%}
+{% endset %}
+
+with build_marks as (
+    -- Source high-water marks as of this build, stored on every row written
+    select
+        greatest(
+            (select max(updated_at) from {{ ref('fct_order') }}),
+            (select max(updated_at) from {{ ref('fct_order_item') }})
+        ) as orders_updated_at,
+        (select max(updated_at) from {{ ref('stg_product') }}) as products_updated_at,
+        current_date as window_date
+),
+
+{% if is_incremental() %}
+watermarks as (
+    select
+        coalesce(max(_orders_updated_at) - interval '3 days', date '2000-01-01') as orders_updated_at,
+        coalesce(max(_products_updated_at) - interval '3 days', date '2000-01-01') as products_updated_at,
+        max(_window_date) as window_date
+    from {{ this }}
+),
+
+changed_customers as (
+    select oi.customer_id
+    from {{ ref('fct_order_item') }} oi
+    cross join watermarks w
+    where oi.updated_at >= w.orders_updated_at
+    union
+    select o.customer_id
+    from {{ ref('fct_order') }} o
+    cross join watermarks w
+    where o.updated_at >= w.orders_updated_at
+    union
+    select oi.customer_id
+    from {{ ref('fct_order_item') }} oi
+    join {{ ref('stg_product') }} dp on oi.product_id = dp.product_id
+    cross join watermarks w
+    where dp.updated_at >= w.products_updated_at
+    union
+    -- Wine purchases that aged out of the 12-month window since the last build
+    select oi.customer_id
+    from {{ ref('fct_order_item') }} oi
+    cross join watermarks w
+    where oi.item_type = 'Wine'
+      and oi.paid_date >= (w.window_date - interval '1 year')
+      and oi.paid_date < (current_date - interval '1 year')
+),
+{% endif %}
+
+customers as (
+    {% if is_incremental() %}
+    select customer_id from changed_customers where customer_id is not null
+    {% else %}
+    select customer_id from {{ ref('fct_order_item') }} where customer_id is not null
+    union
+    select customer_id from {{ ref('fct_order') }} where customer_id is not null
+    {% endif %}
+),
+
+-- Order-level metrics from order items
+order_item_metrics as (
+    select
+        oi.customer_id,
+        max(oi.paid_date) as last_order_date,
+        min(oi.paid_date) as first_order_date,
+        count(distinct case when oi.paid_date >= (current_date - interval '1 year') and oi.item_type = 'Wine' then oi.order_id end) as orders_12mo,
+        sum(case when oi.paid_date >= (current_date - interval '1 year') and oi.item_type = 'Wine' then oi.product_subtotal end) as revenue_12mo,
+        nullif(sum(case when oi.paid_date >= (current_date - interval '1 year') and oi.item_type = 'Wine' then oi.product_subtotal end), 0)
+            / nullif(count(distinct case when oi.paid_date >= (current_date - interval '1 year') and oi.item_type = 'Wine' then oi.order_id end), 0) as aov_12mo,
+        avg(case when oi.item_type = 'Wine' then oi.item_price end) as avg_unit_price_all_time,
+        count(distinct case when oi.item_type = 'Wine' then oi.order_id end) as total_orders,
+        sum(case when oi.item_type = 'Wine' then oi.product_subtotal end) as lifetime_revenue,
+        sum(case when oi.item_type = 'Wine' then oi.quantity end) as total_items_purchased,
+        -- Calculate average items per order: total items / distinct orders
+        nullif(sum(case when oi.item_type = 'Wine' then oi.quantity end), 0)::numeric
+            / nullif(count(distinct case when oi.item_type = 'Wine' then oi.order_id end), 0)::numeric as avg_items_per_order
+    from {{ ref('fct_order_item') }} oi
+    where oi.customer_id is not null
+    {{ changed_only }}
+    group by 1
+),
+
+-- Order-level metrics from fct_order (channel, delivery, totals)
+order_level_metrics as (
+    select
+        o.customer_id,
+        count(distinct o.order_id) as total_order_count,
+        sum(o.order_total) as lifetime_order_total,
+        -- Channel distribution
+        count(distinct case when o.channel = 'Web' then o.order_id end) as online_orders,
+        count(distinct case when o.channel = 'POS' then o.order_id end) as pos_orders,
+        count(distinct case when o.channel = 'Inbound' then o.order_id end) as inbound_orders,
+        count(distinct case when o.channel = 'Club' then o.order_id end) as club_orders,
+        -- Delivery method distribution
+        count(distinct case when o.delivery_method = 'Pickup' then o.order_id end) as pickup_orders,
+        count(distinct case when o.delivery_method = 'Ship' then o.order_id end) as shipping_orders,
+        count(distinct case when o.delivery_method = 'Carry Out' then o.order_id end) as carry_out_orders,
+        -- Payment and fulfillment status
+        count(distinct case when o.payment_status = 'Paid' then o.order_id end) as paid_orders,
+        max(o.order_date_key) as last_order_date_from_orders
+    from {{ ref('fct_order') }} o
+    where o.customer_id is not null
+    {{ changed_only }}
+    group by 1
+),
+
+-- Sales associate attribution
+sales_associate_metrics as (
+    select
+        osoi.customer_id,
+        count(distinct osoi.sales_associate_id) as distinct_sales_associates,
+        mode() within group (order by osoi.sales_associate) as primary_sales_associate,
+        count(distinct case when osoi.sales_associate_id is not null then osoi.order_id end) as orders_with_associate
+    from {{ ref('stg_order_item') }} osoi
+    where osoi.customer_id is not null
+        and osoi.sales_associate_id is not null
+        {{ changed_only }}
+    group by 1
+),
+
+-- Price tier and preference signals (varietal/color)
+preference_signals as (
+    with line as (
+        select
+            oi.customer_id,
+            oi.order_id,
+            coalesce(dp.varietal, 'Unknown') as varietal,
+            case
+                when dp.wine_type is null then 'Unknown'
+                when lower(dp.wine_type) in ('red','white','rosé','rose','sparkling') then
+                    initcap(replace(lower(dp.wine_type), 'rose', 'rosé'))
+                else 'Unknown'
+            end as color,
+            oi.item_price,
+            oi.item_type,
+            oi.product_subtotal
+        from {{ ref('fct_order_item') }} oi
+        left join {{ ref('stg_product') }} dp on oi.product_id = dp.product_id
+        where oi.item_type = 'Wine'
+        {{ changed_only }}
+    ),
+    spend as (
+        select
+            customer_id,
+            sum(product_subtotal) as total_spend,
+            sum(case when item_price < 95 then product_subtotal end) as spend_value,
+            sum(case when item_price >= 95 and item_price < 125 then product_subtotal end) as spend_mid,
+            sum(case when item_price >= 125 and item_price < 175 then product_subtotal end) as spend_premium,
+            sum(case when item_price >= 175 then product_subtotal end) as spend_luxury
+        from line
+        group by 1
+    ),
+    varietal_rank as (
+        select
+            customer_id,
+            varietal,
+            sum(product_subtotal) as varietal_spend,
+            row_number() over (partition by customer_id order by sum(product_subtotal) desc) as rn,
+            1.0 * sum(product_subtotal)
+                / nullif(sum(sum(product_subtotal)) over (partition by customer_id), 0) as varietal_share
+        from line
+        group by 1, 2
+    ),
+    color_rank as (
+        select
+            customer_id,
+            color,
+            sum(product_subtotal) as color_spend,
+            row_number() over (partition by customer_id order by sum(product_subtotal) desc) as rn,
+            1.0 * sum(product_subtotal)
+                / nullif(sum(sum(product_subtotal)) over (partition by customer_id), 0) as color_share
+        from line
+        group by 1, 2
+    )
+    select
+        s.customer_id,
+        case
+            when greatest(coalesce(spend_luxury, 0), coalesce(spend_premium, 0), coalesce(spend_mid, 0), coalesce(spend_value, 0)) = coalesce(spend_luxury, 0) then 'Luxury'
+            when greatest(coalesce(spend_premium, 0), coalesce(spend_mid, 0), coalesce(spend_value, 0)) = coalesce(spend_premium, 0) then 'Premium'
+            when greatest(coalesce(spend_mid, 0), coalesce(spend_value, 0)) = coalesce(spend_mid, 0) then 'Mid'
+            else 'Value'
+        end as price_tier_preference,
+        nullif(spend_luxury, 0) / nullif(total_spend, 0) as luxury_share,
+        nullif(spend_premium, 0) / nullif(total_spend, 0) as premium_share,
+        nullif(spend_mid, 0) / nullif(total_spend, 0) as mid_share,
+        nullif(spend_value, 0) / nullif(total_spend, 0) as value_share,
+        vr.varietal as top_varietal,
+        vr.varietal_share as top_varietal_share,
+        cr.color as top_color,
+        cr.color_share as top_color_share
+    from spend s
+    left join varietal_rank vr on s.customer_id = vr.customer_id and vr.rn = 1
+    left join color_rank cr on s.customer_id = cr.customer_id and cr.rn = 1
+),
+
+-- Seasonality signals: favorite purchase month by spend
+seasonality as (
+    select
+        oi.customer_id,
+        date_part('month', oi.paid_date)::int as order_month,
+        sum(oi.product_subtotal) as month_spend,
+        row_number() over (partition by oi.customer_id order by sum(oi.product_subtotal) desc) as rn
+    from {{ ref('fct_order_item') }} oi
+    where oi.item_type = 'Wine'
+    {{ changed_only }}
+    group by 1, 2
+),
+
+-- Seasonal patterns: color-by-month combinations
+seasonal_patterns as (
+    select
+        oi.customer_id,
+        date_part('month', oi.paid_date)::int as order_month,
+        case
+            when dp.wine_type is null then 'Unknown'
+            when lower(dp.wine_type) in ('red','white','rosé','rose','sparkling') then
+                initcap(replace(lower(dp.wine_type), 'rose', 'rosé'))
+            else 'Unknown'
+        end as color,
+        sum(oi.product_subtotal) as month_color_spend
+    from {{ ref('fct_order_item') }} oi
+    left join {{ ref('stg_product') }} dp on oi.product_id = dp.product_id
+    where oi.item_type = 'Wine'
+      and oi.paid_date is not null
+      {{ changed_only }}
+    group by 1, 2, 3
+),
+
+-- Seasonal affinity flags: multiple patterns a customer can match
+seasonal_affinity_flags as (
+    select
+        customer_id,
+        -- Summer Rosé (May-August)
+        max(case when color = 'Rosé' and order_month in (5, 6, 7, 8) then 1 else 0 end) as has_summer_rose,
+        -- Summer Whites (May-August)
+        max(case when color = 'White' and order_month in (5, 6, 7, 8) then 1 else 0 end) as has_summer_whites,
+        -- Holiday/Winter Reds (October-February)
+        max(case when color = 'Red' and order_month in (10, 11, 12, 1, 2) then 1 else 0 end) as has_winter_reds,
+        -- Holiday Sparkling (November-December, January)
+        max(case when color = 'Sparkling' and order_month in (11, 12, 1) then 1 else 0 end) as has_holiday_sparkling,
+        -- Valentine's Sparkling (February)
+        max(case when color = 'Sparkling' and order_month = 2 then 1 else 0 end) as has_valentines_sparkling,
+        -- Spring Whites (March-May)
+        max(case when color = 'White' and order_month in (3, 4, 5) then 1 else 0 end) as has_spring_whites,
+        -- Fall Reds (September-November)
+        max(case when color = 'Red' and order_month in (9, 10, 11) then 1 else 0 end) as has_fall_reds,
+        -- Year-round consistency (purchases across all seasons)
+        count(distinct case when order_month in (12, 1, 2) then order_month end) > 0
+            and count(distinct case when order_month in (3, 4, 5) then order_month end) > 0
+            and count(distinct case when order_month in (6, 7, 8) then order_month end) > 0
+            and count(distinct case when order_month in (9, 10, 11) then order_month end) > 0 as has_year_round
+    from seasonal_patterns
+    where color != 'Unknown'
+    group by 1
+)
+
+select
+    c.customer_id,
+    -- Customers the RFM ntiles rank (any order item)
+    (oim.customer_id is not null) as has_order_items,
+
+    -- Order item metrics
+    oim.last_order_date,
+    oim.first_order_date,
+    oim.orders_12mo,
+    oim.revenue_12mo,
+    oim.aov_12mo,
+    oim.avg_unit_price_all_time,
+    oim.total_orders,
+    oim.lifetime_revenue,
+    oim.total_items_purchased,
+    oim.avg_items_per_order,
+
+    -- Order level metrics (from fct_order)
+    olm.total_order_count,
+    olm.lifetime_order_total,
+    olm.online_orders,
+    olm.pos_orders,
+    olm.inbound_orders,
+    olm.club_orders,
+    olm.pickup_orders,
+    olm.shipping_orders,
+    olm.carry_out_orders,
+    olm.paid_orders,
+    olm.last_order_date_from_orders,
+
+    -- Channel preference
+    case
+        when olm.online_orders > coalesce(olm.pos_orders, 0) + coalesce(olm.inbound_orders, 0) + coalesce(olm.club_orders, 0) then 'Online Preferrer'
+        when olm.pos_orders > coalesce(olm.online_orders, 0) + coalesce(olm.inbound_orders, 0) + coalesce(olm.club_orders, 0) then 'POS Preferrer'
+        when olm.inbound_orders > coalesce(olm.online_orders, 0) + coalesce(olm.pos_orders, 0) + coalesce(olm.club_orders, 0) then 'Inbound Preferrer'
+        when olm.club_orders > coalesce(olm.online_orders, 0) + coalesce(olm.pos_orders, 0) + coalesce(olm.inbound_orders, 0) then 'Club Preferrer'
+        when olm.online_orders > 0 or olm.pos_orders > 0 or olm.inbound_orders > 0 or olm.club_orders > 0 then 'Multi-Channel'
+        else 'Unknown'
+    end as channel_preference,
+
+    -- Delivery preference
+    case
+        when olm.pickup_orders > coalesce(olm.shipping_orders, 0) + coalesce(olm.carry_out_orders, 0) then 'Pickup Preferrer'
+        when olm.shipping_orders > coalesce(olm.pickup_orders, 0) + coalesce(olm.carry_out_orders, 0) then 'Shipping Preferrer'
+        when olm.carry_out_orders > coalesce(olm.pickup_orders, 0) + coalesce(olm.shipping_orders, 0) then 'Carry Out Preferrer'
+        when olm.pickup_orders > 0 or olm.shipping_orders > 0 or olm.carry_out_orders > 0 then 'Multi-Delivery'
+        else 'Unknown'
+    end as delivery_preference,
+
+    -- Sales associate metrics
+    sam.distinct_sales_associates,
+    sam.primary_sales_associate,
+    sam.orders_with_associate,
+
+    -- Preference signals
+    ps.price_tier_preference,
+    ps.luxury_share,
+    ps.premium_share,
+    ps.mid_share,
+    ps.value_share,
+    ps.top_varietal,
+    ps.top_varietal_share,
+    ps.top_color,
+    ps.top_color_share,
+
+    s.order_month as favorite_purchase_month,
+
+    -- Seasonal affinity: concatenate all matching categories
+    trim(both ', ' from
+        concat_ws(', ',
+            case when saf.has_summer_rose = 1 then 'Summer Rosé' end,
+            case when saf.has_summer_whites = 1 then 'Summer Whites' end,
+            case when saf.has_winter_reds = 1 then 'Holiday/Winter Reds' end,
+            case when saf.has_holiday_sparkling = 1 then 'Holiday Sparkling' end,
+            case when saf.has_valentines_sparkling = 1 then 'Valentine''s Sparkling' end,
+            case when saf.has_spring_whites = 1 then 'Spring Whites' end,
+            case when saf.has_fall_reds = 1 then 'Fall Reds' end,
+            case when saf.has_year_round = true then 'Year-Round Buyer' end
+        )
+    ) as seasonal_affinity,
+
+    -- Bookkeeping for the next incremental run
+    bm.orders_updated_at as _orders_updated_at,
+    bm.products_updated_at as _products_updated_at,
+    bm.window_date as _window_date
+from customers c
+cross join build_marks bm
+left join order_item_metrics oim on c.customer_id = oim.customer_id
+left join order_level_metrics olm on c.customer_id = olm.customer_id
+left join sales_associate_metrics sam on c.customer_id = sam.customer_id
+left join preference_signals ps on c.customer_id = ps.customer_id
+left join seasonality s on c.customer_id = s.customer_id and s.rn = 1
+left join seasonal_affinity_flags saf on c.customer_id = saf.customer_id
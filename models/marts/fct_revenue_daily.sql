@@ -0,0 +1,69 @@
+{{
+  config(
+    materialized='table'
+  )
+}}
+
+-- Daily revenue at day x channel x attribution grain, pre-classified into the
+-- revenue KPI buckets. agg_revenue_kpis and its monthly/quarterly siblings read
+-- this in a single pass instead of scanning fct_order / fct_tock_reservation
+-- once per metric, so each bucket's filter lives here and only here.
+-- Order rows carry channel (attribution null); Tock rows carry the
+-- dim_experience attribution (channel null).
+
+with order_revenue as (
+    select
+        fo.order_date_key as date_day,
+        'order' as revenue_source,
+        fo.channel,
+        cast(null as varchar) as attribution,
+        sum(case
+            when fo.channel = 'POS'
+            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
+            and (fo.tasting_lounge is null or fo.tasting_lounge = 'false')
+            and fo.event_fee_or_wine is null
+            and fo.event_specific_sale is null
+            then fo.subtotal
+        end) as tasting_room_wine,
+        cast(null as numeric) as tasting_room_fees,
+        sum(case when fo.channel = 'Club' then fo.subtotal end) as wine_club,
+        sum(case when fo.channel = 'Web' then fo.subtotal end) as ecomm,
+        sum(case when fo.channel = 'Inbound' then fo.subtotal end) as phone,
+        sum(case
+            when fo.event_fee_or_wine = 'Event Fee'
+            and fo.event_specific_sale = 'true'
+            and (fo.external_order_vendor is null or fo.external_order_vendor <> 'Tock')
+            then fo.subtotal
+        end) as event_fees,
+        sum(case
+            when fo.event_fee_or_wine = 'Event Wine'
+            and fo.event_specific_sale = 'true'
+            then fo.subtotal
+        end) as event_wine,
+        sum(fo.shipping) as shipping
+    from {{ ref('fct_order') }} fo
+    group by fo.order_date_key, fo.channel
+),
+
+tock_revenue as (
+    select
+        date(ftr.reservation_datetime) as date_day,
+        'tock' as revenue_source,
+        cast(null as varchar) as channel,
+        de.attribution,
+        cast(null as numeric) as tasting_room_wine,
+        sum(case when de.attribution = 'Tasting Room' then ftr.final_total end) as tasting_room_fees,
+        sum(case when de.attribution = 'Club' then ftr.final_total end) as wine_club,
+        cast(null as numeric) as ecomm,
+        cast(null as numeric) as phone,
+        sum(case when de.attribution = 'Event' then ftr.final_total end) as event_fees,
+        cast(null as numeric) as event_wine,
+        cast(null as numeric) as shipping
+    from {{ ref('fct_tock_reservation') }} ftr
+    left join {{ ref('dim_experience') }} de on ftr.experience_name = de.experience
+    group by date(ftr.reservation_datetime), de.attribution
+)
+
+select * from order_revenue
+union all
+select * from tock_revenue
@@ -15,7 +15,8 @@ with base as (
     fulfillment_status,
     delivery_method,
     customer_id,
-    _order_json as o, 
+    sales_associate_id,
+    sales_associate,
     updated_at,
     event_fee_or_wine,
     state_code
@@ -34,30 +35,31 @@ items as (
     b.fulfillment_status,
     b.delivery_method,
     b.customer_id,
-    (i->>'id')::uuid                as order_item_id,
-    i->>'purchaseType'              as purchase_type,
-    i->>'type'                      as item_type,
-    i->>'productTitle'              as product_title,
-    i->>'productSlug'               as product_slug,
-    (i->>'productId')::uuid         as product_id,
-    i->>'productVariantTitle'       as variant_title,
-    (i->>'productVariantId')::uuid  as variant_id,
-    i->>'sku'                       as sku,
-    coalesce((i->>'price')::bigint,0)        as price_cents,
-    coalesce((i->>'comparePrice')::bigint,0) as compare_price_cents,
-    coalesce((i->>'originalPrice')::bigint,0)as original_price_cents,
-    coalesce((i->>'costOfGood')::bigint,0)   as cogs_cents,
-    coalesce((i->>'bottleDeposit')::bigint,0)as bottle_deposit_cents,
-    coalesce((i->>'quantity')::int,0)        as qty,
-    coalesce((i->>'tax')::bigint,0)          as tax_cents,
-    i->>'taxType'                   as tax_type,
-    (b.o->'salesAssociate'->>'accountId')::uuid as sales_associate_id,
-    b.o->'salesAssociate'->>'name' as sales_associate,
+    i.order_item_id,
+    i.purchase_type,
+    i.item_type,
+    i.product_title,
+    i.product_slug,
+    i.product_id,
+    i.variant_title,
+    i.variant_id,
+    i.sku,
+    i.price_cents,
+    i.compare_price_cents,
+    i.original_price_cents,
+    i.cogs_cents,
+    i.bottle_deposit_cents,
+    i.qty,
+    i.tax_cents,
+    i.tax_type,
+    b.sales_associate_id,
+    b.sales_associate,
     b.updated_at,
     b.event_fee_or_wine,
     b.state_code
   from base b
-  cross join lateral jsonb_array_elements(b.o->'items') as i
+  -- Items are parsed at ingest into typed_order_item (one row per order item)
+  join {{ source('raw', 'typed_order_item') }} i on i.order_id = b.order_id
 )
 select * from items
 